@@ -1,12 +1,19 @@
+import itertools
 import json
+import os
+import shutil
 import tempfile
 from typing import List, Optional
 
 from fastapi import APIRouter, File, HTTPException, Request, UploadFile
 from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
 
+from app.core.config import settings
 from app.services.azure_openai import AzureOpenAIService
+from app.services.export import EXPORT_MEDIA_TYPES, ExportFormat
+from app.services.ingestion_jobs import IngestionQueueFullError
 from app.services.query_router import QueryType
 from app.services.session_manager import SessionManager
 
@@ -16,6 +23,9 @@ router = APIRouter()
 openai_service = AzureOpenAIService()
 session_manager = SessionManager()
 
+# Uploads are copied to disk in blocks of this size rather than read whole
+UPLOAD_COPY_BUFFER_SIZE = 1024 * 1024
+
 
 class ContentItem(BaseModel):
     """Content item with type and text"""
@@ -38,6 +48,15 @@ class ChatRequest(BaseModel):
     message: str  # User's message text
 
 
+class SQLExportRequest(BaseModel):
+    """Streaming export of a raw SELECT query"""
+
+    query: str
+    format: ExportFormat = ExportFormat.NDJSON
+    batch_size: int = Field(default=1000, ge=1, le=100000)
+    gzip: bool = True
+
+
 class ChatResponse(BaseModel):
     """Chat response with message in new format"""
 
@@ -46,6 +65,7 @@ class ChatResponse(BaseModel):
     visualization: Optional[dict] = None  # For chart data
     query_type: Optional[str] = None  # For debugging
     data: Optional[List[dict]] = None  # For structured data results
+    sql_query: Optional[str] = None  # Generated SQL, re-runnable via export
 
 
 def extract_text_from_content(content: List[ContentItem]) -> str:
@@ -331,6 +351,11 @@ async def chat(request: Request, chat_request: ChatRequest):
         if sql_result and sql_result.get("data"):
             response["data"] = sql_result["data"]
 
+        # Expose the generated SQL so the full result can be streamed through
+        # /query/sql/export instead of being re-asked in chat
+        if sql_result and sql_result.get("sql_query"):
+            response["sql_query"] = sql_result["sql_query"]
+
         return response
 
     except HTTPException:
@@ -351,6 +376,7 @@ async def chat_stream(request: Request, chat_request: ChatRequest):
         messages = prep_result["messages"]
         query_type = prep_result["query_type"]
         visualization_data = prep_result["visualization_data"]
+        sql_result = prep_result["sql_result"]
 
         user_message_new_format = convert_from_azure_format(
             "user", chat_request.message
@@ -392,6 +418,8 @@ async def chat_stream(request: Request, chat_request: ChatRequest):
                 if hasattr(query_type, "value")
                 else str(query_type),
             }
+            if sql_result and sql_result.get("sql_query"):
+                completion_data["sql_query"] = sql_result["sql_query"]
             yield f"data: {json.dumps(completion_data)}\n\n"
 
         return StreamingResponse(
@@ -433,25 +461,62 @@ async def clear_session(session_id: str):
     return {"message": "Session history cleared successfully"}
 
 
-@router.post("/upload-pdf")
+@router.post("/upload-pdf", status_code=202)
 async def upload_pdf(request: Request, file: UploadFile = File(...)):
-    """Upload and index a PDF document"""
+    """
+    Upload a PDF and queue it for indexing.
+
+    The upload is streamed to disk and ingested by a background worker; poll
+    the returned job via /ingestion/jobs/{job_id} for status and progress.
+    """
     if not file.filename.endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
 
+    ingestion_job_manager = request.app.state.ingestion_job_manager
+
+    try:
+        with tempfile.NamedTemporaryFile(
+            delete=False, suffix=".pdf", dir=settings.UPLOAD_DIR or None
+        ) as tmp_file:
+            await run_in_threadpool(
+                shutil.copyfileobj, file.file, tmp_file, UPLOAD_COPY_BUFFER_SIZE
+            )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
     try:
-        vector_store_service = request.app.state.vector_store_service
+        job = ingestion_job_manager.submit(file.filename, tmp_file.name)
+    except IngestionQueueFullError as e:
+        os.remove(tmp_file.name)
+        raise HTTPException(status_code=429, detail=str(e))
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
-            tmp_file.flush()
+    return {
+        "message": f"PDF '{file.filename}' queued for ingestion",
+        "job_id": job.job_id,
+        "status_url": str(request.url_for("get_ingestion_job", job_id=job.job_id)),
+    }
 
-            vector_store_service.ingest_pdf(tmp_file.name)
 
-        return {"message": f"PDF '{file.filename}' successfully ingested"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+@router.get("/ingestion/jobs")
+async def list_ingestion_jobs(request: Request):
+    """List recent ingestion jobs, newest first"""
+    ingestion_job_manager = request.app.state.ingestion_job_manager
+    return {"jobs": [job.to_dict() for job in ingestion_job_manager.list_jobs()]}
+
+
+@router.get("/ingestion/jobs/{job_id}")
+async def get_ingestion_job(request: Request, job_id: str):
+    """Get status and progress of an ingestion job"""
+    job = request.app.state.ingestion_job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@router.get("/embeddings/cache/stats")
+async def get_embedding_cache_stats(request: Request):
+    """Embedding cache hit ratio and API calls avoided"""
+    return request.app.state.embeddings_service.cache_stats()
 
 
 @router.get("/database/schema")
@@ -485,15 +550,8 @@ async def get_table_sample(request: Request, table_name: str, limit: int = 5):
     return result
 
 
-@router.post("/query/sql")
-async def execute_sql_query(request: Request, query: dict):
-    """Execute a raw SQL query (for advanced users)."""
-    sql_agent_service = request.app.state.sql_agent_service
-
-    if not sql_agent_service:
-        raise HTTPException(status_code=503, detail="Database not available")
-
-    sql_query = query.get("query")
+def validate_select_query(sql_query: Optional[str]) -> None:
+    """Reject anything but a single read-only SELECT statement"""
     if not sql_query:
         raise HTTPException(status_code=400, detail="Query parameter required")
 
@@ -510,6 +568,18 @@ async def execute_sql_query(request: Request, query: dict):
             detail="Only SELECT queries are allowed in this endpoint.",
         )
 
+
+@router.post("/query/sql")
+async def execute_sql_query(request: Request, query: dict):
+    """Execute a raw SQL query (for advanced users)."""
+    sql_agent_service = request.app.state.sql_agent_service
+
+    if not sql_agent_service:
+        raise HTTPException(status_code=503, detail="Database not available")
+
+    sql_query = query.get("query")
+    validate_select_query(sql_query)
+
     result = sql_agent_service.execute_raw_query(sql_query)
 
     if not result["success"]:
@@ -518,6 +588,53 @@ async def execute_sql_query(request: Request, query: dict):
     return result
 
 
+@router.post("/query/sql/export")
+async def export_sql_query(request: Request, export_request: SQLExportRequest):
+    """
+    Stream the result of a raw SQL query as NDJSON, CSV or Parquet.
+
+    Rows are read from the database cursor in batches and written straight to
+    the response, so memory use stays constant for arbitrarily large results.
+    """
+    export_service = request.app.state.export_service
+
+    if not export_service:
+        raise HTTPException(status_code=503, detail="Database not available")
+
+    validate_select_query(export_request.query)
+
+    chunks = export_service.export(
+        export_request.query,
+        export_request.format,
+        batch_size=export_request.batch_size,
+        compress=export_request.gzip,
+    )
+
+    # Pull the first chunk before responding so that SQL errors surface as a
+    # 400 instead of a truncated 200 stream
+    try:
+        first_chunk = await run_in_threadpool(next, chunks)
+    except ImportError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    extension = export_request.format.value
+    headers = {
+        "Content-Disposition": f'attachment; filename="export.{extension}"',
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    }
+    if export_request.gzip:
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(
+        itertools.chain([first_chunk], chunks),
+        media_type=EXPORT_MEDIA_TYPES[export_request.format],
+        headers=headers,
+    )
+
+
 @router.post("/visualize")
 async def create_visualization(request: Request, viz_request: dict):
     """Create visualization from provided data."""
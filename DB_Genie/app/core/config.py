@@ -22,8 +22,52 @@ class Settings(BaseSettings):
         "AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME"
     )
 
+    # Embedding Batching Settings
+    EMBEDDING_BATCH_MAX_INPUTS: int = int(
+        os.getenv("EMBEDDING_BATCH_MAX_INPUTS", "128")
+    )
+    EMBEDDING_BATCH_MAX_TOKENS: int = int(
+        os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "64000")
+    )
+    EMBEDDING_MAX_CONCURRENCY: int = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))
+    EMBEDDING_MAX_RETRIES: int = int(os.getenv("EMBEDDING_MAX_RETRIES", "6"))
+    EMBEDDING_RETRY_BASE_DELAY_SECONDS: float = float(
+        os.getenv("EMBEDDING_RETRY_BASE_DELAY_SECONDS", "1.0")
+    )
+    EMBEDDING_RETRY_MAX_DELAY_SECONDS: float = float(
+        os.getenv("EMBEDDING_RETRY_MAX_DELAY_SECONDS", "60.0")
+    )
+
+    # Embedding Cache Settings
+    EMBEDDING_CACHE_ENABLED: bool = (
+        os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    )
+    EMBEDDING_CACHE_PATH: str = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.db")
+    EMBEDDING_CACHE_MAX_BYTES: int = int(
+        os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(1024 * 1024 * 1024))
+    )
+
+    # Query Embedding Cache Settings (0 entries disables it)
+    QUERY_EMBEDDING_CACHE_SIZE: int = int(
+        os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024")
+    )
+    # Also share query embeddings across workers through EMBEDDING_CACHE_PATH
+    QUERY_EMBEDDING_CACHE_SHARED: bool = (
+        os.getenv("QUERY_EMBEDDING_CACHE_SHARED", "false").lower() == "true"
+    )
+
     # Vector Store Settings
     VECTOR_STORE_PATH: str = os.getenv("VECTOR_STORE_PATH", "vector_store")
+    # flat | flat_fp16 | hnsw | ivf_flat | ivf_pq (IVF falls back to flat until
+    # there are enough vectors to train it)
+    FAISS_INDEX_TYPE: str = os.getenv("FAISS_INDEX_TYPE", "flat")
+    FAISS_IVF_NLIST: int = int(os.getenv("FAISS_IVF_NLIST", "0"))  # 0: 4*sqrt(n)
+    FAISS_IVF_NPROBE: int = int(os.getenv("FAISS_IVF_NPROBE", "16"))
+    FAISS_HNSW_M: int = int(os.getenv("FAISS_HNSW_M", "32"))
+    FAISS_HNSW_EF_CONSTRUCTION: int = int(os.getenv("FAISS_HNSW_EF_CONSTRUCTION", "80"))
+    FAISS_HNSW_EF_SEARCH: int = int(os.getenv("FAISS_HNSW_EF_SEARCH", "64"))
+    FAISS_PQ_M: int = int(os.getenv("FAISS_PQ_M", "0"))  # 0: dimension / 16
+    FAISS_PQ_NBITS: int = int(os.getenv("FAISS_PQ_NBITS", "8"))
 
     # Database Settings
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///hr_data.db")
@@ -31,6 +75,25 @@ class Settings(BaseSettings):
 
     # PDF Policies Folder
     HR_POLICIES_FOLDER: str = os.getenv("HR_POLICIES_FOLDER", "HR Policies Index")
+    # Worker processes for parsing the folder (0: one per CPU); PDFs longer than
+    # PDF_PARSE_PAGES_PER_TASK pages are split across several workers
+    PDF_PARSE_MAX_WORKERS: int = int(os.getenv("PDF_PARSE_MAX_WORKERS", "0"))
+    PDF_PARSE_PAGES_PER_TASK: int = int(os.getenv("PDF_PARSE_PAGES_PER_TASK", "50"))
+
+    # Background Ingestion Settings
+    UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", "")  # empty: system temp dir
+    INGESTION_MAX_WORKERS: int = int(os.getenv("INGESTION_MAX_WORKERS", "2"))
+    INGESTION_MAX_PENDING: int = int(os.getenv("INGESTION_MAX_PENDING", "16"))
+
+    # Session Storage Settings
+    SESSION_BACKEND: str = os.getenv("SESSION_BACKEND", "sqlite")  # sqlite | redis
+    SESSION_DB_PATH: str = os.getenv("SESSION_DB_PATH", "sessions.db")
+    SESSION_REDIS_URL: str = os.getenv("SESSION_REDIS_URL", "")
+    SESSION_TTL_SECONDS: int = int(os.getenv("SESSION_TTL_SECONDS", "86400"))
+    SESSION_CACHE_SIZE: int = int(os.getenv("SESSION_CACHE_SIZE", "256"))
+    SESSION_PURGE_INTERVAL_SECONDS: int = int(
+        os.getenv("SESSION_PURGE_INTERVAL_SECONDS", "300")
+    )
 
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
@@ -68,3 +131,14 @@ try:
 except Exception:
     # Fall back to the original value on any unexpected error; don't crash at import time
     pass
+
+# Resolve relative paths of shared local databases against the app package,
+# for the same reason as the sqlite DATABASE_URL above: every worker must open
+# the same file regardless of its working directory.
+for _setting in ("SESSION_DB_PATH", "EMBEDDING_CACHE_PATH"):
+    if not Path(getattr(settings, _setting)).is_absolute():
+        setattr(
+            settings,
+            _setting,
+            str((Path(__file__).parent.parent / getattr(settings, _setting)).resolve()),
+        )
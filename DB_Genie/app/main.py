@@ -8,6 +8,8 @@ from app.api.routes import chat
 from app.core.config import settings
 from app.services.database import DatabaseService
 from app.services.embeddings import EmbeddingsService
+from app.services.export import ExportService
+from app.services.ingestion_jobs import IngestionJobManager
 from app.services.query_router import QueryRouterService
 from app.services.sql_agent import SQLAgentService
 from app.services.vector_store import VectorStoreService
@@ -48,19 +50,25 @@ async def startup_event():
         # Initialize embeddings service
         embeddings_service = EmbeddingsService()
 
-        # Initialize vector store service
-        vector_store_service = VectorStoreService(embeddings_service)
+        # Initialize vector store service, persisting the index so restarts
+        # can skip re-embedding unchanged policy documents
+        app_dir = Path(__file__).parent
+        vector_store_service = VectorStoreService(
+            embeddings_service,
+            persist_path=str(app_dir / settings.VECTOR_STORE_PATH),
+        )
 
         # Pre-index PDF files if folder exists
-        app_dir = Path(__file__).parent
         policies_dir = (
             app_dir / settings.HR_POLICIES_FOLDER
         )  # FIX: Use config instead of hardcoded path
 
+        vector_store_service.load()
         if policies_dir.exists():
             logger.info(f"Pre-indexing PDFs from {policies_dir}...")
             try:
-                vector_store_service.ingest_directory(str(policies_dir))
+                # Only new or changed PDFs are parsed and embedded
+                vector_store_service.sync_directory(str(policies_dir))
                 logger.info("PDF pre-indexing completed successfully")
             except Exception as e:
                 logger.error(f"Error during PDF pre-indexing: {str(e)}")
@@ -96,19 +104,33 @@ async def startup_event():
                 logger.error(f"Database initialization error: {str(e)}")
                 logger.warning("Continuing without database support")
 
+        # Initialize streaming export service (needs a database)
+        export_service = (
+            ExportService(database_service) if database_service is not None else None
+        )
+
         # Initialize visualization service
         visualization_service = VisualizationService()
 
         # Initialize query router
         query_router_service = QueryRouterService()
 
+        # Initialize background ingestion for uploaded PDFs
+        ingestion_job_manager = IngestionJobManager(
+            vector_store_service,
+            max_workers=settings.INGESTION_MAX_WORKERS,
+            max_pending=settings.INGESTION_MAX_PENDING,
+        )
+
         # Store services in app state for access by routes
         app.state.vector_store_service = vector_store_service
         app.state.database_service = database_service
         app.state.sql_agent_service = sql_agent_service
+        app.state.export_service = export_service
         app.state.visualization_service = visualization_service
         app.state.query_router_service = query_router_service
         app.state.embeddings_service = embeddings_service
+        app.state.ingestion_job_manager = ingestion_job_manager
 
         logger.info("Application initialization completed successfully!")
 
@@ -117,6 +139,14 @@ async def startup_event():
         # Don't raise - allow API to start in degraded mode
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers"""
+    ingestion_job_manager = getattr(app.state, "ingestion_job_manager", None)
+    if ingestion_job_manager is not None:
+        ingestion_job_manager.shutdown()
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
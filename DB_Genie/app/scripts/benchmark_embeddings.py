@@ -0,0 +1,164 @@
+"""
+Benchmark batched, concurrent embedding generation against the previous
+one-request-per-chunk path, using a local fake Azure OpenAI endpoint.
+
+The fake endpoint charges a fixed per-request latency plus a small per-input
+cost and can randomly answer 429 to exercise the retry path, so the numbers
+reflect round-trip savings rather than model speed.
+
+Run from the DB_Genie folder:
+    python -m app.scripts.benchmark_embeddings --chunks 500
+    python -m app.scripts.benchmark_embeddings --chunks 500 --rate-limit 0.05
+"""
+
+import argparse
+import base64
+import json
+import os
+import random
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DIMENSIONS = 1536
+
+
+class FakeEmbeddingsHandler(BaseHTTPRequestHandler):
+    """Minimal stand-in for POST /openai/deployments/{name}/embeddings"""
+
+    request_latency = 0.08
+    per_input_latency = 0.002
+    rate_limit_probability = 0.0
+    request_count = 0
+    count_lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.count_lock:
+            FakeEmbeddingsHandler.request_count += 1
+
+        if random.random() < self.rate_limit_probability:
+            self._send(429, {"error": {"code": "429", "message": "Rate limited"}}, 1)
+            return
+
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        time.sleep(self.request_latency + self.per_input_latency * len(inputs))
+
+        data = []
+        for index, text in enumerate(inputs):
+            rng = random.Random(text)
+            vector = [rng.random() for _ in range(DIMENSIONS)]
+            if body.get("encoding_format") == "base64":
+                packed = struct.pack(f"<{DIMENSIONS}f", *vector)
+                embedding = base64.b64encode(packed).decode("ascii")
+            else:
+                embedding = vector
+            data.append({"object": "embedding", "index": index, "embedding": embedding})
+
+        tokens = sum(len(text) // 4 for text in inputs)
+        self._send(
+            200,
+            {
+                "object": "list",
+                "data": data,
+                "model": "fake",
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+            },
+        )
+
+    def _send(self, status, payload, retry_after=None):
+        encoded = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        if retry_after is not None:
+            self.send_header("Retry-After", str(retry_after))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _synthetic_chunks(count, size):
+    rng = random.Random(42)
+    words = (
+        "leave policy employee manager benefit approval "
+        "salary holiday notice period medical travel"
+    ).split()
+    return [
+        f"Chunk {i}: " + " ".join(rng.choice(words) for _ in range(size // 7))
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--chunks", type=int, default=500)
+    parser.add_argument("--chunk-size", type=int, default=3000, help="Characters")
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="429 rate")
+    parser.add_argument("--skip-sequential", action="store_true")
+    args = parser.parse_args()
+
+    FakeEmbeddingsHandler.request_latency = args.latency_ms / 1000
+    FakeEmbeddingsHandler.rate_limit_probability = args.rate_limit
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeEmbeddingsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # Settings are read at import time, so point them at the fake endpoint first
+    os.environ.update(
+        {
+            "AZURE_OPENAI_ENDPOINT": f"http://127.0.0.1:{server.server_port}",
+            "AZURE_OPENAI_API_KEY": "fake",
+            "AZURE_OPENAI_DEPLOYMENT_NAME": "fake",
+            "AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME": "fake-embeddings",
+            "EMBEDDING_RETRY_BASE_DELAY_SECONDS": "0.1",
+            # Measure batching alone, not cache hits from a previous run
+            "EMBEDDING_CACHE_ENABLED": "false",
+        }
+    )
+    from app.core.config import settings
+    from app.services.embeddings import EmbeddingsService
+
+    service = EmbeddingsService()
+    texts = _synthetic_chunks(args.chunks, args.chunk_size)
+    print(
+        f"{len(texts)} chunks of ~{args.chunk_size} chars, "
+        f"{args.latency_ms:.0f}ms per request, 429 rate {args.rate_limit:.0%}"
+    )
+
+    if not args.skip_sequential:
+        FakeEmbeddingsHandler.rate_limit_probability = 0.0
+        FakeEmbeddingsHandler.request_count = 0
+        start = time.perf_counter()
+        sequential = [service.get_embeddings(text) for text in texts]
+        elapsed = time.perf_counter() - start
+        print(
+            f"sequential: {elapsed:7.2f}s  "
+            f"{FakeEmbeddingsHandler.request_count:>4} requests"
+        )
+        FakeEmbeddingsHandler.rate_limit_probability = args.rate_limit
+
+    FakeEmbeddingsHandler.request_count = 0
+    start = time.perf_counter()
+    batched = service.get_embeddings_batch(texts)
+    elapsed = time.perf_counter() - start
+    print(
+        f"batched:    {elapsed:7.2f}s  {FakeEmbeddingsHandler.request_count:>4} requests "
+        f"(max {settings.EMBEDDING_BATCH_MAX_INPUTS} inputs / "
+        f"{settings.EMBEDDING_BATCH_MAX_TOKENS} tokens per request, "
+        f"concurrency {settings.EMBEDDING_MAX_CONCURRENCY})"
+    )
+
+    if not args.skip_sequential:
+        assert all(abs(a[0] - b[0]) < 1e-6 for a, b in zip(sequential, batched)), (
+            "Batched embeddings differ from sequential ones"
+        )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Compare FAISS index types on recall@k, query latency, build time and memory.
+
+Vectors are synthetic: unit-normalised points around random cluster centres,
+which is closer to real embedding distributions than uniform noise. Ground
+truth comes from an exact flat search. Latency is measured one query at a
+time, as VectorStoreService.similarity_search issues them.
+
+Run from the DB_Genie folder:
+    python -m app.scripts.benchmark_index_types --sizes 10000 100000
+    python -m app.scripts.benchmark_index_types --sizes 1000000 --dim 384 \\
+        --types flat hnsw ivf_flat ivf_pq flat_fp16
+"""
+
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from app.services.index_factory import INDEX_TYPES, IndexSpec, build_index, index_kind
+
+
+def _synthetic_vectors(count, centres, rng):
+    dim = centres.shape[1]
+    vectors = np.empty((count, dim), dtype=np.float32)
+    # Generate in blocks so 1M x 1536 does not need a second full-size temporary
+    for start in range(0, count, 100_000):
+        end = min(count, start + 100_000)
+        assignment = rng.integers(0, len(centres), end - start)
+        block = centres[assignment] + 0.5 * rng.standard_normal(
+            (end - start, dim), dtype=np.float32
+        )
+        vectors[start:end] = block / np.linalg.norm(block, axis=1, keepdims=True)
+    return vectors
+
+
+def _recall(found, truth, k):
+    hits = sum(
+        len(set(row[:k]) & set(expected[:k])) for row, expected in zip(found, truth)
+    )
+    return hits / (len(truth) * k)
+
+
+def _index_nbytes(index):
+    """
+    Memory held by the index's codes and structures, computed from their sizes
+    (serialising it would allocate a second full copy of the index).
+    """
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        hnsw = index.hnsw
+        graph = hnsw.neighbors.size() * 4 + hnsw.offsets.size() * 8 + hnsw.levels.size() * 4
+        return _index_nbytes(index.storage) + graph
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        # Codes and 64-bit ids in the inverted lists, plus the coarse quantizer
+        nbytes = ivf.ntotal * (ivf.code_size + 8) + _index_nbytes(ivf.quantizer)
+        if isinstance(index, faiss.IndexIVFPQ):
+            nbytes += index.pq.centroids.size() * 4
+        return nbytes
+    return index.ntotal * index.sa_code_size()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--types", nargs="+", default=list(INDEX_TYPES))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--nlist", type=int, default=0)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--ef-search", type=int, default=64)
+    parser.add_argument("--pq-m", type=int, default=0)
+    parser.add_argument("--threads", type=int, default=0, help="0: FAISS default")
+    args = parser.parse_args()
+
+    if args.threads:
+        faiss.omp_set_num_threads(args.threads)
+    rng = np.random.default_rng(42)
+
+    print(
+        f"{'vectors':>9} {'type':<10} {'built as':<10} {'build s':>8} "
+        f"{'MiB':>8} {'recall@' + str(args.k):>9} {'p50 ms':>8} {'p99 ms':>8}"
+    )
+    for size in args.sizes:
+        centres = rng.standard_normal(
+            (max(16, size // 500), args.dim), dtype=np.float32
+        )
+        vectors = _synthetic_vectors(size, centres, rng)
+        # Queries are drawn around the same topics as the corpus
+        queries = _synthetic_vectors(args.queries, centres, rng)
+
+        exact = faiss.IndexFlatL2(args.dim)
+        exact.add(vectors)
+        _, truth = exact.search(queries, args.k)
+        del exact
+
+        for index_type in args.types:
+            spec = IndexSpec(
+                index_type=index_type,
+                nlist=args.nlist,
+                nprobe=args.nprobe,
+                hnsw_m=args.hnsw_m,
+                ef_search=args.ef_search,
+                pq_m=args.pq_m,
+            )
+            start = time.perf_counter()
+            index = build_index(spec, vectors)
+            index.add(vectors)
+            build_seconds = time.perf_counter() - start
+
+            memory_mib = _index_nbytes(index) / 2**20
+
+            latencies = []
+            found = []
+            for query in queries:
+                start = time.perf_counter()
+                _, ids = index.search(query[None, :], args.k)
+                latencies.append((time.perf_counter() - start) * 1000)
+                found.append(ids[0])
+
+            print(
+                f"{size:>9} {index_type:<10} {index_kind(index):<10} "
+                f"{build_seconds:>8.2f} {memory_mib:>8.1f} "
+                f"{_recall(found, truth, args.k):>9.3f} "
+                f"{np.percentile(latencies, 50):>8.3f} "
+                f"{np.percentile(latencies, 99):>8.3f}"
+            )
+            del index
+
+
+if __name__ == "__main__":
+    main()
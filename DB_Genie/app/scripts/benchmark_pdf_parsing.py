@@ -0,0 +1,78 @@
+"""
+Measure how PDF parsing and splitting scales with worker processes.
+
+Parses a folder of PDFs (optionally copied several times to enlarge the
+corpus) with 1..N workers and checks every run yields the same chunks in the
+same order as the single-process run.
+
+Run from the DB_Genie folder:
+    python -m app.scripts.benchmark_pdf_parsing --folder "app/HR Policies Index"
+    python -m app.scripts.benchmark_pdf_parsing --folder policies --copies 4 \\
+        --workers 1 2 4 8 --pages-per-task 20
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from app.services.pdf_parsing import parse_pdfs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--folder", required=True, help="Folder of PDFs")
+    parser.add_argument("--copies", type=int, default=1, help="Corpus multiplier")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--pages-per-task", type=int, default=50)
+    args = parser.parse_args()
+
+    # Same splitter settings as VectorStoreService
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=3000, chunk_overlap=200)
+
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        pdf_paths = []
+        for copy in range(args.copies):
+            for source in sorted(Path(args.folder).glob("*.pdf")):
+                target = Path(corpus_dir) / f"{copy:03d}-{source.name}"
+                shutil.copyfile(source, target)
+                pdf_paths.append(target)
+        if not pdf_paths:
+            raise SystemExit(f"No PDF files found in {args.folder}")
+
+        print(
+            f"{len(pdf_paths)} PDFs, {args.pages_per_task} pages per task, "
+            f"{os.cpu_count()} CPUs"
+        )
+        baseline_seconds = baseline_chunks = None
+        for workers in args.workers:
+            start = time.perf_counter()
+            results = parse_pdfs(
+                pdf_paths,
+                text_splitter,
+                max_workers=workers,
+                pages_per_task=args.pages_per_task,
+            )
+            elapsed = time.perf_counter() - start
+
+            chunks = [
+                chunk.page_content for result in results for chunk in result.chunks
+            ]
+            failed = sum(1 for result in results if result.error)
+            if baseline_chunks is None:
+                baseline_seconds, baseline_chunks = elapsed, chunks
+            assert chunks == baseline_chunks, f"{workers} workers changed the chunks"
+
+            print(
+                f"workers {workers:>2}: {elapsed:7.2f}s  "
+                f"speedup {baseline_seconds / elapsed:5.2f}x  "
+                f"{len(chunks)} chunks, {failed} failed files"
+            )
+
+
+if __name__ == "__main__":
+    main()
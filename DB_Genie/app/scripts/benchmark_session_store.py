@@ -0,0 +1,109 @@
+"""
+Benchmark append and read latency of the shared session store under
+concurrent worker processes.
+
+Each worker process simulates a uvicorn worker: it appends user/assistant
+turns to a pool of sessions shared with the other workers and reads the full
+history back before every turn, the same access pattern as /chat.
+
+Run from the DB_Genie folder:
+    python -m app.scripts.benchmark_session_store --workers 1 2 4 8
+    python -m app.scripts.benchmark_session_store --backend redis --redis-url redis://localhost:6379/0
+"""
+
+import argparse
+import multiprocessing as mp
+import statistics
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from app.services.session_store import create_session_store
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _worker(args, session_ids, turns, results):
+    store = create_session_store(args.backend, args.db_path, args.redis_url, 3600)
+    append_ms, read_ms = [], []
+
+    for turn in range(turns):
+        session_id = session_ids[turn % len(session_ids)]
+
+        start = time.perf_counter()
+        store.read(session_id)
+        read_ms.append((time.perf_counter() - start) * 1000)
+
+        message = {
+            "role": "user" if turn % 2 == 0 else "assistant",
+            "content": [{"type": "text", "text": "x" * args.message_size}],
+        }
+        start = time.perf_counter()
+        store.append(session_id, [message])
+        append_ms.append((time.perf_counter() - start) * 1000)
+
+    results.put((append_ms, read_ms))
+
+
+def run(args, workers):
+    store = create_session_store(args.backend, args.db_path, args.redis_url, 3600)
+    session_ids = [str(uuid.uuid4()) for _ in range(args.sessions)]
+    for session_id in session_ids:
+        store.create(session_id)
+
+    results = mp.Queue()
+    processes = [
+        mp.Process(target=_worker, args=(args, session_ids, args.turns, results))
+        for _ in range(workers)
+    ]
+
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+
+    append_ms = [sample for appends, _ in collected for sample in appends]
+    read_ms = [sample for _, reads in collected for sample in reads]
+
+    for session_id in session_ids:
+        store.delete(session_id)
+
+    print(
+        f"workers={workers:<3} ops/s={2 * len(append_ms) / elapsed:>9.0f}  "
+        f"append p50={statistics.median(append_ms):.2f}ms "
+        f"p99={_percentile(append_ms, 99):.2f}ms  "
+        f"read p50={statistics.median(read_ms):.2f}ms "
+        f"p99={_percentile(read_ms, 99):.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--backend", default="sqlite", choices=["sqlite", "redis"])
+    parser.add_argument("--db-path", default=None, help="SQLite file (default: temp)")
+    parser.add_argument("--redis-url", default="redis://localhost:6379/0")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=500, help="Turns per worker")
+    parser.add_argument("--message-size", type=int, default=400)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.db_path is None:
+            args.db_path = str(Path(tmp_dir) / "sessions.db")
+
+        print(f"Session store benchmark ({args.backend})")
+        for workers in args.workers:
+            run(args, workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,21 @@
 import logging
 import re
 from contextlib import contextmanager
-from typing import Any, Dict, Generator, List, Optional
+from typing import (
+    Any,
+    Dict,
+    Generator,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 from sqlalchemy import MetaData, Table, create_engine, inspect, text
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 
 logger = logging.getLogger(__name__)
 
@@ -45,6 +54,25 @@ class DatabaseService:
                 echo=True,
             )
 
+        # Exports hold their connection for the whole download; give each one
+        # its own connection instead of sharing the pool (or, for SQLite, the
+        # single StaticPool connection) with agent queries. An in-memory
+        # SQLite database only exists on that one connection, so it is shared.
+        if database_url.startswith("sqlite") and (
+            ":memory:" in database_url or database_url in ("sqlite://", "sqlite:///")
+        ):
+            self.export_engine = self.engine
+        else:
+            self.export_engine = create_engine(
+                database_url,
+                connect_args=(
+                    {"check_same_thread": False}
+                    if database_url.startswith("sqlite")
+                    else {}
+                ),
+                poolclass=NullPool,
+            )
+
         self.SessionLocal = sessionmaker(
             autocommit=False, autoflush=False, bind=self.engine
         )
@@ -209,6 +237,45 @@ class DatabaseService:
             logger.error(f"Query execution error: {str(e)}\nQuery: {query}")
             raise
 
+    @contextmanager
+    def stream_query(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        batch_size: int = 1000,
+    ) -> Generator[Tuple[List[str], Iterator[Sequence[Any]]], None, None]:
+        """
+        Execute a SQL query with a server-side cursor and expose rows in batches.
+
+        Unlike execute_query, rows are never materialized as a whole, so memory
+        stays bounded by ``batch_size`` regardless of the result size. The query
+        runs on a dedicated, unpooled connection that is closed afterwards.
+
+        Usage:
+            with db_service.stream_query(query, batch_size=500) as (columns, batches):
+                for rows in batches:
+                    ...
+
+        Args:
+            query: SQL query string
+            params: Optional query parameters for parameterized queries
+            batch_size: Number of rows fetched from the cursor per batch
+
+        Yields:
+            Tuple of (column names, iterator over lists of row tuples)
+        """
+        with self.export_engine.connect() as connection:
+            result = connection.execution_options(yield_per=batch_size).execute(
+                text(query), params or {}
+            )
+            try:
+                if result.returns_rows:
+                    yield list(result.keys()), result.partitions(batch_size)
+                else:
+                    yield [], iter(())
+            finally:
+                result.close()
+
     def _transform_concat_to_sqlite(self, query: str) -> str:
         """
         Transform CONCAT(a, b, c, ...) into (a || b || c || ...), respecting quoted strings.
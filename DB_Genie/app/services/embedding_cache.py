@@ -0,0 +1,285 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def text_hash(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+def normalize_query(text: str) -> str:
+    """Collapse whitespace and case so trivially different questions share a key"""
+    return " ".join(text.split()).casefold()
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache keyed by (model deployment, SHA-256 of text).
+
+    Vectors are stored as float32 blobs in a SQLite file (WAL mode, so every
+    worker process can share it). When the stored vectors exceed ``max_bytes``
+    the least recently used entries are evicted.
+    """
+
+    def __init__(self, db_path: str, max_bytes: int):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash BLOB NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_embeddings_last_used
+                ON embeddings (last_used);
+            """
+        )
+        self._stored_bytes = self._measure_bytes()
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _measure_bytes(self) -> int:
+        row = (
+            self._connection()
+            .execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings")
+            .fetchone()
+        )
+        return row[0]
+
+    def get_many(
+        self, model: str, texts: Sequence[str], count_stats: bool = True
+    ) -> Dict[int, List[float]]:
+        """
+        Look up cached embeddings.
+
+        Args:
+            model: Embedding deployment (or namespaced key) the vectors belong to
+            texts: Texts to look up
+            count_stats: Count the lookups in this cache's hits and misses;
+                callers with counters of their own (the query cache) pass False
+
+        Returns:
+            Mapping of position in ``texts`` to embedding, for cache hits only
+        """
+        if not texts:
+            return {}
+
+        hashes = [text_hash(text) for text in texts]
+        conn = self._connection()
+        found: Dict[bytes, List[float]] = {}
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(hashes), 500):
+            unique = list(dict.fromkeys(hashes[start : start + 500]))
+            rows = conn.execute(
+                f"SELECT text_hash, vector FROM embeddings WHERE model = ? "
+                f"AND text_hash IN ({','.join('?' * len(unique))})",
+                [model, *unique],
+            ).fetchall()
+            for digest, blob in rows:
+                vector = array("f")
+                vector.frombytes(blob)
+                found[digest] = vector.tolist()
+
+        if found:
+            now = time.time()
+            conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                [(now, model, digest) for digest in found],
+            )
+
+        results = {
+            index: found[digest]
+            for index, digest in enumerate(hashes)
+            if digest in found
+        }
+        if count_stats:
+            with self._stats_lock:
+                self.hits += len(results)
+                self.misses += len(texts) - len(results)
+        return results
+
+    def put_many(
+        self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]
+    ) -> None:
+        """Store embeddings, evicting least recently used entries if over budget"""
+        if not texts:
+            return
+
+        now = time.time()
+        rows = [
+            (model, text_hash(text), array("f", vector).tobytes(), now)
+            for text, vector in zip(texts, vectors)
+        ]
+        self._connection().executemany(
+            "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_used) "
+            "VALUES (?, ?, ?, ?)",
+            rows,
+        )
+        self._stored_bytes += sum(len(row[2]) for row in rows)
+        if self._stored_bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Trim the cache to 90% of max_bytes, oldest entries first"""
+        conn = self._connection()
+        # Other workers write to the same file, so re-measure before evicting
+        self._stored_bytes = self._measure_bytes()
+        excess = self._stored_bytes - int(self.max_bytes * 0.9)
+        if excess <= 0:
+            return
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            removed_bytes = removed = 0
+            victims = []
+            cursor = conn.execute(
+                "SELECT model, text_hash, LENGTH(vector) FROM embeddings "
+                "ORDER BY last_used"
+            )
+            while removed_bytes < excess:
+                rows = cursor.fetchmany(1000)
+                if not rows:
+                    break
+                for model, digest, size in rows:
+                    if removed_bytes >= excess:
+                        break
+                    victims.append((model, digest))
+                    removed_bytes += size
+                    removed += 1
+            cursor.close()
+
+            conn.executemany(
+                "DELETE FROM embeddings WHERE model = ? AND text_hash = ?", victims
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        self._stored_bytes -= removed_bytes
+        with self._stats_lock:
+            self.evictions += removed
+        logger.info(f"Evicted {removed} cached embeddings ({removed_bytes} bytes)")
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters for this process plus the shared cache size"""
+        entries = (
+            self._connection().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        )
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": entries,
+                "stored_bytes": self._stored_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+class QueryEmbeddingCache:
+    """
+    In-process LRU of query embeddings keyed by (model, normalized query).
+
+    Bounded by entry count; vectors are held as float32 arrays (6 KiB each for
+    1536 dimensions). With a ``shared`` EmbeddingCache, misses fall through to
+    it so queries embedded by one worker are reused by the others.
+    """
+
+    # Keeps query vectors apart from document chunks in a shared EmbeddingCache
+    SHARED_NAMESPACE = "query:"
+
+    def __init__(self, max_entries: int, shared: Optional[EmbeddingCache] = None):
+        self.max_entries = max_entries
+        self.shared = shared
+        self._entries: OrderedDict[Tuple[str, str], array] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, model: str, query: str) -> Optional[List[float]]:
+        key = (model, normalize_query(query))
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector.tolist()
+
+        if self.shared is not None:
+            # Counted as shared_hits / misses here, not in the ingestion stats
+            found = self.shared.get_many(
+                self.SHARED_NAMESPACE + model, [key[1]], count_stats=False
+            )
+            if found:
+                self._store(key, found[0])
+                with self._lock:
+                    self.shared_hits += 1
+                return found[0]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, model: str, query: str, vector: Sequence[float]) -> None:
+        key = (model, normalize_query(query))
+        self._store(key, vector)
+        if self.shared is not None:
+            self.shared.put_many(self.SHARED_NAMESPACE + model, [key[1]], [vector])
+
+    def _store(self, key: Tuple[str, str], vector: Sequence[float]) -> None:
+        with self._lock:
+            self._entries[key] = array("f", vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_ratio": (
+                    round((self.hits + self.shared_hits) / lookups, 4)
+                    if lookups
+                    else 0.0
+                ),
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "shared": self.shared is not None,
+            }
@@ -1,6 +1,16 @@
-from openai import AzureOpenAI
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from openai import AzureOpenAI, RateLimitError
 
 from ..core.config import settings
+from .embedding_cache import EmbeddingCache, QueryEmbeddingCache
+
+logger = logging.getLogger(__name__)
 
 
 class EmbeddingsService:
@@ -11,9 +21,216 @@ class EmbeddingsService:
             api_key=settings.AZURE_OPENAI_API_KEY,
             api_version="2023-05-15",
         )
+        # Bounds in-flight embedding requests across all concurrent callers
+        # (e.g. several ingestion jobs), not just within one batch call
+        self._request_slots = threading.BoundedSemaphore(
+            settings.EMBEDDING_MAX_CONCURRENCY
+        )
+        self._encoding = self._load_encoding()
+
+        # Persistent cache shared by every ingestion path (and every worker)
+        self.cache = (
+            EmbeddingCache(
+                settings.EMBEDDING_CACHE_PATH, settings.EMBEDDING_CACHE_MAX_BYTES
+            )
+            if settings.EMBEDDING_CACHE_ENABLED
+            else None
+        )
+        # Repeated questions skip the embeddings round trip entirely
+        self.query_cache = (
+            QueryEmbeddingCache(
+                settings.QUERY_EMBEDDING_CACHE_SIZE,
+                shared=self.cache if settings.QUERY_EMBEDDING_CACHE_SHARED else None,
+            )
+            if settings.QUERY_EMBEDDING_CACHE_SIZE > 0
+            else None
+        )
+        self._api_requests = 0
+        self._api_requests_avoided = 0
+        self._counter_lock = threading.Lock()
+
+    @staticmethod
+    def _load_encoding():
+        """Use tiktoken for exact token counts when it is installed"""
+        try:
+            import tiktoken
+
+            return tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            return None
+
+    def count_tokens(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        # Roughly 4 characters per token for English text
+        return len(text) // 4 + 1
 
     def get_embeddings(self, text: str):
         response = self.client.embeddings.create(
             model=settings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME, input=text
         )
         return response.data[0].embedding
+
+    def get_query_embedding(self, query: str) -> List[float]:
+        """Embed a search query, serving repeated queries from the query cache"""
+        if self.query_cache is None:
+            return self.get_embeddings(query)
+
+        model = settings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME
+        embedding = self.query_cache.get(model, query)
+        if embedding is None:
+            embedding = self.get_embeddings(query)
+            self.query_cache.put(model, query, embedding)
+        return embedding
+
+    def get_embeddings_batch(
+        self,
+        texts: List[str],
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+    ) -> List[List[float]]:
+        """
+        Embed many texts with as few API round trips as possible.
+
+        Texts already in the embedding cache are served from it. The rest are
+        packed into requests by estimated token count, and the requests are
+        sent concurrently (bounded by EMBEDDING_MAX_CONCURRENCY). Rate-limited
+        requests are retried with exponential backoff.
+
+        Args:
+            texts: Texts to embed
+            progress_callback: Called as (texts embedded so far, total)
+
+        Returns:
+            Embeddings in the same order as ``texts``
+        """
+        if not texts:
+            return []
+
+        model = settings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        cached = self.cache.get_many(model, texts) if self.cache else {}
+        for index, embedding in cached.items():
+            results[index] = embedding
+
+        # Pack only the misses; batch indices refer back into ``texts``
+        missing = [index for index in range(len(texts)) if index not in cached]
+        batches = [
+            [missing[position] for position in batch]
+            for batch in self._pack_batches([texts[index] for index in missing])
+        ]
+        done = len(cached)
+        done_lock = threading.Lock()
+        if progress_callback and done:
+            progress_callback(done, len(texts))
+
+        def embed_batch(indices: List[int]) -> None:
+            nonlocal done
+            batch_texts = [texts[i] for i in indices]
+            embeddings = self._create_with_retry(batch_texts)
+            if self.cache:
+                self.cache.put_many(model, batch_texts, embeddings)
+            for index, embedding in zip(indices, embeddings):
+                results[index] = embedding
+            with done_lock:
+                done += len(indices)
+                if progress_callback:
+                    progress_callback(done, len(texts))
+
+        if batches:
+            workers = min(settings.EMBEDDING_MAX_CONCURRENCY, len(batches))
+            with ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="embeddings"
+            ) as executor:
+                # list() re-raises the first failed batch
+                list(executor.map(embed_batch, batches))
+
+        if cached:
+            avoided = len(self._pack_batches(texts)) - len(batches)
+            with self._counter_lock:
+                self._api_requests_avoided += avoided
+
+        logger.info(
+            f"Embedded {len(texts)} texts in {len(batches)} request(s), "
+            f"{len(cached)} served from cache"
+        )
+        return results
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Embedding cache effectiveness since this process started"""
+        with self._counter_lock:
+            stats: Dict[str, Any] = {
+                "api_requests": self._api_requests,
+                "api_requests_avoided": self._api_requests_avoided,
+            }
+        if self.cache:
+            cache_stats = self.cache.stats()
+            stats.update(cache_stats)
+            stats["api_inputs_avoided"] = cache_stats["hits"]
+        stats["cache_enabled"] = self.cache is not None
+        if self.query_cache:
+            stats["query_cache"] = self.query_cache.stats()
+        return stats
+
+    def _pack_batches(self, texts: List[str]) -> List[List[int]]:
+        """Greedily group text indices under the per-request token/input limits"""
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+
+        for index, text in enumerate(texts):
+            tokens = self.count_tokens(text)
+            if current and (
+                current_tokens + tokens > settings.EMBEDDING_BATCH_MAX_TOKENS
+                or len(current) >= settings.EMBEDDING_BATCH_MAX_INPUTS
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(index)
+            current_tokens += tokens
+
+        if current:
+            batches.append(current)
+        return batches
+
+    def _create_with_retry(self, inputs: List[str]) -> List[List[float]]:
+        for attempt in range(settings.EMBEDDING_MAX_RETRIES + 1):
+            try:
+                with self._request_slots:
+                    with self._counter_lock:
+                        self._api_requests += 1
+                    response = self.client.embeddings.create(
+                        model=settings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME,
+                        input=inputs,
+                    )
+                # The API may return items out of order; index is authoritative
+                return [
+                    item.embedding
+                    for item in sorted(response.data, key=lambda item: item.index)
+                ]
+            except RateLimitError as e:
+                if attempt == settings.EMBEDDING_MAX_RETRIES:
+                    raise
+                delay = self._retry_delay(e, attempt)
+                logger.warning(
+                    f"Embedding request rate limited, retrying in {delay:.1f}s "
+                    f"(attempt {attempt + 1}/{settings.EMBEDDING_MAX_RETRIES})"
+                )
+                # Sleep outside the semaphore so other batches can use the slot
+                time.sleep(delay)
+
+    @staticmethod
+    def _retry_delay(error: RateLimitError, attempt: int) -> float:
+        """Honour Retry-After when the service sends it, else back off with jitter"""
+        retry_after = (
+            error.response.headers.get("retry-after") if error.response else None
+        )
+        try:
+            if retry_after is not None:
+                return float(retry_after)
+        except ValueError:
+            pass
+        backoff = min(
+            settings.EMBEDDING_RETRY_MAX_DELAY_SECONDS,
+            settings.EMBEDDING_RETRY_BASE_DELAY_SECONDS * (2**attempt),
+        )
+        return backoff * (0.5 + random.random() / 2)
@@ -0,0 +1,277 @@
+import csv
+import io
+import json
+import logging
+import time
+import zlib
+from enum import Enum
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from app.services.database import DatabaseService
+
+logger = logging.getLogger(__name__)
+
+
+class ExportFormat(Enum):
+    """Output formats supported by the streaming export."""
+
+    NDJSON = "ndjson"
+    CSV = "csv"
+    PARQUET = "parquet"
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+}
+
+
+class _ByteSink(io.RawIOBase):
+    """Write-only file object whose contents are drained after every batch."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer.extend(data)
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+class ExportService:
+    """
+    Streams query results straight from the database cursor to the client.
+
+    Rows are read in batches and encoded batch by batch, so memory use is
+    bounded by the batch size rather than by the size of the result set. Every
+    export ends with a trailer carrying the row count and timing, written in the
+    idiom of each format:
+
+        - NDJSON: a final ``{"_trailer": {...}}`` line
+        - CSV: a final ``# row_count=...`` comment line
+        - Parquet: key-value metadata in the file footer
+    """
+
+    def __init__(self, database_service: DatabaseService):
+        self.database_service = database_service
+
+    def export(
+        self,
+        query: str,
+        export_format: ExportFormat,
+        batch_size: int = 1000,
+        compress: bool = True,
+    ) -> Iterator[bytes]:
+        """
+        Execute a query and yield the encoded (optionally gzip-compressed) bytes.
+
+        Args:
+            query: SQL query string (validated by the caller)
+            export_format: Output format
+            batch_size: Rows fetched from the cursor and encoded per batch
+            compress: Gzip the output stream (served with Content-Encoding: gzip)
+
+        Returns:
+            Iterator of byte chunks, one or more per batch
+        """
+        encoders = {
+            ExportFormat.NDJSON: self._encode_ndjson,
+            ExportFormat.CSV: self._encode_csv,
+            ExportFormat.PARQUET: self._encode_parquet,
+        }
+        chunks = encoders[export_format](query, batch_size)
+        return self._gzip(chunks) if compress else chunks
+
+    @staticmethod
+    def _gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+        # wbits=31 selects the gzip container rather than raw zlib
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+    @staticmethod
+    def _trailer(row_count: int, batch_count: int, started: float) -> Dict[str, Any]:
+        return {
+            "row_count": row_count,
+            "batch_count": batch_count,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    def _encode_ndjson(self, query: str, batch_size: int) -> Iterator[bytes]:
+        started = time.perf_counter()
+        row_count = batch_count = 0
+
+        with self.database_service.stream_query(query, batch_size=batch_size) as (
+            columns,
+            batches,
+        ):
+            for rows in batches:
+                lines = [
+                    json.dumps(dict(zip(columns, row)), default=str) for row in rows
+                ]
+                row_count += len(rows)
+                batch_count += 1
+                yield ("\n".join(lines) + "\n").encode("utf-8")
+
+        trailer = self._trailer(row_count, batch_count, started)
+        logger.info(f"NDJSON export finished: {trailer}")
+        yield (json.dumps({"_trailer": trailer}) + "\n").encode("utf-8")
+
+    def _encode_csv(self, query: str, batch_size: int) -> Iterator[bytes]:
+        started = time.perf_counter()
+        row_count = batch_count = 0
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        with self.database_service.stream_query(query, batch_size=batch_size) as (
+            columns,
+            batches,
+        ):
+            writer.writerow(columns)
+            for rows in batches:
+                writer.writerows(rows)
+                row_count += len(rows)
+                batch_count += 1
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+
+        trailer = self._trailer(row_count, batch_count, started)
+        logger.info(f"CSV export finished: {trailer}")
+        buffer.write(
+            "# " + " ".join(f"{key}={value}" for key, value in trailer.items()) + "\n"
+        )
+        yield buffer.getvalue().encode("utf-8")
+
+    def _encode_parquet(self, query: str, batch_size: int) -> Iterator[bytes]:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError(
+                "`pyarrow` package not found, please run `pip install pyarrow` "
+                "to export Parquet"
+            )
+
+        started = time.perf_counter()
+        row_count = batch_count = 0
+        sink = _ByteSink()
+        writer = None
+
+        with self.database_service.stream_query(query, batch_size=batch_size) as (
+            columns,
+            batches,
+        ):
+            schema = None
+            nulled_values = 0
+            for rows in batches:
+                table, nulled = self._rows_to_arrow(pa, columns, rows, schema)
+                nulled_values += nulled
+                if writer is None:
+                    schema = table.schema
+                    writer = pq.ParquetWriter(sink, schema)
+                # One row group per batch keeps the writer's buffer bounded
+                writer.write_table(table)
+                row_count += len(rows)
+                batch_count += 1
+                yield sink.drain()
+
+            if writer is None:
+                schema = pa.schema([(column, pa.string()) for column in columns])
+                writer = pq.ParquetWriter(sink, schema)
+
+        trailer = self._trailer(row_count, batch_count, started)
+        trailer["nulled_values"] = nulled_values
+        if nulled_values:
+            logger.warning(
+                f"Parquet export wrote {nulled_values} values that did not fit "
+                "their column type as NULL"
+            )
+        logger.info(f"Parquet export finished: {trailer}")
+        writer.add_key_value_metadata(
+            {f"export.{key}": str(value) for key, value in trailer.items()}
+        )
+        writer.close()
+        yield sink.drain()
+
+    def _rows_to_arrow(
+        self, pa, columns: List[str], rows: Sequence[Sequence[Any]], schema
+    ) -> Tuple[Any, int]:
+        """
+        Build an Arrow table from row tuples.
+
+        The Parquet schema is fixed by the first batch, but a later batch may
+        hold other value types in the same column (SQLite is dynamically
+        typed). Column types are therefore inferred leniently and later values
+        are conformed to them: anything is written to a string column as text,
+        and a value that cannot be represented in another type is written as
+        NULL and counted.
+
+        Returns:
+            Tuple of (table, number of values written as NULL)
+        """
+        arrays, nulled = [], 0
+        for index in range(len(columns)):
+            values = [row[index] for row in rows]
+            if schema is None:
+                arrow_type = self._infer_type(pa, values)
+            else:
+                arrow_type = schema.field(index).type
+            array, column_nulled = self._to_arrow(pa, values, arrow_type)
+            arrays.append(array)
+            nulled += column_nulled
+        return pa.Table.from_arrays(arrays, names=list(columns)), nulled
+
+    def _infer_type(self, pa, values: List[Any]):
+        try:
+            arrow_type = pa.array(values).type
+        except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+            # Mixed value types within the batch
+            return pa.string()
+        # An all-NULL first batch infers the null type, which later batches
+        # cannot be cast to; store such columns as strings instead
+        if pa.types.is_null(arrow_type):
+            return pa.string()
+        # A SQLite column of integers may hold reals further down (and Arrow
+        # would silently truncate them to int64), so numbers are widened to
+        # double, which is exact for integers up to 2**53
+        if self.database_service.database_url.startswith("sqlite") and (
+            pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type)
+        ):
+            return pa.float64()
+        return arrow_type
+
+    @staticmethod
+    def _to_arrow(pa, values: List[Any], arrow_type) -> Tuple[Any, int]:
+        conversion_errors = (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError)
+        if pa.types.is_string(arrow_type):
+            texts = [
+                value if value is None or isinstance(value, str) else str(value)
+                for value in values
+            ]
+            return pa.array(texts, type=pa.string()), 0
+        try:
+            return pa.array(values, type=arrow_type), 0
+        except conversion_errors:
+            pass
+
+        converted, nulled = [], 0
+        for value in values:
+            try:
+                pa.scalar(value, type=arrow_type)
+                converted.append(value)
+            except conversion_errors:
+                converted.append(None)
+                nulled += 1
+        return pa.array(converted, type=arrow_type), nulled
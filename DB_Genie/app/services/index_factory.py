@@ -0,0 +1,179 @@
+import logging
+import math
+from dataclasses import dataclass
+from typing import Sequence
+
+import faiss
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "flat_fp16", "hnsw", "ivf_flat", "ivf_pq")
+
+# k-means wants roughly this many training points per centroid
+MIN_POINTS_PER_CENTROID = 39
+# Below this many inverted lists IVF buys nothing over a flat scan
+MIN_NLIST = 16
+
+
+@dataclass
+class IndexSpec:
+    """Which FAISS index to build and how to search it"""
+
+    index_type: str = "flat"
+    nlist: int = 0  # 0: 4 * sqrt(number of vectors)
+    nprobe: int = 16
+    hnsw_m: int = 32
+    ef_construction: int = 80
+    ef_search: int = 64
+    pq_m: int = 0  # 0: dimension / 16
+    pq_nbits: int = 8
+
+    def __post_init__(self):
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(
+                f"Unknown FAISS index type '{self.index_type}', "
+                f"expected one of {', '.join(INDEX_TYPES)}"
+            )
+
+    @classmethod
+    def from_settings(cls) -> "IndexSpec":
+        return cls(
+            index_type=settings.FAISS_INDEX_TYPE.lower(),
+            nlist=settings.FAISS_IVF_NLIST,
+            nprobe=settings.FAISS_IVF_NPROBE,
+            hnsw_m=settings.FAISS_HNSW_M,
+            ef_construction=settings.FAISS_HNSW_EF_CONSTRUCTION,
+            ef_search=settings.FAISS_HNSW_EF_SEARCH,
+            pq_m=settings.FAISS_PQ_M,
+            pq_nbits=settings.FAISS_PQ_NBITS,
+        )
+
+    def nlist_for(self, count: int) -> int:
+        nlist = self.nlist or int(4 * math.sqrt(count))
+        return min(nlist, count // MIN_POINTS_PER_CENTROID)
+
+    def pq_m_for(self, dimension: int) -> int:
+        if self.pq_m:
+            if dimension % self.pq_m:
+                raise ValueError(
+                    f"FAISS_PQ_M={self.pq_m} does not divide dimension {dimension}"
+                )
+            return self.pq_m
+        target = max(1, dimension // 16)
+        return max(m for m in range(1, target + 1) if dimension % m == 0)
+
+    def resolve_type(self, count: int) -> str:
+        """
+        Index type to use for ``count`` vectors.
+
+        IVF types fall back to flat until there are enough vectors to train
+        the coarse quantizer (and, for IVF-PQ, the product quantizer).
+        """
+        if self.index_type.startswith("ivf"):
+            if self.nlist_for(count) < MIN_NLIST:
+                return "flat"
+            if (
+                self.index_type == "ivf_pq"
+                and count < MIN_POINTS_PER_CENTROID * 2**self.pq_nbits
+            ):
+                return "flat"
+        return self.index_type
+
+
+def build_index(spec: IndexSpec, vectors: np.ndarray) -> faiss.Index:
+    """
+    Create an empty index of the resolved type, trained on ``vectors`` if needed.
+
+    The caller adds the vectors afterwards (LangChain's FAISS.add_embeddings
+    does this when the index is wrapped in a vector store).
+    """
+    count, dimension = vectors.shape
+    index_type = spec.resolve_type(count)
+    if index_type != spec.index_type:
+        logger.info(
+            f"{count} vectors are too few to train {spec.index_type}, "
+            f"using a flat index"
+        )
+
+    if index_type == "flat":
+        index = faiss.IndexFlatL2(dimension)
+    elif index_type == "flat_fp16":
+        index = faiss.IndexScalarQuantizer(
+            dimension, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_L2
+        )
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, spec.hnsw_m)
+        index.hnsw.efConstruction = spec.ef_construction
+    else:
+        nlist = spec.nlist_for(count)
+        quantizer = faiss.IndexFlatL2(dimension)
+        if index_type == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_L2)
+        else:
+            index = faiss.IndexIVFPQ(
+                quantizer, dimension, nlist, spec.pq_m_for(dimension), spec.pq_nbits
+            )
+        index.train(np.ascontiguousarray(vectors, dtype=np.float32))
+
+    configure_search(index, spec)
+    return index
+
+
+def configure_search(index: faiss.Index, spec: IndexSpec) -> None:
+    """Apply query-time parameters, which are not all kept by write_index"""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = min(spec.nprobe, ivf.nlist)
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = spec.ef_search
+
+
+def index_kind(index: faiss.Index) -> str:
+    """Map a FAISS index back to one of INDEX_TYPES"""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVFFlat):
+        return "ivf_flat"
+    if isinstance(index, faiss.IndexScalarQuantizer):
+        return "flat_fp16"
+    return "flat"
+
+
+def supports_in_place_remove(index: faiss.Index) -> bool:
+    """
+    Whether LangChain's FAISS.delete is safe on this index.
+
+    FAISS.delete renumbers the remaining positions 0..n-1, which matches what
+    remove_ids does only for flat-code indexes. HNSW cannot remove at all, and
+    IVF keeps the old IDs, so both are rebuilt instead.
+    """
+    return isinstance(faiss.downcast_index(index), faiss.IndexFlatCodes)
+
+
+def reconstruct(index: faiss.Index, positions: Sequence[int]) -> np.ndarray:
+    """
+    Recover stored vectors by position (exact for flat, HNSW and IVF-Flat).
+
+    IVF indexes need a direct map for this, which is added in place; callers
+    pass a copy they are about to discard.
+    """
+    if not positions:
+        return np.empty((0, index.d), dtype=np.float32)
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.make_direct_map()
+    return index.reconstruct_batch(np.asarray(positions, dtype=np.int64))
+
+
+def empty_like(index: faiss.Index) -> faiss.Index:
+    """An empty copy of ``index`` that keeps its trained quantizers"""
+    copy = faiss.clone_index(index)
+    copy.reset()
+    return copy
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from langchain_community.vectorstores import FAISS
+
+logger = logging.getLogger(__name__)
+
+# Name of the file holding the directory name of the live index version
+CURRENT_POINTER = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+# Published versions kept besides the newest, for workers still loading one
+PREVIOUS_VERSIONS_KEPT = 1
+# Temporary files of a save are only treated as abandoned after this long;
+# younger ones may belong to another worker's save in progress
+STALE_TMP_SECONDS = 3600
+
+
+def file_sha256(path: Path, block_size: int = 1024 * 1024) -> str:
+    """Hash a file in blocks so large PDFs are never read into memory at once"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _fsync_file(path: Path) -> None:
+    with open(path, "rb") as f:
+        os.fsync(f.fileno())
+
+
+def _fsync_dir(path: Path) -> None:
+    # Directory fsync makes renames durable on POSIX; Windows has no equivalent
+    if os.name != "nt":
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def save_index(vector_store: FAISS, root: Path, manifest: Dict[str, Any]) -> str:
+    """
+    Atomically publish a new version of the index under ``root``.
+
+    The index is written to a temporary directory, renamed to its final
+    version directory, and only then made live by atomically replacing the
+    CURRENT pointer. A crash at any point leaves the previous version intact.
+
+    Returns:
+        The new version name
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+
+    version = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    tmp_dir = root / f".tmp-{version}"
+    vector_store.save_local(str(tmp_dir))
+
+    manifest = {**manifest, "version": version, "created_at": time.time()}
+    with open(tmp_dir / MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    for path in tmp_dir.iterdir():
+        _fsync_file(path)
+    _fsync_dir(tmp_dir)
+
+    os.replace(tmp_dir, root / version)
+
+    tmp_pointer = root / f".{CURRENT_POINTER}.{uuid.uuid4().hex[:8]}"
+    with open(tmp_pointer, "w", encoding="utf-8") as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_pointer, root / CURRENT_POINTER)
+    _fsync_dir(root)
+
+    _prune_versions(root, keep=version)
+    return version
+
+
+def _prune_versions(root: Path, keep: str) -> None:
+    """
+    Remove versions superseded by ``keep`` and leftovers of interrupted saves.
+
+    Several workers may save concurrently, so only complete versions older
+    than ``keep`` are candidates (version names sort by creation time), the
+    version CURRENT points to is never removed, and temporary directories
+    and pointer files are only removed once they are STALE_TMP_SECONDS old.
+    """
+    pointer = root / CURRENT_POINTER
+    try:
+        current = pointer.read_text(encoding="utf-8").strip()
+    except OSError:
+        current = keep
+
+    older_versions = sorted(
+        path
+        for path in root.iterdir()
+        if not path.name.startswith(".")
+        and path.name < keep
+        and path.name != current
+        and (path / MANIFEST_FILE).exists()
+    )
+    stale = older_versions[: max(0, len(older_versions) - PREVIOUS_VERSIONS_KEPT)]
+
+    now = time.time()
+    for path in root.iterdir():
+        if path.name.startswith("."):
+            try:
+                if now - path.stat().st_mtime > STALE_TMP_SECONDS:
+                    stale.append(path)
+            except OSError:
+                pass
+
+    for path in stale:
+        try:
+            if path.is_dir():
+                shutil.rmtree(path)
+            else:
+                path.unlink()
+        except OSError as e:
+            logger.warning(f"Could not remove old index data {path}: {str(e)}")
+
+
+def load_current_index(root: Path) -> Optional[Tuple[FAISS, Dict[str, Any]]]:
+    """
+    Load the live index version under ``root``.
+
+    Returns:
+        (vector store, manifest), or None if no complete version exists
+    """
+    root = Path(root)
+    pointer = root / CURRENT_POINTER
+    if not pointer.exists():
+        return None
+
+    version_dir = root / pointer.read_text(encoding="utf-8").strip()
+    manifest_path = version_dir / MANIFEST_FILE
+    if not manifest_path.exists():
+        logger.warning(f"Index version {version_dir} has no manifest, ignoring it")
+        return None
+
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    # The pickle was written by save_index above, not by an external party
+    vector_store = FAISS.load_local(
+        str(version_dir), None, allow_dangerous_deserialization=True
+    )
+    return vector_store, manifest
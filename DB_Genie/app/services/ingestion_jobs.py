@@ -0,0 +1,192 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+from app.services.vector_store import VectorStoreService
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(Enum):
+    """Lifecycle states of an ingestion job."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class IngestionQueueFullError(Exception):
+    """Raised when too many ingestion jobs are already waiting."""
+
+
+@dataclass
+class IngestionJob:
+    job_id: str
+    filename: str
+    path: str
+    status: JobStatus = JobStatus.QUEUED
+    stage: Optional[str] = None
+    chunks_done: int = 0
+    chunks_total: int = 0
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def progress(self) -> float:
+        """Overall progress in [0, 1], dominated by the embedding stage"""
+        if self.status == JobStatus.SUCCEEDED:
+            return 1.0
+        if self.stage == "embedding" and self.chunks_total:
+            return 0.1 + 0.85 * self.chunks_done / self.chunks_total
+        if self.stage == "indexing":
+            return 0.95
+        return 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop("path")
+        data["status"] = self.status.value
+        data["progress"] = round(self.progress, 3)
+        return data
+
+
+class IngestionJobManager:
+    """
+    Runs PDF ingestion in a bounded background worker pool.
+
+    Uploads are queued as jobs so request handlers return immediately; clients
+    poll the job for status and progress. At most ``max_pending`` jobs may be
+    queued or running at once so a burst of uploads cannot exhaust disk or
+    memory. Job state is kept per process.
+    """
+
+    def __init__(
+        self,
+        vector_store_service: VectorStoreService,
+        max_workers: int = 2,
+        max_pending: int = 16,
+        max_history: int = 1000,
+    ):
+        self.vector_store_service = vector_store_service
+        self.max_pending = max_pending
+        self.max_history = max_history
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="ingestion"
+        )
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _active_count(self) -> int:
+        return sum(
+            1
+            for job in self._jobs.values()
+            if job.status in (JobStatus.QUEUED, JobStatus.RUNNING)
+        )
+
+    def _prune_history(self) -> None:
+        """Forget the oldest finished jobs beyond max_history"""
+        finished = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+        ]
+        for job_id in finished[: max(0, len(self._jobs) - self.max_history)]:
+            del self._jobs[job_id]
+
+    def submit(self, filename: str, path: str) -> IngestionJob:
+        """
+        Queue a PDF already written to ``path`` for ingestion.
+
+        The file is deleted once the job finishes, whether it succeeds or not.
+
+        Raises:
+            IngestionQueueFullError: If max_pending jobs are already active
+        """
+        with self._lock:
+            if self._active_count() >= self.max_pending:
+                raise IngestionQueueFullError(
+                    f"Too many ingestion jobs in progress (limit {self.max_pending})"
+                )
+            job = IngestionJob(job_id=str(uuid.uuid4()), filename=filename, path=path)
+            self._jobs[job.job_id] = job
+            self._prune_history()
+
+        self._executor.submit(self._run, job)
+        logger.info(f"Queued ingestion job {job.job_id} for '{filename}'")
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        """Get a job by ID"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[IngestionJob]:
+        """List known jobs, newest first"""
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def _run(self, job: IngestionJob) -> None:
+        with self._lock:
+            # Jobs still queued at shutdown are failed (and cleaned up) there
+            if job.status != JobStatus.QUEUED:
+                return
+            job.status = JobStatus.RUNNING
+            job.started_at = time.time()
+
+        def report(stage: str, done: int, total: int) -> None:
+            job.stage = stage
+            if stage == "embedding":
+                job.chunks_done, job.chunks_total = done, total
+
+        try:
+            self.vector_store_service.ingest_pdf(job.path, progress_callback=report)
+            job.status = JobStatus.SUCCEEDED
+            logger.info(
+                f"Ingestion job {job.job_id} for '{job.filename}' finished "
+                f"({job.chunks_total} chunks)"
+            )
+        except Exception as e:
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+            logger.error(f"Ingestion job {job.job_id} failed: {str(e)}")
+        finally:
+            job.finished_at = time.time()
+            self._remove_upload(job)
+
+    @staticmethod
+    def _remove_upload(job: IngestionJob) -> None:
+        try:
+            os.remove(job.path)
+        except OSError:
+            logger.warning(f"Could not remove upload file {job.path}")
+
+    def shutdown(self) -> None:
+        """
+        Stop accepting work; running jobs finish in the background.
+
+        Queued jobs will never run, so they are failed and their upload files
+        deleted here.
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            queued = [
+                job for job in self._jobs.values() if job.status == JobStatus.QUEUED
+            ]
+            for job in queued:
+                job.status = JobStatus.FAILED
+                job.error = "Cancelled at shutdown"
+                job.finished_at = time.time()
+        for job in queued:
+            self._remove_upload(job)
+        if queued:
+            logger.info(f"Cancelled {len(queued)} queued ingestion job(s) at shutdown")
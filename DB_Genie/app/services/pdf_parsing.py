@@ -0,0 +1,136 @@
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+from langchain_text_splitters import TextSplitter
+from pypdf import PdfReader
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ParsedPdf:
+    """Chunks of one PDF, or the error that stopped it from being parsed"""
+
+    path: Path
+    chunks: List[Document] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def parse_pdf(
+    pdf_path: str,
+    source: str,
+    text_splitter: TextSplitter,
+    page_range: Optional[Tuple[int, int]] = None,
+) -> List[Document]:
+    """
+    Extract and split the pages of a PDF (all of them, or [start, end)).
+
+    Pages are split independently, as PyPDFLoader + split_documents did, so
+    splitting a file into page ranges yields exactly the same chunks.
+    """
+    reader = PdfReader(pdf_path)
+    total_pages = len(reader.pages)
+    start, end = page_range or (0, total_pages)
+
+    pages = []
+    for page_number in range(start, min(end, total_pages)):
+        pages.append(
+            Document(
+                page_content=reader.pages[page_number].extract_text().strip(),
+                metadata={
+                    "source": source,
+                    "total_pages": total_pages,
+                    "page": page_number,
+                    "page_label": reader.page_labels[page_number],
+                },
+            )
+        )
+    return text_splitter.split_documents(pages)
+
+
+def _plan_tasks(
+    pdf_paths: Sequence[Path], pages_per_task: int
+) -> List[Tuple[int, Optional[Tuple[int, int]]]]:
+    """One task per file, or one per page range for files over pages_per_task"""
+    tasks = []
+    for file_index, pdf_path in enumerate(pdf_paths):
+        try:
+            page_count = len(PdfReader(str(pdf_path)).pages)
+        except Exception:
+            # Let the worker hit (and report) the same error
+            page_count = 0
+        if page_count <= pages_per_task:
+            tasks.append((file_index, None))
+            continue
+        for start in range(0, page_count, pages_per_task):
+            tasks.append((file_index, (start, start + pages_per_task)))
+    return tasks
+
+
+def parse_pdfs(
+    pdf_paths: Sequence[Path],
+    text_splitter: TextSplitter,
+    max_workers: int = 0,
+    pages_per_task: int = 50,
+) -> List[ParsedPdf]:
+    """
+    Parse and split many PDFs in a process pool.
+
+    Results come back in the order of ``pdf_paths`` with chunks in page order,
+    regardless of which worker finished first. A file that fails to parse is
+    returned with ``error`` set instead of aborting the others.
+
+    Args:
+        pdf_paths: PDFs to parse; chunk metadata "source" is the file name
+        text_splitter: Splitter applied to every page (must be picklable)
+        max_workers: Worker processes; 0 means one per CPU
+        pages_per_task: Files with more pages are split across tasks
+    """
+    results = [ParsedPdf(path=Path(pdf_path)) for pdf_path in pdf_paths]
+    tasks = _plan_tasks([result.path for result in results], pages_per_task)
+    workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+
+    def arguments(task):
+        file_index, page_range = task
+        path = results[file_index].path
+        return str(path), path.name, text_splitter, page_range
+
+    if workers <= 1:
+        outcomes = []
+        for task in tasks:
+            try:
+                outcomes.append(parse_pdf(*arguments(task)))
+            except Exception as e:
+                outcomes.append(e)
+    else:
+        # spawn, not fork: the server process already runs threads
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            futures = [executor.submit(parse_pdf, *arguments(task)) for task in tasks]
+            outcomes = []
+            for future in futures:
+                try:
+                    outcomes.append(future.result())
+                except Exception as e:
+                    outcomes.append(e)
+
+    # Tasks are planned in file then page order, so appending keeps that order
+    for (file_index, _), outcome in zip(tasks, outcomes):
+        result = results[file_index]
+        if isinstance(outcome, Exception):
+            result.error = result.error or str(outcome)
+        else:
+            result.chunks.extend(outcome)
+
+    for result in results:
+        if result.error:
+            result.chunks = []
+            logger.warning(f"Failed to parse {result.path.name}: {result.error}")
+    return results
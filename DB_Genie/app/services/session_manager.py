@@ -1,47 +1,117 @@
+import threading
+import time
 import uuid
-from typing import Dict, List, Optional
+from collections import OrderedDict
+from typing import List, Optional
+
+from app.core.config import settings
+from app.services.session_store import SessionStore, create_session_store
+
+
+class _CachedSession:
+    __slots__ = ("generation", "messages")
+
+    def __init__(self, generation: int, messages: List[dict]):
+        self.generation = generation
+        self.messages = messages
 
 
 class SessionManager:
-    """Manages chat sessions and conversation history"""
+    """
+    Manages chat sessions and conversation history.
+
+    History lives in a shared SessionStore so every uvicorn worker sees the
+    same sessions. Each worker keeps a small LRU read-through cache; because
+    the store is append-only, refreshing a cached session only fetches the
+    messages appended since the last read.
+    """
+
+    def __init__(
+        self,
+        store: Optional[SessionStore] = None,
+        cache_size: Optional[int] = None,
+    ):
+        self.store = store or create_session_store(
+            settings.SESSION_BACKEND,
+            settings.SESSION_DB_PATH,
+            settings.SESSION_REDIS_URL,
+            settings.SESSION_TTL_SECONDS,
+        )
+        self.cache_size = (
+            cache_size if cache_size is not None else settings.SESSION_CACHE_SIZE
+        )
+        self._cache: "OrderedDict[str, _CachedSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_purge = time.monotonic()
 
-    def __init__(self):
-        # In-memory session storage (consider using Redis or database for production)
-        self.sessions: Dict[str, List[dict]] = {}
+    def _maybe_purge(self) -> None:
+        """Drop expired sessions from the store at most once per interval"""
+        now = time.monotonic()
+        if now - self._last_purge < settings.SESSION_PURGE_INTERVAL_SECONDS:
+            return
+        self._last_purge = now
+        self.store.purge_expired()
+
+    def _invalidate(self, session_id: str) -> None:
+        with self._lock:
+            self._cache.pop(session_id, None)
 
     def create_session(self) -> str:
         """Create a new session and return its ID"""
+        self._maybe_purge()
         session_id = str(uuid.uuid4())
-        self.sessions[session_id] = []
+        self.store.create(session_id)
         return session_id
 
     def get_session(self, session_id: str) -> Optional[List[dict]]:
         """Get conversation history for a session"""
-        return self.sessions.get(session_id)
+        with self._lock:
+            cached = self._cache.get(session_id)
+        offset = len(cached.messages) if cached else 0
+
+        tail = self.store.read(session_id, offset)
+        if tail is None:
+            self._invalidate(session_id)
+            return None
+
+        generation, length, messages = tail
+        if cached is None or cached.generation != generation or length < offset:
+            # Cache miss, or the session was cleared/recreated by another worker
+            if offset:
+                generation, length, messages = self.store.read(session_id) or tail
+            cached = _CachedSession(generation, messages)
+        else:
+            cached = _CachedSession(generation, cached.messages + messages)
+
+        if self.cache_size > 0:
+            with self._lock:
+                self._cache[session_id] = cached
+                self._cache.move_to_end(session_id)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return list(cached.messages)
 
     def ensure_session(self, session_id: str) -> None:
         """Ensure a session exists, create it if it doesn't"""
-        if session_id not in self.sessions:
-            self.sessions[session_id] = []
+        if not self.store.exists(session_id):
+            self._invalidate(session_id)
+            self.store.create(session_id)
 
     def add_message(self, session_id: str, message: dict) -> None:
         """Add a message to the session history"""
-        if session_id not in self.sessions:
-            self.sessions[session_id] = []
-        self.sessions[session_id].append(message)
+        self.store.append(session_id, [message])
 
     def add_messages(self, session_id: str, messages: List[dict]) -> None:
         """Add multiple messages to the session history"""
-        if session_id not in self.sessions:
-            self.sessions[session_id] = []
-        self.sessions[session_id].extend(messages)
+        self.store.append(session_id, messages)
 
     def clear_session(self, session_id: str) -> None:
         """Clear conversation history for a session"""
-        if session_id in self.sessions:
-            self.sessions[session_id] = []
+        self.store.clear(session_id)
+        self._invalidate(session_id)
 
     def delete_session(self, session_id: str) -> None:
         """Delete a session"""
-        if session_id in self.sessions:
-            del self.sessions[session_id]
+        self.store.delete(session_id)
+        self._invalidate(session_id)
@@ -0,0 +1,315 @@
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# (generation, message count, messages) as returned by SessionStore.read
+SessionTail = Tuple[int, int, List[dict]]
+
+
+class SessionStore(ABC):
+    """
+    Interface for shared session backends.
+
+    Message history is an append-only log per session. Every session carries a
+    ``generation`` counter that is bumped whenever its history is cleared, so
+    per-worker caches can tell a tail read from a reset.
+    """
+
+    @abstractmethod
+    def create(self, session_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def exists(self, session_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def append(self, session_id: str, messages: List[dict]) -> None:
+        ...
+
+    @abstractmethod
+    def read(self, session_id: str, offset: int = 0) -> Optional[SessionTail]:
+        """
+        Read messages starting at ``offset``.
+
+        Returns:
+            (generation, total message count, messages[offset:]) or None if the
+            session does not exist or has expired
+        """
+        ...
+
+    @abstractmethod
+    def clear(self, session_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        ...
+
+    def purge_expired(self) -> int:
+        """Remove expired sessions and return how many were removed."""
+        return 0
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Session store backed by a SQLite file in WAL mode.
+
+    WAL lets readers in every worker process proceed while one writer appends,
+    which is all a chat workload needs on a single host.
+    """
+
+    def __init__(self, db_path: str, ttl_seconds: int = 86400):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                generation INTEGER NOT NULL DEFAULT 0,
+                length INTEGER NOT NULL DEFAULT 0,
+                expires_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS messages (
+                session_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                body TEXT NOT NULL,
+                PRIMARY KEY (session_id, seq)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_sessions_expires_at
+                ON sessions (expires_at);
+            """
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db_path, timeout=30, isolation_level=None, check_same_thread=True
+            )
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def create(self, session_id: str) -> None:
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR IGNORE INTO sessions (session_id, expires_at) VALUES (?, ?)",
+            (session_id, time.time() + self.ttl_seconds),
+        )
+
+    def exists(self, session_id: str) -> bool:
+        row = (
+            self._connection()
+            .execute(
+                "SELECT 1 FROM sessions WHERE session_id = ? AND expires_at > ?",
+                (session_id, time.time()),
+            )
+            .fetchone()
+        )
+        return row is not None
+
+    def append(self, session_id: str, messages: List[dict]) -> None:
+        if not messages:
+            return
+
+        now = time.time()
+        conn = self._connection()
+        # IMMEDIATE takes the write lock up front so concurrent appends from
+        # other workers cannot interleave sequence numbers
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT length, expires_at FROM sessions WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+
+            if row is None or row[1] <= now:
+                # Missing or expired: start a fresh log
+                conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+                conn.execute(
+                    "INSERT OR REPLACE INTO sessions (session_id, generation, length, expires_at) "
+                    "VALUES (?, COALESCE((SELECT generation + 1 FROM sessions WHERE session_id = ?), 0), 0, ?)",
+                    (session_id, session_id, now + self.ttl_seconds),
+                )
+                length = 0
+            else:
+                length = row[0]
+
+            conn.executemany(
+                "INSERT INTO messages (session_id, seq, body) VALUES (?, ?, ?)",
+                [
+                    (session_id, length + i, json.dumps(message))
+                    for i, message in enumerate(messages)
+                ],
+            )
+            conn.execute(
+                "UPDATE sessions SET length = ?, expires_at = ? WHERE session_id = ?",
+                (length + len(messages), now + self.ttl_seconds, session_id),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def read(self, session_id: str, offset: int = 0) -> Optional[SessionTail]:
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT generation, length FROM sessions WHERE session_id = ? AND expires_at > ?",
+            (session_id, time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+
+        generation, length = row
+        if offset >= length:
+            return generation, length, []
+
+        rows = conn.execute(
+            "SELECT body FROM messages WHERE session_id = ? AND seq >= ? AND seq < ? ORDER BY seq",
+            (session_id, offset, length),
+        ).fetchall()
+        return generation, length, [json.loads(body) for (body,) in rows]
+
+    def clear(self, session_id: str) -> None:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            conn.execute(
+                "UPDATE sessions SET generation = generation + 1, length = 0 WHERE session_id = ?",
+                (session_id,),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, session_id: str) -> None:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def purge_expired(self) -> int:
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM messages WHERE session_id IN "
+                "(SELECT session_id FROM sessions WHERE expires_at <= ?)",
+                (now,),
+            )
+            removed = conn.execute(
+                "DELETE FROM sessions WHERE expires_at <= ?", (now,)
+            ).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return removed
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Session store for any server speaking the Redis protocol (Redis, Valkey,
+    KeyDB, Azure Cache for Redis).
+
+    Each session is a metadata hash plus a message list; both keys share the
+    session TTL, so expiry is handled by the server.
+    """
+
+    def __init__(self, url: str, ttl_seconds: int = 86400, prefix: str = "dbgenie"):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError(
+                "`redis` package not found, please run `pip install redis` "
+                "to use SESSION_BACKEND=redis"
+            )
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def _meta_key(self, session_id: str) -> str:
+        return f"{self.prefix}:session:{session_id}:meta"
+
+    def _messages_key(self, session_id: str) -> str:
+        return f"{self.prefix}:session:{session_id}:messages"
+
+    def create(self, session_id: str) -> None:
+        meta_key = self._meta_key(session_id)
+        pipe = self.client.pipeline()
+        pipe.hsetnx(meta_key, "generation", 0)
+        pipe.expire(meta_key, self.ttl_seconds)
+        pipe.execute()
+
+    def exists(self, session_id: str) -> bool:
+        return bool(self.client.exists(self._meta_key(session_id)))
+
+    def append(self, session_id: str, messages: List[dict]) -> None:
+        if not messages:
+            return
+
+        meta_key = self._meta_key(session_id)
+        messages_key = self._messages_key(session_id)
+        pipe = self.client.pipeline()
+        pipe.hsetnx(meta_key, "generation", 0)
+        pipe.rpush(messages_key, *[json.dumps(message) for message in messages])
+        pipe.expire(meta_key, self.ttl_seconds)
+        pipe.expire(messages_key, self.ttl_seconds)
+        pipe.execute()
+
+    def read(self, session_id: str, offset: int = 0) -> Optional[SessionTail]:
+        pipe = self.client.pipeline()
+        pipe.hget(self._meta_key(session_id), "generation")
+        pipe.llen(self._messages_key(session_id))
+        pipe.lrange(self._messages_key(session_id), offset, -1)
+        generation, length, rows = pipe.execute()
+
+        if generation is None:
+            return None
+        return int(generation), length, [json.loads(body) for body in rows]
+
+    def clear(self, session_id: str) -> None:
+        meta_key = self._meta_key(session_id)
+        pipe = self.client.pipeline()
+        pipe.delete(self._messages_key(session_id))
+        pipe.hincrby(meta_key, "generation", 1)
+        pipe.expire(meta_key, self.ttl_seconds)
+        pipe.execute()
+
+    def delete(self, session_id: str) -> None:
+        self.client.delete(self._meta_key(session_id), self._messages_key(session_id))
+
+
+def create_session_store(
+    backend: str, sqlite_path: str, redis_url: Optional[str], ttl_seconds: int
+) -> SessionStore:
+    """Create the session store configured by SESSION_BACKEND"""
+    backend = backend.lower()
+    if backend == "sqlite":
+        return SQLiteSessionStore(sqlite_path, ttl_seconds=ttl_seconds)
+    if backend == "redis":
+        if not redis_url:
+            raise ValueError("SESSION_REDIS_URL is required when SESSION_BACKEND=redis")
+        return RedisSessionStore(redis_url, ttl_seconds=ttl_seconds)
+    raise ValueError(f"Unsupported session backend: {backend}")
@@ -1,102 +1,377 @@
-import os
+import logging
+import threading
+import uuid
 from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
 
-from langchain_community.document_loaders import PyPDFLoader
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from app.core.config import settings
 from app.services.embeddings import EmbeddingsService
+from app.services.index_factory import (
+    IndexSpec,
+    build_index,
+    configure_search,
+    empty_like,
+    index_kind,
+    reconstruct,
+    supports_in_place_remove,
+)
+from app.services.index_persistence import (
+    file_sha256,
+    load_current_index,
+    save_index,
+)
+from app.services.pdf_parsing import parse_pdf, parse_pdfs
+
+logger = logging.getLogger(__name__)
+
+# Called as progress_callback(stage, done, total) while a PDF is ingested
+ProgressCallback = Callable[[str, int, int], None]
 
 
 class VectorStoreService:
-    def __init__(self, embeddings_service: EmbeddingsService):
+    def __init__(
+        self, embeddings_service: EmbeddingsService, persist_path: Optional[str] = None
+    ):
         self.embeddings_service = embeddings_service
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=3000, chunk_overlap=200
         )
         self.vector_store = None
+        self.index_spec = IndexSpec.from_settings()
+        # Serializes writers; readers never lock and always see either the old
+        # or the new store, because updates build a copy and swap the reference
+        self._write_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+        # Per source file: size, mtime, sha256 and the docstore IDs of its chunks
+        self.file_manifest: Dict[str, Dict[str, Any]] = {}
+
+        # When set, the index is saved here after every ingestion
+        self.persist_path = Path(persist_path) if persist_path else None
+        self._save_lock = threading.Lock()
+
+    def load(self) -> bool:
+        """
+        Load the persisted index and its file manifest.
+
+        Returns:
+            True if the persisted index was loaded, False if it is missing or
+            unreadable
+        """
+        if self.persist_path is None:
+            return False
+
+        try:
+            loaded = load_current_index(self.persist_path)
+        except Exception as e:
+            logger.warning(f"Could not load persisted index: {str(e)}")
+            return False
+
+        if loaded is None:
+            logger.info(f"No persisted index found at {self.persist_path}")
+            return False
+
+        vector_store, manifest = loaded
+        if "files" not in manifest:
+            logger.info("Persisted index has no per-file manifest, rebuilding")
+            return False
+
+        configure_search(vector_store.index, self.index_spec)
+        if index_kind(vector_store.index) != self.index_spec.resolve_type(
+            vector_store.index.ntotal
+        ):
+            # FAISS_INDEX_TYPE changed since the index was saved
+            vector_store = self._rebuilt(vector_store)
+
+        with self._write_lock:
+            self.vector_store = vector_store
+            self.file_manifest = manifest["files"]
+        logger.info(
+            f"Loaded persisted index {manifest['version']} "
+            f"with {vector_store.index.ntotal} chunks"
+        )
+        return True
 
-    def ingest_pdf(self, pdf_path: str):
-        # Load PDF
-        loader = PyPDFLoader(pdf_path)
-        documents = loader.load()
+    def save(self) -> None:
+        """Persist the current index, if a persist path is configured"""
+        if self.persist_path is None:
+            return
+
+        with self._save_lock:
+            with self._write_lock:
+                vector_store = self.vector_store
+                file_manifest = self.file_manifest
+            if vector_store is None:
+                return
+            version = save_index(
+                vector_store,
+                self.persist_path,
+                {"files": file_manifest, "chunk_count": vector_store.index.ntotal},
+            )
+        logger.info(f"Saved index version {version} to {self.persist_path}")
 
-        # Split documents
-        texts = self.text_splitter.split_documents(documents)
+    def _load_chunks(self, pdf_path: str, source: str) -> List[Document]:
+        """Parse and split a PDF, tagging every chunk with its source name"""
+        return parse_pdf(pdf_path, source, self.text_splitter)
+
+    def ingest_pdf(
+        self, pdf_path: str, progress_callback: Optional[ProgressCallback] = None
+    ):
+        report = progress_callback or (lambda stage, done, total: None)
+
+        # Load and split PDF
+        report("parsing", 0, 1)
+        texts = self._load_chunks(pdf_path, Path(pdf_path).name)
+        report("parsing", 1, 1)
 
         # Get text content from documents
         text_contents = [text.page_content for text in texts]
 
-        # Create embeddings for each text
-        embeddings = [
-            self.embeddings_service.get_embeddings(text) for text in text_contents
-        ]
+        # Create embeddings in batched, concurrent requests
+        report("embedding", 0, len(text_contents))
+        embeddings = self.embeddings_service.get_embeddings_batch(
+            text_contents,
+            progress_callback=lambda done, total: report("embedding", done, total),
+        )
+
+        report("indexing", 0, 1)
+        if text_contents:
+            with self._write_lock:
+                self.vector_store = self._updated_copy(
+                    self.vector_store,
+                    remove_ids=[],
+                    text_contents=text_contents,
+                    embeddings=embeddings,
+                    metadatas=[text.metadata for text in texts],
+                    ids=[str(uuid.uuid4()) for _ in texts],
+                )
+            self.save()
+        report("indexing", 1, 1)
+
+    def _updated_copy(
+        self,
+        base: Optional[FAISS],
+        remove_ids: List[str],
+        text_contents: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[dict],
+        ids: List[str],
+    ) -> Optional[FAISS]:
+        """
+        Build an updated copy of ``base`` with chunks removed and added by ID.
 
-        # If vector_store exists, add to it; otherwise create new
-        if self.vector_store is None:
-            text_embedding_pairs = zip(text_contents, embeddings)
-            self.vector_store = FAISS.from_embeddings(text_embedding_pairs, embeddings)
+        Callers swap the returned store in under the write lock, so concurrent
+        searches never observe a half-updated index.
+        """
+        if base is None:
+            if not text_contents:
+                return None
+            store = FAISS(
+                None,
+                build_index(self.index_spec, np.asarray(embeddings, dtype=np.float32)),
+                InMemoryDocstore(),
+                {},
+            )
         else:
-            # Add to existing vector store by merging
-            new_store = FAISS.from_embeddings(
-                zip(text_contents, embeddings), embeddings
+            store = FAISS(
+                base.embedding_function,
+                faiss.clone_index(base.index),
+                InMemoryDocstore(dict(base.docstore._dict)),
+                dict(base.index_to_docstore_id),
+            )
+
+        if remove_ids:
+            if supports_in_place_remove(store.index):
+                store.delete(remove_ids)
+            else:
+                store = self._rebuilt(store, exclude=set(remove_ids))
+        if text_contents:
+            store.add_embeddings(
+                zip(text_contents, embeddings), metadatas=metadatas, ids=ids
             )
-            self.vector_store.merge_from(new_store)
+
+        # e.g. an IVF index that fell back to flat now has enough vectors to train
+        if index_kind(store.index) != self.index_spec.resolve_type(store.index.ntotal):
+            store = self._rebuilt(store)
+        return store
+
+    def _rebuilt(self, store: FAISS, exclude: Optional[Set[str]] = None) -> FAISS:
+        """
+        Rebuild ``store`` from its stored vectors, leaving out ``exclude`` IDs.
+
+        Keeps the trained quantizers when the index type is unchanged, and
+        retrains otherwise. Reconstruction is lossy for IVF-PQ and fp16 indexes.
+        """
+        exclude = exclude or set()
+        kept = [
+            (position, doc_id)
+            for position, doc_id in sorted(store.index_to_docstore_id.items())
+            if doc_id not in exclude
+        ]
+        target = self.index_spec.resolve_type(len(kept))
+        index = empty_like(store.index) if index_kind(store.index) == target else None
+
+        vectors = reconstruct(store.index, [position for position, _ in kept])
+        if index is None:
+            logger.info(
+                f"Rebuilding {index_kind(store.index)} index as {target} "
+                f"with {len(kept)} vectors"
+            )
+            index = build_index(self.index_spec, vectors)
+        if len(kept):
+            index.add(vectors)
+
+        return FAISS(
+            store.embedding_function,
+            index,
+            InMemoryDocstore(
+                {doc_id: store.docstore._dict[doc_id] for _, doc_id in kept}
+            ),
+            {position: doc_id for position, (_, doc_id) in enumerate(kept)},
+        )
 
     def ingest_directory(self, directory_path: str):
-        """Ingest all PDF files from a directory"""
+        """Ingest all PDF files from a directory, replacing the current index"""
+        self._sync_directory(directory_path, rebuild=True)
+
+    def sync_directory(self, directory_path: str):
+        """
+        Incrementally bring the index in line with a directory of PDFs.
+
+        Only new or changed files are parsed and embedded; chunks of deleted or
+        changed files are removed by ID. Files are compared by size and mtime
+        first and hashed only when those differ, so an unchanged folder costs
+        one stat per file. Chunks added through ingest_pdf are left untouched.
+        """
+        self._sync_directory(directory_path, rebuild=False)
+
+    def _sync_directory(self, directory_path: str, rebuild: bool):
         directory = Path(directory_path)
         if not directory.exists():
             raise ValueError(f"Directory not found: {directory_path}")
 
-        pdf_files = list(directory.glob("*.pdf"))
-        if not pdf_files:
+        pdf_files = sorted(directory.glob("*.pdf"))
+        if not pdf_files and rebuild:
             print(f"No PDF files found in {directory_path}")
             return
 
-        print(f"Found {len(pdf_files)} PDF file(s) to index")
-
-        # Collect all documents from all PDFs first
-        all_texts = []
-        for pdf_file in pdf_files:
-            print(f"Loading: {pdf_file.name}")
-            try:
-                loader = PyPDFLoader(str(pdf_file))
-                documents = loader.load()
-                texts = self.text_splitter.split_documents(documents)
-                all_texts.extend(texts)
-                print(f"Loaded {len(texts)} chunks from {pdf_file.name}")
-            except Exception as e:
-                print(f"Error loading {pdf_file.name}: {str(e)}")
-                raise
-
-        if not all_texts:
-            print("No documents found to index")
-            return
+        with self._sync_lock:
+            previous = {} if rebuild else dict(self.file_manifest)
+            manifest: Dict[str, Dict[str, Any]] = {}
+            changed = []
 
-        # Get text content from all documents
-        text_contents = [text.page_content for text in all_texts]
+            for pdf_file in pdf_files:
+                stat = pdf_file.stat()
+                entry = previous.get(pdf_file.name)
+                if (
+                    entry
+                    and entry["size"] == stat.st_size
+                    and entry["mtime"] == stat.st_mtime
+                ):
+                    manifest[pdf_file.name] = entry
+                    continue
 
-        print(f"Creating embeddings for {len(text_contents)} chunks...")
-        # Create embeddings for each text
-        embeddings = [
-            self.embeddings_service.get_embeddings(text) for text in text_contents
-        ]
+                sha256 = file_sha256(pdf_file)
+                if entry and entry["sha256"] == sha256:
+                    # Touched but not modified
+                    manifest[pdf_file.name] = {**entry, "mtime": stat.st_mtime}
+                    continue
 
-        # Create vector store from all documents
-        print("Building vector store...")
-        text_embedding_pairs = zip(text_contents, embeddings)
-        self.vector_store = FAISS.from_embeddings(text_embedding_pairs, embeddings)
-        print(
-            f"Successfully indexed {len(pdf_files)} PDF file(s) with {len(text_contents)} total chunks"
-        )
+                changed.append(pdf_file)
+                manifest[pdf_file.name] = {
+                    "size": stat.st_size,
+                    "mtime": stat.st_mtime,
+                    "sha256": sha256,
+                    "ids": [],
+                }
+
+            # Parse new and changed PDFs in parallel before touching the index
+            all_texts = []
+            parsed_files = (
+                parse_pdfs(
+                    changed,
+                    self.text_splitter,
+                    max_workers=settings.PDF_PARSE_MAX_WORKERS,
+                    pages_per_task=settings.PDF_PARSE_PAGES_PER_TASK,
+                )
+                if changed
+                else []
+            )
+            for parsed in parsed_files:
+                name = parsed.path.name
+                if parsed.error:
+                    print(f"Error loading {name}: {parsed.error}")
+                    # Keep serving the last good version; retry on the next sync
+                    changed.remove(parsed.path)
+                    if name in previous:
+                        manifest[name] = previous[name]
+                    else:
+                        del manifest[name]
+                    continue
+                ids = [str(uuid.uuid4()) for _ in parsed.chunks]
+                manifest[name]["ids"] = ids
+                all_texts.extend(zip(parsed.chunks, ids))
+                print(f"Loaded {len(parsed.chunks)} chunks from {name}")
+
+            removed = [name for name in previous if name not in manifest]
+            stale_ids = [
+                chunk_id
+                for name in removed + [pdf_file.name for pdf_file in changed]
+                for chunk_id in previous.get(name, {}).get("ids", [])
+            ]
+
+            if not changed and not stale_ids and not rebuild:
+                with self._write_lock:
+                    self.file_manifest = manifest
+                if manifest != previous:
+                    self.save()
+                print(f"Index is up to date with {len(pdf_files)} PDF file(s)")
+                return
+
+            print(
+                f"Syncing {directory_path}: {len(changed)} new or changed, "
+                f"{len(removed)} removed, {len(manifest) - len(changed)} unchanged"
+            )
+
+            # Get text content from all documents
+            text_contents = [text.page_content for text, _ in all_texts]
+
+            print(f"Creating embeddings for {len(text_contents)} chunks...")
+            # Create embeddings in batched, concurrent requests
+            embeddings = self.embeddings_service.get_embeddings_batch(text_contents)
+
+            print("Updating vector store...")
+            with self._write_lock:
+                self.vector_store = self._updated_copy(
+                    None if rebuild else self.vector_store,
+                    remove_ids=stale_ids,
+                    text_contents=text_contents,
+                    embeddings=embeddings,
+                    metadatas=[text.metadata for text, _ in all_texts],
+                    ids=[chunk_id for _, chunk_id in all_texts],
+                )
+                self.file_manifest = manifest
+            self.save()
+            print(
+                f"Successfully indexed {len(changed)} PDF file(s) with "
+                f"{len(text_contents)} new chunks, removed {len(stale_ids)} stale chunks"
+            )
 
     async def similarity_search(self, query: str, k: int = 4):
-        if not self.vector_store:
+        # Take one reference so a concurrent swap cannot change the store mid-call
+        vector_store = self.vector_store
+        if not vector_store:
             raise ValueError(
                 "Vector store not initialized. Please ingest documents first."
             )
 
-        query_embedding = self.embeddings_service.get_embeddings(query)
-        results = self.vector_store.similarity_search_by_vector(query_embedding, k=k)
+        query_embedding = self.embeddings_service.get_query_embedding(query)
+        results = vector_store.similarity_search_by_vector(query_embedding, k=k)
         return results
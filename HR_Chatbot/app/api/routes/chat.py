@@ -1,14 +1,37 @@
+import asyncio
+import hmac
 import json
 import tempfile
-from typing import List, Optional
-
-from fastapi import APIRouter, File, HTTPException, UploadFile
+import time
+from pathlib import Path
+from typing import AsyncIterator, List, Optional
+
+from fastapi import (
+    APIRouter,
+    File,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
+from app.core.config import settings
+from app.services.answer_cache import SemanticAnswerCache, stream_frames
 from app.services.azure_openai import AzureOpenAIService
+from app.services.collection_manager import (
+    DEFAULT_COLLECTION,
+    Collection,
+    CollectionManager,
+    CollectionNotFound,
+)
 from app.services.embeddings import EmbeddingsService
+from app.services.metrics import metrics
 from app.services.session_manager import SessionManager
+from app.services.streaming import CoalescingStream, StreamMetrics
 from app.services.vector_store import VectorStoreService
 
 router = APIRouter()
@@ -16,8 +39,37 @@ router = APIRouter()
 # Initialize services
 openai_service = AzureOpenAIService()
 embeddings_service = EmbeddingsService()
-vector_store_service = VectorStoreService(embeddings_service)
-session_manager = SessionManager()
+vector_store_service = VectorStoreService(
+    embeddings_service,
+    artifact_root=Path(__file__).resolve().parents[2] / settings.VECTOR_STORE_PATH,
+)
+stream_metrics = StreamMetrics()
+session_manager = SessionManager(
+    ttl_seconds=settings.SESSION_TTL_SECONDS,
+    max_bytes=int(settings.SESSION_MAX_MEMORY_MB * 2**20),
+)
+
+
+def create_answer_cache() -> Optional[SemanticAnswerCache]:
+    if not settings.ANSWER_CACHE_ENABLED:
+        return None
+    return SemanticAnswerCache(
+        max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+        threshold=settings.ANSWER_CACHE_SIMILARITY,
+        ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+    )
+
+
+answer_cache = create_answer_cache()
+
+# Named collections are loaded on demand; the default one is always in memory
+collection_manager = CollectionManager(
+    embeddings_service,
+    root=Path(__file__).resolve().parents[2] / settings.COLLECTIONS_PATH,
+    max_bytes=int(settings.COLLECTIONS_MAX_MEMORY_MB * 2**20),
+    answer_cache_factory=create_answer_cache,
+)
+collection_manager.pin(Collection(DEFAULT_COLLECTION, vector_store_service, answer_cache))
 
 
 class ContentItem(BaseModel):
@@ -36,6 +88,7 @@ class ChatRequest(BaseModel):
     """Simplified chat request with session_id and user message"""
     session_id: str
     message: str  # User's message text
+    collection_id: str = DEFAULT_COLLECTION  # Policy collection to answer from
 
 
 class ChatResponse(BaseModel):
@@ -82,16 +135,53 @@ def convert_from_azure_format(role: str, content: str) -> dict:
     }
 
 
-async def prepare_messages_async(session_id: str, user_message: str):
+async def get_collection(collection_id: str, create: bool = False) -> Collection:
+    try:
+        return await collection_manager.get(collection_id, create=create)
+    except CollectionNotFound:
+        raise HTTPException(
+            status_code=404, detail=f"Collection '{collection_id}' not found"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def lookup_answer_cache(
+    collection: Collection, session_id: str, user_message: str
+):
+    """
+    Check the semantic answer cache for a first-turn question.
+
+    Returns (cached answer or None, query embedding, index key). The
+    embedding is None when the cache does not apply (disabled, or the
+    session already has history); otherwise it is reused for retrieval.
+    """
+    cache = collection.answer_cache
+    if cache is None or session_manager.has_history(session_id):
+        return None, None, None
+    index_key = collection.service.index_key
+    with metrics.stage("embed"):
+        query_embedding = await embeddings_service.get_query_embedding(user_message)
+    with metrics.stage("cache_lookup"):
+        cached_answer = cache.get(query_embedding, index_key)
+    return cached_answer, query_embedding, index_key
+
+
+async def prepare_messages_async(
+    session_id: str,
+    user_message: str,
+    query_embedding: Optional[List[float]] = None,
+    collection: Optional[Collection] = None,
+):
     """Prepare messages with context from vector store and session history"""
     # Ensure session exists
     session_manager.ensure_session(session_id)
-    # Get session history
-    session_history = session_manager.get_session(session_id) or []
 
     # Get relevant context from vector store
-    context = await vector_store_service.similarity_search(user_message)
-    context_text = "\n".join([doc.page_content for doc in context])
+    service = collection.service if collection else vector_store_service
+    context_text = await service.retrieve_context(
+        user_message, query_embedding=query_embedding
+    )
 
     # Add context to system message if we have context
     messages = []
@@ -102,9 +192,9 @@ async def prepare_messages_async(session_id: str, user_message: str):
         }
         messages.append(system_message)
 
-    # Add session history (convert to Azure format)
-    azure_history = convert_to_azure_format(session_history)
-    messages.extend(azure_history)
+    # Add session history (kept rendered in Azure format by the session manager)
+    with metrics.stage("history"):
+        messages.extend(session_manager.get_azure_messages(session_id))
 
     # Add current user message
     user_msg = {
@@ -116,6 +206,15 @@ async def prepare_messages_async(session_id: str, user_message: str):
     return messages
 
 
+def answer_cache_status(cached_answer: Optional[str], query_embedding) -> str:
+    if cached_answer is not None:
+        status = "hit"
+    else:
+        status = "miss" if query_embedding is not None else "bypass"
+    metrics.increment("answer_cache", status)
+    return status
+
+
 @router.post("/session")
 async def create_session():
     """Create a new chat session"""
@@ -124,22 +223,38 @@ async def create_session():
 
 
 @router.post("/chat")
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, response: Response):
     """Chat endpoint with session management"""
     try:
-        # Prepare messages with context and history
-        messages = await prepare_messages_async(request.session_id, request.message)
-
-        # Get completion from Azure OpenAI
-        response_text = openai_service.get_completion(messages)
+        collection = await get_collection(request.collection_id)
+        cached_answer, query_embedding, index_key = await lookup_answer_cache(
+            collection, request.session_id, request.message
+        )
+        if cached_answer is not None:
+            response_text = cached_answer
+        else:
+            # Prepare messages with context and history
+            messages = await prepare_messages_async(
+                request.session_id, request.message, query_embedding, collection
+            )
+
+            # Get completion from Azure OpenAI
+            with metrics.stage("completion"):
+                response_text = openai_service.get_completion(messages)
+            if query_embedding is not None:
+                collection.answer_cache.put(
+                    request.message, query_embedding, response_text, index_key
+                )
+        response.headers["X-Answer-Cache"] = answer_cache_status(
+            cached_answer, query_embedding
+        )
 
-        # Convert user message to new format and add to session
-        user_message_new_format = convert_from_azure_format("user", request.message)
-        session_manager.add_message(request.session_id, user_message_new_format)
+        # Add the exchange to the session
+        session_manager.add_turn(request.session_id, "user", request.message)
+        session_manager.add_turn(request.session_id, "assistant", response_text)
 
-        # Convert assistant response to new format and add to session
+        # Convert assistant response to new format
         assistant_message_new_format = convert_from_azure_format("assistant", response_text)
-        session_manager.add_message(request.session_id, assistant_message_new_format)
 
         # Return response in new format
         return {
@@ -152,31 +267,88 @@ async def chat(request: ChatRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/chat/stream")
-async def chat_stream(request: ChatRequest):
-    """Streaming chat endpoint with session management"""
-    try:
-        # Prepare messages with context and history
-        messages = await prepare_messages_async(request.session_id, request.message)
-
-        # Convert user message to new format and add to session
-        user_message_new_format = convert_from_azure_format("user", request.message)
-        session_manager.add_message(request.session_id, user_message_new_format)
+async def replay(frames) -> AsyncIterator[str]:
+    for frame in frames:
+        yield frame
 
-        full_response = ""
 
-        def generate():
-            nonlocal full_response
-            # Stream completion chunks
-            for chunk in openai_service.stream_completion(messages):
-                full_response += chunk
-                # Format as Server-Sent Events (SSE) or JSON chunks
-                data = json.dumps({"content": chunk})
-                yield f"data: {data}\n\n"
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request):
+    """
+    Streaming chat endpoint with session management.
+
+    Deltas from Azure OpenAI are coalesced into frames of up to
+    STREAM_MAX_FRAME_CHARS, flushed every STREAM_FLUSH_INTERVAL_MS. When the
+    client disconnects, the upstream completion is closed at once.
+    """
+    try:
+        collection = await get_collection(request.collection_id)
+        cached_answer, query_embedding, index_key = await lookup_answer_cache(
+            collection, request.session_id, request.message
+        )
+        if cached_answer is not None:
+            # Replay the cached answer in the same SSE shape as a live stream
+            deltas = replay(stream_frames(cached_answer))
+        else:
+            # Prepare messages with context and history
+            messages = await prepare_messages_async(
+                request.session_id, request.message, query_embedding, collection
+            )
+            deltas = openai_service.astream_completion(
+                messages, max_completion_tokens=settings.STREAM_MAX_COMPLETION_TOKENS
+            )
+
+        stream_started = time.perf_counter()
+        stream = CoalescingStream(
+            deltas,
+            flush_interval=settings.STREAM_FLUSH_INTERVAL_MS / 1000,
+            max_frame_chars=settings.STREAM_MAX_FRAME_CHARS,
+        )
 
-            # After streaming completes, add assistant message to session
-            assistant_message_new_format = convert_from_azure_format("assistant", full_response)
-            session_manager.add_message(request.session_id, assistant_message_new_format)
+        async def generate():
+            outcome = "failed"
+            try:
+                async for frame in stream:
+                    if await http_request.is_disconnected():
+                        outcome = "cancelled"
+                        return
+                    if stream.frame_count == 1 and cached_answer is None:
+                        # Time to first token, from the start of the request
+                        ttft = metrics.since_request_start()
+                        if ttft is not None:
+                            metrics.observe("ttft", ttft)
+                    # Format as Server-Sent Events (SSE) or JSON chunks
+                    data = json.dumps({"content": frame})
+                    yield f"data: {data}\n\n"
+                outcome = "completed"
+            except (asyncio.CancelledError, GeneratorExit):
+                # The server cancels the response when the client goes away
+                outcome = "cancelled"
+                raise
+            finally:
+                await stream.aclose()
+                if cached_answer is None:
+                    stream_metrics.record(
+                        outcome,
+                        stream.delta_count,
+                        stream.frame_count,
+                        settings.STREAM_MAX_COMPLETION_TOKENS,
+                    )
+                    # One delta is about one token (no usage block when streaming)
+                    metrics.increment("tokens", "streamed_completion", stream.delta_count)
+                    metrics.observe("stream", time.perf_counter() - stream_started)
+
+            # Only a completed exchange is added to the session; a cancelled or
+            # failed stream leaves no dangling user turn behind
+            full_response = stream.text
+            session_manager.add_turn(request.session_id, "user", request.message)
+            session_manager.add_turn(request.session_id, "assistant", full_response)
+
+            # Only complete answers are cached
+            if cached_answer is None and query_embedding is not None:
+                collection.answer_cache.put(
+                    request.message, query_embedding, full_response, index_key
+                )
 
         return StreamingResponse(
             generate(),
@@ -185,6 +357,7 @@ async def chat_stream(request: ChatRequest):
                 "Cache-Control": "no-cache",
                 "Connection": "keep-alive",
                 "X-Accel-Buffering": "no",
+                "X-Answer-Cache": answer_cache_status(cached_answer, query_embedding),
             },
         )
     except HTTPException:
@@ -217,10 +390,15 @@ async def clear_session(session_id: str):
 
 
 @router.post("/upload-pdf")
-async def upload_pdf(file: UploadFile = File(...)):
+async def upload_pdf(
+    file: UploadFile = File(...),
+    collection_id: str = Query(DEFAULT_COLLECTION),
+):
     if not file.filename.endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
 
+    # Uploading to a collection that does not exist yet creates it
+    collection = await get_collection(collection_id, create=True)
     try:
         # Save uploaded file temporarily
         with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
@@ -228,9 +406,128 @@ async def upload_pdf(file: UploadFile = File(...)):
             tmp_file.write(content)
             tmp_file.flush()
 
-            # Ingest PDF into vector store
-            vector_store_service.ingest_pdf(tmp_file.name)
+            # Ingest PDF into the collection's vector store (in a worker thread)
+            await collection_manager.ingest_pdf(collection, tmp_file.name)
+
+        return {"message": "PDF successfully ingested", "collection_id": collection_id}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def check_admin_key(x_admin_key: Optional[str]):
+    # Admin endpoints expose other users' cached questions, so without a
+    # configured key they are closed rather than open
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(
+            status_code=403, detail="Admin endpoints are disabled (ADMIN_API_KEY is not set)"
+        )
+    if not hmac.compare_digest(x_admin_key or "", settings.ADMIN_API_KEY):
+        raise HTTPException(status_code=403, detail="Invalid admin key")
+
 
-        return {"message": "PDF successfully ingested"}
+@router.get("/admin/index")
+async def get_index_version(x_admin_key: Optional[str] = Header(None)):
+    """Get the index version currently being served"""
+    check_admin_key(x_admin_key)
+    vector_store = vector_store_service.vector_store
+    return {
+        "version": vector_store_service.version,
+        "chunk_count": vector_store.index.ntotal if vector_store else 0,
+        "dedup": vector_store_service.dedup_stats,
+    }
+
+
+@router.post("/admin/index/reload")
+async def reload_index(x_admin_key: Optional[str] = Header(None)):
+    """
+    Hot-swap to the newest published index artifact.
+
+    Requests already searching finish on the previous index. PDFs added
+    through /upload-pdf since the last swap are not part of the new index.
+    """
+    check_admin_key(x_admin_key)
+    previous_version = vector_store_service.version
+    try:
+        swapped = await asyncio.to_thread(vector_store_service.load_latest)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "reloaded": swapped,
+        "version": vector_store_service.version,
+        "previous_version": previous_version,
+    }
+
+
+def loaded_collections(collection_id: Optional[str]) -> List[Collection]:
+    """Every collection in memory, or only ``collection_id``"""
+    collections = collection_manager.collections()
+    if collection_id is None:
+        return collections
+    selected = [c for c in collections if c.collection_id == collection_id]
+    if not selected:
+        raise HTTPException(
+            status_code=404, detail=f"Collection '{collection_id}' is not loaded"
+        )
+    return selected
+
+
+@router.get("/admin/answer-cache")
+async def get_answer_cache(
+    collection_id: Optional[str] = Query(None),
+    x_admin_key: Optional[str] = Header(None),
+):
+    """Inspect the semantic answer caches (stats and cached questions) per loaded collection"""
+    check_admin_key(x_admin_key)
+    if answer_cache is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "collections": [
+            {
+                "collection_id": collection.collection_id,
+                **collection.answer_cache.stats(),
+                "entries": collection.answer_cache.list_entries(),
+            }
+            for collection in loaded_collections(collection_id)
+            if collection.answer_cache is not None
+        ],
+    }
+
+
+@router.delete("/admin/answer-cache")
+async def flush_answer_cache(
+    collection_id: Optional[str] = Query(None),
+    x_admin_key: Optional[str] = Header(None),
+):
+    """Drop every cached answer, in all loaded collections or in one"""
+    check_admin_key(x_admin_key)
+    flushed = {
+        collection.collection_id: collection.answer_cache.flush()
+        for collection in loaded_collections(collection_id)
+        if collection.answer_cache is not None
+    }
+    return {"flushed": sum(flushed.values()), "collections": flushed}
+
+
+@router.get("/admin/sessions")
+async def get_session_stats(x_admin_key: Optional[str] = Header(None)):
+    """Session count, estimated memory and TTL / LRU eviction counters"""
+    check_admin_key(x_admin_key)
+    return session_manager.stats()
+
+
+@router.get("/admin/streaming")
+async def get_streaming_metrics(x_admin_key: Optional[str] = Header(None)):
+    """Streamed completions, frame coalescing and tokens saved by cancellation"""
+    check_admin_key(x_admin_key)
+    return stream_metrics.snapshot()
+
+
+@router.get("/admin/collections")
+async def get_collections(x_admin_key: Optional[str] = Header(None)):
+    """Loaded collections with their estimated memory, and those on disk"""
+    check_admin_key(x_admin_key)
+    return {
+        **collection_manager.stats(),
+        "available": collection_manager.available(),
+    }
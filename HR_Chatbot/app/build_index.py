@@ -0,0 +1,78 @@
+"""
+Build the HR policies index offline and publish it as a versioned artifact.
+
+Running servers pick up the new version through their file watch
+(INDEX_WATCH_INTERVAL_SECONDS) or POST /api/v1/admin/index/reload, so
+replicas no longer embed the whole corpus on startup.
+
+Run from the HR_Chatbot folder:
+    python -m app.build_index
+    python -m app.build_index --source "HR Policies" --output /shared/hr_index
+    python -m app.build_index --source policies/emea --collection emea
+"""
+
+import argparse
+import hashlib
+from pathlib import Path
+
+from app.core.config import settings
+from app.services.collection_manager import validate_collection_id
+from app.services.embeddings import EmbeddingsService
+from app.services.index_artifact import publish_artifact
+from app.services.vector_store import VectorStoreService
+
+APP_DIR = Path(__file__).parent
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--source", default=str(APP_DIR / "HR Policies Index"))
+    parser.add_argument("--output", default=str(APP_DIR / settings.VECTOR_STORE_PATH))
+    parser.add_argument(
+        "--collection",
+        help="Publish as this named collection under COLLECTIONS_PATH instead",
+    )
+    parser.add_argument("--keep", type=int, default=3, help="Versions to retain")
+    args = parser.parse_args()
+    if args.collection:
+        args.output = str(
+            APP_DIR / settings.COLLECTIONS_PATH / validate_collection_id(args.collection)
+        )
+
+    vector_store_service = VectorStoreService(EmbeddingsService())
+    vector_store_service.ingest_directory(args.source)
+    if vector_store_service.vector_store is None:
+        raise SystemExit(f"Nothing to index in {args.source}")
+
+    manifest = {
+        "source": str(Path(args.source).resolve()),
+        "collection_id": args.collection,
+        "files": [
+            {"name": pdf.name, "size": pdf.stat().st_size, "sha256": file_sha256(pdf)}
+            for pdf in sorted(Path(args.source).glob("*.pdf"))
+        ],
+        "chunk_count": vector_store_service.vector_store.index.ntotal,
+        "embedding_deployment": settings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME,
+        "chunking_mode": settings.CHUNKING_MODE,
+        "section_count": len(vector_store_service.sections),
+    }
+    version = publish_artifact(
+        vector_store_service.vector_store,
+        Path(args.output),
+        manifest,
+        keep=args.keep,
+        sections=vector_store_service.sections,
+    )
+    print(f"Published index version {version} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ import os
 from typing import List
 from dotenv import load_dotenv
 from pathlib import Path
+from pydantic import field_validator
 from pydantic_settings import BaseSettings
 
 env_path = Path(__file__).parent.parent / ".env"
@@ -16,12 +17,78 @@ class Settings(BaseSettings):
     AZURE_OPENAI_DEPLOYMENT_NAME: str = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
     AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME: str = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME")
 
+    # Query Embedding Micro-Batching (window 0 disables it)
+    EMBEDDING_BATCH_WINDOW_MS: float = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "10"))
+    EMBEDDING_BATCH_MAX_SIZE: int = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "64"))
+
+    # Chat sessions idle longer than this expire (0 keeps them until evicted)
+    SESSION_TTL_SECONDS: float = float(os.getenv("SESSION_TTL_SECONDS", "86400"))
+    # Least recently used sessions are evicted above this estimated size (0 = no cap)
+    SESSION_MAX_MEMORY_MB: float = float(os.getenv("SESSION_MAX_MEMORY_MB", "512"))
+
+    # Streaming: small deltas are coalesced into one SSE frame per flush interval
+    STREAM_FLUSH_INTERVAL_MS: float = float(os.getenv("STREAM_FLUSH_INTERVAL_MS", "50"))
+    STREAM_MAX_FRAME_CHARS: int = int(os.getenv("STREAM_MAX_FRAME_CHARS", "512"))
+    STREAM_MAX_COMPLETION_TOKENS: int = int(
+        os.getenv("STREAM_MAX_COMPLETION_TOKENS", "1600")
+    )
+
+    # Semantic answer cache for first-turn questions, dropped when the index changes
+    ANSWER_CACHE_ENABLED: bool = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_MAX_ENTRIES: int = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+    # Minimum cosine similarity between query embeddings to reuse an answer
+    ANSWER_CACHE_SIMILARITY: float = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))
+    ANSWER_CACHE_TTL_SECONDS: float = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400"))
+
     # Vector Store Settings
-    VECTOR_STORE_PATH: str = "vector_store"
+    # "structured": small heading-aware chunks linked to parent sections;
+    # "fixed": 3000-character chunks, top 4 sent as context
+    CHUNKING_MODE: str = os.getenv("CHUNKING_MODE", "structured")
+    CHILD_CHUNK_SIZE: int = int(os.getenv("CHILD_CHUNK_SIZE", "600"))
+    CHILD_CHUNK_OVERLAP: int = int(os.getenv("CHILD_CHUNK_OVERLAP", "100"))
+    # Structured retrieval: chunks retrieved, and the estimated prompt tokens
+    # the context may use; the best CONTEXT_EXPAND_PARENTS matches are
+    # expanded into their whole section when it fits
+    RETRIEVAL_TOP_K: int = int(os.getenv("RETRIEVAL_TOP_K", "8"))
+    CONTEXT_TOKEN_BUDGET: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+    CONTEXT_EXPAND_PARENTS: int = int(os.getenv("CONTEXT_EXPAND_PARENTS", "2"))
+
+    # Chunks whose SimHash differs in at most this many bits are embedded once
+    # (0-3; -1 disables deduplication)
+    CHUNK_DEDUP_MAX_DISTANCE: int = int(os.getenv("CHUNK_DEDUP_MAX_DISTANCE", "3"))
+
+    # Index artifacts built by app/build_index.py, relative to app/
+    VECTOR_STORE_PATH: str = os.getenv("VECTOR_STORE_PATH", "vector_store")
+    # Memory-map the index and chunk texts so worker processes share one copy
+    INDEX_MMAP: bool = os.getenv("INDEX_MMAP", "true").lower() == "true"
+    # Poll for a newer artifact this often (0 disables; use the admin endpoint)
+    INDEX_WATCH_INTERVAL_SECONDS: float = float(
+        os.getenv("INDEX_WATCH_INTERVAL_SECONDS", "30")
+    )
+
+    # Named policy collections (one artifact root per collection id), relative to app/
+    COLLECTIONS_PATH: str = os.getenv("COLLECTIONS_PATH", "collections")
+    # Estimated vectors + text of loaded collections; least recently used are evicted
+    COLLECTIONS_MAX_MEMORY_MB: float = float(
+        os.getenv("COLLECTIONS_MAX_MEMORY_MB", "2048")
+    )
+
+    # Required in the X-Admin-Key header for admin endpoints; they are
+    # disabled while it is empty
+    ADMIN_API_KEY: str = os.getenv("ADMIN_API_KEY", "")
 
     # CORS Settings
     ALLOWED_ORIGINS: List[str] = ["*"]
 
+    @field_validator("CHUNK_DEDUP_MAX_DISTANCE")
+    @classmethod
+    def _check_dedup_distance(cls, value: int) -> int:
+        # SimHash banding only guarantees candidates within 3 bits; fail at
+        # startup rather than in every ingestion
+        if not -1 <= value <= 3:
+            raise ValueError("CHUNK_DEDUP_MAX_DISTANCE must be between 0 and 3, or -1")
+        return value
+
     class Config:
         env_file = ".env"
 
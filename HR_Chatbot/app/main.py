@@ -1,12 +1,13 @@
+import asyncio
 from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from app.api.routes import chat
 from app.core.config import settings
-from app.services.embeddings import EmbeddingsService
-from app.services.vector_store import VectorStoreService
+from app.services.metrics import ServerTimingMiddleware, metrics
 
 app = FastAPI(
     title="HR Chatbot API",
@@ -21,15 +22,57 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Answer-Cache"],
+)
+
+# Per-stage timings on chat requests: Server-Timing header and /metrics
+app.add_middleware(
+    ServerTimingMiddleware, paths=["/api/v1/chat", "/api/v1/chat/stream"]
 )
 
 # Include routers
 app.include_router(chat.router, prefix="/api/v1")
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Stage latency histograms, token counts and answer cache results (Prometheus)"""
+    return metrics.render()
+
+
+# Background task polling for newer index artifacts
+index_watch_task = None
+
+
+async def watch_index_artifacts():
+    """Hot-swap to a newly published index version when LATEST changes"""
+    while True:
+        await asyncio.sleep(settings.INDEX_WATCH_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(chat.vector_store_service.load_latest)
+            await chat.collection_manager.refresh()
+        except Exception as e:
+            print(f"Error loading new index version: {str(e)}")
+
+
 @app.on_event("startup")
 async def startup_event():
-    """Pre-index PDF files from HR Policies Index folder on startup"""
+    """Load the published index artifact, or index the policies folder"""
+    global index_watch_task
+    if settings.INDEX_WATCH_INTERVAL_SECONDS > 0:
+        index_watch_task = asyncio.create_task(watch_index_artifacts())
+
+    vector_store_service = chat.vector_store_service
+    try:
+        if await asyncio.to_thread(vector_store_service.load_latest):
+            return
+        print(
+            f"No index artifact in {vector_store_service.artifact_root}; "
+            "run 'python -m app.build_index' to avoid indexing on startup"
+        )
+    except Exception as e:
+        print(f"Error loading index artifact: {str(e)}")
+
     try:
         # Get the path to the HR Policies Index folder
         app_dir = Path(__file__).parent
@@ -39,19 +82,18 @@ async def startup_event():
             print(f"Warning: HR Policies Index folder not found at {policies_dir}")
             return
         
-        # Initialize services for pre-indexing
-        embeddings_service = EmbeddingsService()
-        vector_store_service = VectorStoreService(embeddings_service)
-        
-        # Pre-index all PDFs in the folder
+        # Pre-index all PDFs in the folder into the shared service in place
         print(f"Starting pre-indexing of PDFs from {policies_dir}...")
         vector_store_service.ingest_directory(str(policies_dir))
-        
-        # Update the vector store service in the chat router
-        chat.vector_store_service = vector_store_service
         print("Pre-indexing completed successfully!")
         
     except Exception as e:
         print(f"Error during pre-indexing: {str(e)}")
         # Don't raise - allow the API to start even if indexing fails
         # The user can still upload PDFs manually
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if index_watch_task is not None:
+        index_watch_task.cancel()
@@ -0,0 +1,115 @@
+"""
+Compare per-worker memory for in-memory vs memory-mapped index artifacts.
+
+Publishes a synthetic artifact, then starts N worker processes that each load
+it (as uvicorn workers would), run searches that touch the whole index, and
+report RSS and PSS. PSS splits shared pages between the processes mapping
+them, so it shows what each worker really costs. Linux only (reads
+/proc/self/smaps_rollup).
+
+Run from the HR_Chatbot folder:
+    python -m app.scripts.benchmark_index_memory --workers 8 --chunks 20000
+"""
+
+import argparse
+import multiprocessing
+import random
+import tempfile
+from pathlib import Path
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from app.services.index_artifact import latest_version, load_artifact, publish_artifact
+
+
+def _memory_mib():
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                values[key] = int(rest.split()[0]) / 1024
+    return values["Rss"], values["Pss"]
+
+
+def _worker(root, use_mmap, dim, loaded, measured, results):
+    store, _ = load_artifact(root, latest_version(root), use_mmap=use_mmap)
+    rng = np.random.default_rng()
+    for _ in range(20):
+        documents = store.similarity_search_by_vector(rng.random(dim).tolist(), k=4)
+        assert len(documents) == 4
+    loaded.wait()
+    # Measure while every worker has the artifact open
+    results.put(_memory_mib())
+    measured.wait()
+
+
+def _synthetic_store(chunks, dim, text_size):
+    rng = np.random.default_rng(0)
+    index = faiss.IndexFlatL2(dim)
+    for start in range(0, chunks, 10_000):
+        index.add(rng.random((min(10_000, chunks - start), dim), dtype=np.float32))
+    words = "leave policy employee manager benefit approval salary notice".split()
+    docstore = {}
+    for position in range(chunks):
+        text = " ".join(random.choice(words) for _ in range(text_size // 7))
+        docstore[str(position)] = Document(page_content=text)
+    return FAISS(
+        None,
+        index,
+        InMemoryDocstore(docstore),
+        {position: str(position) for position in range(chunks)},
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--chunks", type=int, default=20_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--text-size", type=int, default=3000, help="Characters")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        publish_artifact(
+            _synthetic_store(args.chunks, args.dim, args.text_size), Path(root), {}
+        )
+        artifact_mib = sum(p.stat().st_size for p in Path(root).rglob("*")) / 2**20
+        print(
+            f"{args.chunks} chunks x {args.dim} dims, artifact {artifact_mib:.0f} MiB, "
+            f"{args.workers} workers"
+        )
+
+        context = multiprocessing.get_context("spawn")
+        for label, use_mmap in (("in-memory", False), ("mmap", True)):
+            loaded = context.Barrier(args.workers)
+            measured = context.Barrier(args.workers)
+            results = context.Queue()
+            workers = [
+                context.Process(
+                    target=_worker,
+                    args=(root, use_mmap, args.dim, loaded, measured, results),
+                )
+                for _ in range(args.workers)
+            ]
+            for worker in workers:
+                worker.start()
+            samples = [results.get() for _ in workers]
+            for worker in workers:
+                worker.join()
+
+            rss = [sample[0] for sample in samples]
+            pss = [sample[1] for sample in samples]
+            print(
+                f"{label:<10} RSS per worker {np.mean(rss):7.1f} MiB  "
+                f"PSS per worker {np.mean(pss):7.1f} MiB  "
+                f"total PSS {sum(pss):8.1f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark session history memory and prompt-building CPU.
+
+Replays N sessions of T turns (a user question and an assistant answer per
+turn) through the previous dict-per-message storage, which re-converted the
+whole history to Azure format on every request, and through SessionManager.
+Each request builds the Azure-format history, as /chat does, before the
+exchange is appended. Memory is the traced Python allocation for the stored
+sessions.
+
+Run from the HR_Chatbot folder:
+    python -m app.scripts.benchmark_sessions --sessions 10000 --turns 50
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from typing import Dict, List
+
+from app.services.session_manager import SessionManager
+
+QUESTION = "What does the leave policy say about carrying over unused days"
+ANSWER = (
+    "According to the leave policy, employees may carry over up to ten unused "
+    "days of earned leave into the next calendar year. Carried-over days must "
+    "be used by the end of March, after which they lapse unless your manager "
+    "approves an exception in writing. Sick leave cannot be carried over. "
+) * 2
+
+
+class LegacySessionManager:
+    """The previous storage: one nested dict per message"""
+
+    def __init__(self):
+        self.sessions: Dict[str, List[dict]] = {}
+
+    def get_session(self, session_id):
+        return self.sessions.get(session_id)
+
+    def ensure_session(self, session_id):
+        if session_id not in self.sessions:
+            self.sessions[session_id] = []
+
+    def add_message(self, session_id, message):
+        self.sessions.setdefault(session_id, []).append(message)
+
+
+def legacy_convert_to_azure_format(messages):
+    azure_messages = []
+    for msg in messages:
+        if isinstance(msg.get("content"), list):
+            text_content = " ".join(
+                [
+                    item.get("text", "")
+                    for item in msg["content"]
+                    if item.get("type") == "text"
+                ]
+            )
+            azure_messages.append({"role": msg["role"], "content": text_content})
+        else:
+            azure_messages.append(msg)
+    return azure_messages
+
+
+def run_legacy(sessions, turns):
+    manager = LegacySessionManager()
+    for turn in range(turns):
+        for session in range(sessions):
+            session_id = f"session-{session}"
+            manager.ensure_session(session_id)
+            messages = legacy_convert_to_azure_format(manager.get_session(session_id))
+            assert len(messages) == 2 * turn
+            for role, text in (
+                ("user", f"{QUESTION} {session}-{turn}?"),
+                ("assistant", f"{ANSWER}{session}-{turn}"),
+            ):
+                manager.add_message(
+                    session_id, {"role": role, "content": [{"type": "text", "text": text}]}
+                )
+    return manager
+
+
+def run_compact(sessions, turns):
+    manager = SessionManager()
+    for turn in range(turns):
+        for session in range(sessions):
+            session_id = f"session-{session}"
+            manager.ensure_session(session_id)
+            messages = list(manager.get_azure_messages(session_id))
+            assert len(messages) == 2 * turn
+            manager.add_turn(session_id, "user", f"{QUESTION} {session}-{turn}?")
+            manager.add_turn(session_id, "assistant", f"{ANSWER}{session}-{turn}")
+    return manager
+
+
+def measure(run, sessions, turns):
+    gc.collect()
+    start = time.perf_counter()
+    manager = run(sessions, turns)
+    elapsed = time.perf_counter() - start
+    del manager
+
+    # Memory in a separate pass; tracing slows allocation down
+    gc.collect()
+    tracemalloc.start()
+    manager = run(sessions, turns)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, current, manager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=10_000)
+    parser.add_argument("--turns", type=int, default=50)
+    args = parser.parse_args()
+
+    requests = args.sessions * args.turns
+    text_mib = requests * (len(QUESTION) + len(ANSWER) + 24) / 2**20
+    print(
+        f"{args.sessions} sessions x {args.turns} turns = {requests} requests, "
+        f"{text_mib:.0f} MiB of message text"
+    )
+    for label, run in (("dict-per-message", run_legacy), ("SessionManager", run_compact)):
+        elapsed, memory, manager = measure(run, args.sessions, args.turns)
+        line = (
+            f"{label:<17} {elapsed:7.2f} s  {elapsed / requests * 1e6:7.1f} us/request  "
+            f"{memory / 2**20:8.1f} MiB traced"
+        )
+        if isinstance(manager, SessionManager):
+            line += f"  (estimated {manager.stats()['estimated_bytes'] / 2**20:.1f} MiB)"
+        print(line)
+        del manager
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Compare fixed and structured chunking on a fixed set of HR questions.
+
+Indexes the folder once per CHUNKING_MODE with the configured embeddings
+deployment, then builds the /chat context for every question in
+eval_questions.json. For each mode it reports the estimated context tokens
+(about 4 characters per token) and context recall: the share of questions
+whose expected phrases all appear in the context (compared case-insensitively
+and ignoring whitespace, since PDF extraction splits words).
+
+With --with-llm each context is also sent to the chat deployment, and the
+prompt tokens reported by Azure, completion latency and answer recall (the
+expected phrases found in the answer; a strict proxy, as answers paraphrase)
+are added.
+
+Run from the HR_Chatbot folder:
+    python -m app.scripts.evaluate_retrieval
+    python -m app.scripts.evaluate_retrieval "HR Policies" --with-llm
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import time
+from pathlib import Path
+
+from app.core.config import settings
+from app.services.embeddings import EmbeddingsService
+from app.services.structured_chunking import estimate_tokens
+from app.services.vector_store import VectorStoreService
+
+APP_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_FOLDER = APP_DIR.parent / "HR Policies"
+QUESTIONS_FILE = Path(__file__).with_name("eval_questions.json")
+MODES = ("fixed", "structured")
+
+
+def normalize(text: str) -> str:
+    return re.sub(r"\s+", "", text).lower()
+
+
+def contains_all(text: str, phrases) -> bool:
+    text = normalize(text)
+    return all(normalize(phrase) in text for phrase in phrases)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def complete(openai_service, context: str, question: str):
+    # Same prompt shape as /chat for a first turn
+    messages = [
+        {
+            "role": "system",
+            "content": f"Use the following context to answer the user's question:\n\n{context}",
+        },
+        {"role": "user", "content": question},
+    ]
+    start = time.perf_counter()
+    response = openai_service.client.chat.completions.create(
+        model=settings.AZURE_OPENAI_DEPLOYMENT_NAME,
+        messages=messages,
+        max_completion_tokens=settings.STREAM_MAX_COMPLETION_TOKENS,
+    )
+    elapsed = time.perf_counter() - start
+    return response.choices[0].message.content or "", response.usage, elapsed
+
+
+async def evaluate(mode, folder, questions, embeddings_service, openai_service):
+    settings.CHUNKING_MODE = mode
+    service = VectorStoreService(embeddings_service)
+    service.ingest_directory(str(folder))
+
+    result = {
+        "mode": mode,
+        "chunks": service.vector_store.index.ntotal,
+        "context_tokens": [],
+        "context_hits": 0,
+        "misses": [],
+        "prompt_tokens": [],
+        "latencies": [],
+        "answer_hits": 0,
+    }
+    for item in questions:
+        context = await service.retrieve_context(item["question"])
+        result["context_tokens"].append(estimate_tokens(context))
+        if contains_all(context, item["expected"]):
+            result["context_hits"] += 1
+        else:
+            result["misses"].append(item["question"])
+
+        if openai_service is not None:
+            answer, usage, elapsed = await asyncio.to_thread(
+                complete, openai_service, context, item["question"]
+            )
+            result["prompt_tokens"].append(usage.prompt_tokens)
+            result["latencies"].append(elapsed)
+            if contains_all(answer, item["expected"]):
+                result["answer_hits"] += 1
+    return result
+
+
+def report(result, total):
+    tokens = result["context_tokens"]
+    print(
+        f"{result['mode']:<11} {result['chunks']:6d} chunks  "
+        f"context tokens mean {statistics.mean(tokens):6.0f} "
+        f"p95 {percentile(tokens, 0.95):6d}  "
+        f"context recall {result['context_hits']}/{total}"
+    )
+    if result["latencies"]:
+        latencies = result["latencies"]
+        print(
+            f"{'':<11} prompt tokens mean {statistics.mean(result['prompt_tokens']):6.0f}  "
+            f"latency mean {statistics.mean(latencies):5.2f} s "
+            f"p95 {percentile(latencies, 0.95):5.2f} s  "
+            f"answer recall {result['answer_hits']}/{total}"
+        )
+    for question in result["misses"]:
+        print(f"{'':<11} missed: {question}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("folder", nargs="?", default=str(DEFAULT_FOLDER))
+    parser.add_argument("--questions", default=str(QUESTIONS_FILE))
+    parser.add_argument("--with-llm", action="store_true", help="Also time completions")
+    args = parser.parse_args()
+
+    questions = json.loads(Path(args.questions).read_text(encoding="utf-8"))
+    embeddings_service = EmbeddingsService()
+    openai_service = None
+    if args.with_llm:
+        from app.services.azure_openai import AzureOpenAIService
+
+        openai_service = AzureOpenAIService()
+
+    results = [
+        await evaluate(mode, args.folder, questions, embeddings_service, openai_service)
+        for mode in MODES
+    ]
+    print(
+        f"\n{len(questions)} questions, budget {settings.CONTEXT_TOKEN_BUDGET} tokens, "
+        f"top {settings.RETRIEVAL_TOP_K} children, "
+        f"{settings.CONTEXT_EXPAND_PARENTS} parents expanded"
+    )
+    for result in results:
+        report(result, len(questions))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,188 @@
+"""
+Load test query embeddings with and without micro-batching.
+
+Simulates many concurrent chat requests embedding their questions against a
+local fake Azure OpenAI embeddings endpoint that charges a fixed latency per
+request and answers 429 above a requests-per-second limit, like a
+rate-limited deployment.
+
+Run from the HR_Chatbot folder:
+    python -m app.scripts.load_test_embeddings --clients 200 --queries 5
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+DIMENSIONS = 1536
+
+QUESTIONS = [
+    "What is the leave policy?",
+    "How many sick days do I get?",
+    "What is the notice period?",
+    "How do I apply for paternity leave?",
+    "What are the working hours?",
+    "Is there a service award policy?",
+    "What does the health card cover?",
+    "How do I report bribery?",
+]
+
+
+class FakeEmbeddingsHandler(BaseHTTPRequestHandler):
+    """Minimal stand-in for POST /openai/deployments/{name}/embeddings"""
+
+    request_latency = 0.05
+    max_requests_per_second = 50
+    request_count = 0
+    rate_limited = 0
+    window_start = 0.0
+    window_count = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+
+        cls = FakeEmbeddingsHandler
+        with cls.lock:
+            cls.request_count += 1
+            now = time.monotonic()
+            if now - cls.window_start >= 1:
+                cls.window_start, cls.window_count = now, 0
+            cls.window_count += 1
+            limited = cls.window_count > cls.max_requests_per_second
+            if limited:
+                cls.rate_limited += 1
+
+        if limited:
+            self._send(429, {"error": {"code": "429", "message": "Rate limited"}}, 1)
+            return
+
+        time.sleep(self.request_latency)
+        data = []
+        for index, text in enumerate(texts):
+            rng = random.Random(text)
+            vector = [rng.random() for _ in range(DIMENSIONS)]
+            if body.get("encoding_format") == "base64":
+                packed = struct.pack(f"<{DIMENSIONS}f", *vector)
+                embedding = base64.b64encode(packed).decode("ascii")
+            else:
+                embedding = vector
+            data.append({"object": "embedding", "index": index, "embedding": embedding})
+        self._send(
+            200,
+            {
+                "object": "list",
+                "data": data,
+                "model": "fake",
+                "usage": {"prompt_tokens": 0, "total_tokens": 0},
+            },
+        )
+
+    def _send(self, status, payload, retry_after=None):
+        encoded = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        if retry_after is not None:
+            self.send_header("Retry-After", str(retry_after))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, format, *args):
+        pass
+
+
+async def _client(service, queries, latencies, errors):
+    for _ in range(queries):
+        # Half canned questions, half unique ones
+        if random.random() < 0.5:
+            question = random.choice(QUESTIONS)
+        else:
+            question = f"Question {random.random()} about policy"
+        start = time.perf_counter()
+        try:
+            await service.get_query_embedding(question)
+            latencies.append((time.perf_counter() - start) * 1000)
+        except Exception:
+            errors.append(1)
+
+
+async def _run(service, clients, queries):
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(_client(service, queries, latencies, errors) for _ in range(clients))
+    )
+    return time.perf_counter() - start, latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=5, help="Per client")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--rps-limit", type=int, default=50)
+    parser.add_argument("--window-ms", type=float, default=10)
+    parser.add_argument("--max-batch", type=int, default=64)
+    args = parser.parse_args()
+
+    FakeEmbeddingsHandler.request_latency = args.latency_ms / 1000
+    FakeEmbeddingsHandler.max_requests_per_second = args.rps_limit
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeEmbeddingsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # Settings are read at import time, so point them at the fake endpoint first
+    os.environ.update(
+        {
+            "AZURE_OPENAI_ENDPOINT": f"http://127.0.0.1:{server.server_port}",
+            "AZURE_OPENAI_API_KEY": "fake",
+            "AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME": "fake-embeddings",
+        }
+    )
+    from app.services.embedding_batcher import EmbeddingMicroBatcher
+    from app.services.embeddings import EmbeddingsService
+
+    service = EmbeddingsService()
+    print(
+        f"{args.clients} clients x {args.queries} queries, "
+        f"{args.latency_ms:.0f}ms per request, 429 above {args.rps_limit} req/s"
+    )
+
+    for label, batcher in (
+        ("unbatched", None),
+        (
+            f"batched ({args.window_ms:.0f}ms / {args.max_batch})",
+            EmbeddingMicroBatcher(service, args.window_ms, args.max_batch),
+        ),
+    ):
+        service.batcher = batcher
+        FakeEmbeddingsHandler.request_count = 0
+        FakeEmbeddingsHandler.rate_limited = 0
+        FakeEmbeddingsHandler.window_count = 0
+        elapsed, latencies, errors = asyncio.run(
+            _run(service, args.clients, args.queries)
+        )
+        print(
+            f"{label:<22} {elapsed:6.2f}s  "
+            f"api requests {FakeEmbeddingsHandler.request_count:>5}  "
+            f"429s {FakeEmbeddingsHandler.rate_limited:>4}  "
+            f"errors {len(errors):>3}  "
+            f"p50 {np.percentile(latencies, 50):7.1f}ms  "
+            f"p99 {np.percentile(latencies, 99):7.1f}ms"
+        )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
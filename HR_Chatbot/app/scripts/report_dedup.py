@@ -0,0 +1,65 @@
+"""
+Report how many near-duplicate chunks SimHash deduplication removes.
+
+Splits every PDF in the given folders exactly as ingestion does, then counts
+the chunks that would be skipped, the embedding calls saved and the index
+bytes saved (float32 vectors + chunk text). No embedding calls are made.
+
+Run from the HR_Chatbot folder:
+    python -m app.scripts.report_dedup
+    python -m app.scripts.report_dedup "HR Policies" --max-distance 2
+"""
+
+import argparse
+from pathlib import Path
+
+from langchain_community.document_loaders import PyPDFLoader
+
+from app.services.dedup import find_near_duplicates
+from app.services.vector_store import VectorStoreService
+
+APP_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_FOLDERS = [APP_DIR.parent / "HR Policies", APP_DIR / "HR Policies Index"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("folders", nargs="*", default=[str(f) for f in DEFAULT_FOLDERS])
+    parser.add_argument("--max-distance", type=int, default=3, help="Hamming bits")
+    parser.add_argument("--dim", type=int, default=1536, help="Embedding dimensions")
+    args = parser.parse_args()
+
+    # Same splitter as ingestion; no embeddings service is needed for splitting
+    text_splitter = VectorStoreService(None).text_splitter
+    chunks = []
+    for folder in args.folders:
+        for pdf in sorted(Path(folder).glob("*.pdf")):
+            chunks.extend(text_splitter.split_documents(PyPDFLoader(str(pdf)).load()))
+
+    texts = [chunk.page_content for chunk in chunks]
+    canonical_of = find_near_duplicates(texts, max_distance=args.max_distance)
+    duplicates = [i for i, canonical in enumerate(canonical_of) if canonical != i]
+
+    vector_bytes = len(duplicates) * args.dim * 4
+    text_bytes = sum(len(texts[i].encode("utf-8")) for i in duplicates)
+    print(f"Chunks:                 {len(chunks)}")
+    print(f"Canonical chunks:       {len(chunks) - len(duplicates)}")
+    print(f"Embedding calls saved:  {len(duplicates)}")
+    print(
+        f"Index bytes saved:      {vector_bytes + text_bytes:,} "
+        f"({vector_bytes:,} vectors + {text_bytes:,} text)"
+    )
+
+    sources = {}
+    for i in duplicates:
+        pair = (
+            Path(chunks[i].metadata["source"]).name,
+            Path(chunks[canonical_of[i]].metadata["source"]).name,
+        )
+        sources[pair] = sources.get(pair, 0) + 1
+    for (duplicate, canonical), count in sorted(sources.items(), key=lambda x: -x[1]):
+        print(f"  {count:4d} chunk(s) of {duplicate} duplicate {canonical}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+
+def stream_frames(answer: str, words_per_frame: int = 8) -> Iterator[str]:
+    """Split a cached answer into word groups that replay like a model stream"""
+    tokens = re.findall(r"\S+\s*|\s+", answer)
+    for start in range(0, len(tokens), words_per_frame):
+        yield "".join(tokens[start : start + words_per_frame])
+
+
+class SemanticAnswerCache:
+    """
+    Answers to first-turn questions, looked up by query embedding similarity.
+
+    A question hits when the cosine similarity of its embedding to a cached
+    question is at least ``threshold``. Entries belong to one index key
+    (version + revision of the served index); when the key changes the
+    whole cache is dropped, since answers may cite superseded policies.
+    """
+
+    def __init__(
+        self, max_entries: int = 1000, threshold: float = 0.95, ttl_seconds: float = 86400
+    ):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+
+        # entry id -> {"question", "answer", "created_at", "hits"}, in LRU order
+        self.entries: "OrderedDict[int, dict]" = OrderedDict()
+        # Normalized query embeddings, one row per entry in self.entries
+        self._vectors: dict = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_ids: List[int] = []
+
+        self.index_key = None
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_index_key(self, index_key) -> None:
+        if index_key != self.index_key:
+            if self.entries:
+                self.invalidations += 1
+            self._clear()
+            self.index_key = index_key
+
+    def _clear(self) -> None:
+        self.entries.clear()
+        self._vectors.clear()
+        self._matrix = None
+
+    def _remove(self, entry_id: int) -> None:
+        self.entries.pop(entry_id, None)
+        self._vectors.pop(entry_id, None)
+        self._matrix = None
+
+    def get(self, embedding: List[float], index_key) -> Optional[str]:
+        """Return the cached answer for a similar question, or None"""
+        with self._lock:
+            self._check_index_key(index_key)
+            if not self.entries:
+                self.misses += 1
+                return None
+
+            if self._matrix is None:
+                self._matrix_ids = list(self._vectors)
+                self._matrix = np.stack([self._vectors[i] for i in self._matrix_ids])
+            scores = self._matrix @ self._normalize(embedding)
+            best = int(np.argmax(scores))
+            entry_id = self._matrix_ids[best]
+            entry = self.entries[entry_id]
+
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+            if time.time() - entry["created_at"] > self.ttl_seconds:
+                self._remove(entry_id)
+                self.misses += 1
+                return None
+
+            entry["hits"] += 1
+            self.entries.move_to_end(entry_id)
+            self.hits += 1
+            return entry["answer"]
+
+    def put(self, question: str, embedding: List[float], answer: str, index_key) -> None:
+        """Cache an answer produced against ``index_key``"""
+        if not answer.strip():
+            return
+        with self._lock:
+            # The index changed while the answer was generated; do not keep it
+            if index_key != self.index_key:
+                return
+            entry_id = self._next_id
+            self._next_id += 1
+            self.entries[entry_id] = {
+                "question": question,
+                "answer": answer,
+                "created_at": time.time(),
+                "hits": 0,
+            }
+            self._vectors[entry_id] = self._normalize(embedding)
+            self._matrix = None
+            while len(self.entries) > self.max_entries:
+                self._remove(next(iter(self.entries)))
+
+    def flush(self) -> int:
+        """Drop every entry; returns how many were removed"""
+        with self._lock:
+            removed = len(self.entries)
+            self._clear()
+            return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "ttl_seconds": self.ttl_seconds,
+                "index_key": list(self.index_key) if self.index_key else None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+    def list_entries(self) -> List[dict]:
+        """Cached questions, most recently used first"""
+        now = time.time()
+        with self._lock:
+            return [
+                {
+                    "question": entry["question"],
+                    "hits": entry["hits"],
+                    "age_seconds": round(now - entry["created_at"], 1),
+                    "answer_chars": len(entry["answer"]),
+                }
+                for entry in reversed(self.entries.values())
+            ]
@@ -1,8 +1,9 @@
-from typing import Iterator
+from typing import AsyncIterator, Iterator
 
-from openai import AzureOpenAI
+from openai import AsyncAzureOpenAI, AzureOpenAI
 
 from ..core.config import settings
+from .metrics import metrics
 
 
 class AzureOpenAIService:
@@ -13,6 +14,12 @@ class AzureOpenAIService:
             api_key=settings.AZURE_OPENAI_API_KEY,
             api_version=settings.AZURE_OPENAI_API_VERSION,
         )
+        # Used by the streaming endpoint so a disconnect can close the stream
+        self.async_client = AsyncAzureOpenAI(
+            azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
+            api_key=settings.AZURE_OPENAI_API_KEY,
+            api_version=settings.AZURE_OPENAI_API_VERSION,
+        )
 
     def get_completion(
         self,
@@ -27,6 +34,7 @@ class AzureOpenAIService:
             max_completion_tokens=max_completion_tokens,
             # temperature=temperature,
         )
+        metrics.record_usage(response.usage)
         return response.choices[0].message.content
 
     def stream_completion(
@@ -49,3 +57,30 @@ class AzureOpenAIService:
             if chunk.choices:
                 if chunk.choices[0].delta.content is not None:
                     yield chunk.choices[0].delta.content
+
+    async def astream_completion(
+        self,
+        messages: list,
+        temperature: float = 0.0,
+        max_completion_tokens: int = 1600,
+    ) -> AsyncIterator[str]:
+        """
+        Async version of stream_completion.
+
+        Closing the generator (aclose or cancellation) closes the upstream
+        response, so Azure stops generating tokens nobody will read.
+        """
+        completion = await self.async_client.chat.completions.create(
+            model=settings.AZURE_OPENAI_DEPLOYMENT_NAME,
+            messages=messages,
+            max_completion_tokens=max_completion_tokens,
+            # temperature=temperature,
+            stream=True,
+        )
+        try:
+            async for chunk in completion:
+                if chunk.choices:
+                    if chunk.choices[0].delta.content is not None:
+                        yield chunk.choices[0].delta.content
+        finally:
+            await completion.close()
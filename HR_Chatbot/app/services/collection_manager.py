@@ -0,0 +1,267 @@
+import asyncio
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.embeddings import EmbeddingsService
+from app.services.index_artifact import latest_version, publish_artifact, publish_lock
+from app.services.mmap_store import MmapVectorStore
+from app.services.vector_store import VectorStoreService
+
+DEFAULT_COLLECTION = "default"
+
+# Collection ids become directory names, so keep them to a safe alphabet
+_COLLECTION_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class CollectionNotFound(Exception):
+    pass
+
+
+def validate_collection_id(collection_id: str) -> str:
+    if not _COLLECTION_ID.match(collection_id):
+        raise ValueError("collection_id must be 1-64 letters, digits, '-' or '_'")
+    return collection_id
+
+
+def estimate_bytes(service: VectorStoreService) -> int:
+    """Approximate memory of a loaded collection: vectors, chunk and section text"""
+    vector_store = service.vector_store
+    if vector_store is None:
+        return 0
+    index = vector_store.index
+    size = index.ntotal * index.d * 4
+    size += sum(len(section["text"]) for section in service.sections.values())
+    if isinstance(vector_store, MmapVectorStore):
+        return size + int(vector_store.offsets[-1])
+    return size + sum(
+        len(document.page_content.encode("utf-8"))
+        for document in vector_store.docstore._dict.values()
+    )
+
+
+@dataclass
+class Collection:
+    collection_id: str
+    service: VectorStoreService
+    answer_cache: Optional[SemanticAnswerCache]
+    size_bytes: int = 0
+    last_used: float = field(default_factory=time.time)
+    # Serializes uploads so artifact versions are published in ingest order
+    ingest_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+class CollectionManager:
+    """
+    Collection-scoped indexes, loaded from disk on first use.
+
+    Every collection is a published artifact root under ``root/<collection_id>``
+    (see app/build_index.py --collection). Loaded collections are kept in an
+    LRU whose estimated total size is bounded by ``max_bytes``; the least
+    recently used ones are dropped when a load pushes it over. Requests that
+    already hold an evicted collection finish on it. Pinned collections (the
+    default one) never count against the budget and are never evicted.
+    """
+
+    def __init__(
+        self,
+        embeddings_service: EmbeddingsService,
+        root: Path,
+        max_bytes: int,
+        answer_cache_factory: Callable[[], Optional[SemanticAnswerCache]] = lambda: None,
+    ):
+        self.embeddings_service = embeddings_service
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.answer_cache_factory = answer_cache_factory
+
+        self.pinned: Dict[str, Collection] = {}
+        self.loaded: "OrderedDict[str, Collection]" = OrderedDict()
+        # collection id -> (lock, requests holding or waiting for it)
+        self._load_locks: Dict[str, Tuple[asyncio.Lock, int]] = {}
+
+        self.loads = 0
+        self.evictions = 0
+
+    def pin(self, collection: Collection) -> None:
+        self.pinned[collection.collection_id] = collection
+
+    def collections(self) -> List[Collection]:
+        """Collections currently in memory, pinned ones first"""
+        return [*self.pinned.values(), *self.loaded.values()]
+
+    @property
+    def loaded_bytes(self) -> int:
+        return sum(collection.size_bytes for collection in self.loaded.values())
+
+    async def get(self, collection_id: str, create: bool = False) -> Collection:
+        """
+        Return a collection, loading it from disk if it is not in memory.
+
+        Raises CollectionNotFound when it has no published artifact, unless
+        ``create`` is set (uploads start new collections).
+        """
+        if collection_id in self.pinned:
+            return self.pinned[collection_id]
+        validate_collection_id(collection_id)
+
+        collection = self._touch(collection_id)
+        if collection is not None:
+            return collection
+
+        # One lock per collection id being loaded, dropped when the last
+        # request waiting on it is done (ids of 404s included)
+        lock, waiters = self._load_locks.get(collection_id, (asyncio.Lock(), 0))
+        self._load_locks[collection_id] = (lock, waiters + 1)
+        try:
+            async with lock:
+                return await self._load(collection_id, create)
+        finally:
+            lock, waiters = self._load_locks[collection_id]
+            if waiters == 1:
+                del self._load_locks[collection_id]
+            else:
+                self._load_locks[collection_id] = (lock, waiters - 1)
+
+    async def _load(self, collection_id: str, create: bool) -> Collection:
+        # Another request may have loaded it while we waited
+        collection = self._touch(collection_id)
+        if collection is not None:
+            return collection
+
+        artifact_root = self.root / collection_id
+        service = VectorStoreService(self.embeddings_service, artifact_root=artifact_root)
+        collection = Collection(
+            collection_id=collection_id,
+            service=service,
+            answer_cache=self.answer_cache_factory(),
+        )
+        if latest_version(artifact_root) is None:
+            if not create:
+                raise CollectionNotFound(collection_id)
+            # A new collection is only registered once its first upload has
+            # been published (see ingest_pdf), so a failed one leaves nothing
+            return collection
+
+        await asyncio.to_thread(service.load_latest)
+        collection.size_bytes = estimate_bytes(service)
+        self.loads += 1
+        self._register(collection)
+        return collection
+
+    def _register(self, collection: Collection) -> None:
+        self.loaded[collection.collection_id] = collection
+        self.loaded.move_to_end(collection.collection_id)
+        self._evict(keep=collection.collection_id)
+
+    def _touch(self, collection_id: str) -> Optional[Collection]:
+        collection = self.loaded.get(collection_id)
+        if collection is not None:
+            self.loaded.move_to_end(collection_id)
+            collection.last_used = time.time()
+        return collection
+
+    def _evict(self, keep: str) -> None:
+        while self.loaded_bytes > self.max_bytes and len(self.loaded) > 1:
+            collection_id = next(iter(self.loaded))
+            if collection_id == keep:
+                break
+            evicted = self.loaded.pop(collection_id)
+            self.evictions += 1
+            print(
+                f"Evicted collection {collection_id} "
+                f"({evicted.size_bytes / 2**20:.1f} MiB) from memory"
+            )
+
+    async def ingest_pdf(self, collection: Collection, pdf_path: str) -> None:
+        """
+        Add a PDF to a collection and persist it as a new artifact version.
+
+        Persisting means an evicted collection reloads with its uploads, and
+        a new collection is registered once its first upload is published.
+        The pinned default collection keeps its in-memory-only behaviour.
+        Parsing, embedding and publishing run in a worker thread so other
+        chats keep being served meanwhile.
+        """
+        await asyncio.to_thread(self._ingest_and_publish, collection, pdf_path)
+        if collection.collection_id in self.pinned:
+            return
+        registered = self._touch(collection.collection_id)
+        if registered is None:
+            self._register(collection)
+        elif registered is not collection:
+            # Another upload started the same new collection and was
+            # registered first; it catches up with what this one published
+            if await asyncio.to_thread(registered.service.load_latest):
+                registered.size_bytes = estimate_bytes(registered.service)
+            self._evict(keep=collection.collection_id)
+
+    def _ingest_and_publish(self, collection: Collection, pdf_path: str) -> None:
+        service = collection.service
+        if collection.collection_id in self.pinned:
+            with collection.ingest_lock:
+                service.ingest_pdf(pdf_path)
+            return
+
+        # Every worker process ingests into its own copy; under the publish
+        # lock, first catch up with versions other workers published, so the
+        # new version contains their uploads too
+        with collection.ingest_lock, publish_lock(service.artifact_root):
+            service.load_latest()
+            service.ingest_pdf(pdf_path)
+            service.version = publish_artifact(
+                service.vector_store,
+                service.artifact_root,
+                {
+                    "collection_id": collection.collection_id,
+                    "chunk_count": service.vector_store.index.ntotal,
+                },
+                sections=service.sections,
+            )
+            collection.size_bytes = estimate_bytes(service)
+
+    async def refresh(self) -> None:
+        """Hot-swap loaded collections whose artifact has a newer version"""
+        for collection in list(self.loaded.values()):
+            if await asyncio.to_thread(collection.service.load_latest):
+                collection.size_bytes = estimate_bytes(collection.service)
+        if self.loaded:
+            self._evict(keep=next(reversed(self.loaded)))
+
+    def stats(self) -> dict:
+        return {
+            "max_bytes": self.max_bytes,
+            "loaded_bytes": self.loaded_bytes,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "collections": [
+                {
+                    "collection_id": collection.collection_id,
+                    "pinned": collection.collection_id in self.pinned,
+                    "version": collection.service.version,
+                    "chunk_count": (
+                        collection.service.vector_store.index.ntotal
+                        if collection.service.vector_store
+                        else 0
+                    ),
+                    "size_bytes": collection.size_bytes,
+                    "idle_seconds": round(time.time() - collection.last_used, 1),
+                }
+                for collection in [*self.pinned.values(), *reversed(self.loaded.values())]
+            ],
+        }
+
+    def available(self) -> List[str]:
+        """Collection ids with a published artifact on disk"""
+        if not self.root.exists():
+            return []
+        return sorted(
+            path.name
+            for path in self.root.iterdir()
+            if path.is_dir() and latest_version(path) is not None
+        )
@@ -0,0 +1,79 @@
+import hashlib
+import re
+from collections import defaultdict
+from typing import List
+
+import numpy as np
+
+SIMHASH_BITS = 64
+# Bands for candidate lookup; two fingerprints within BANDS - 1 bits of each
+# other are guaranteed to share at least one band exactly
+BANDS = 4
+BAND_BITS = SIMHASH_BITS // BANDS
+
+_WORD = re.compile(r"\w+")
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """64-bit SimHash over word shingles (case and whitespace insensitive)"""
+    words = _WORD.findall(text.lower())
+    if len(words) < shingle_size:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [
+            " ".join(words[i : i + shingle_size])
+            for i in range(len(words) - shingle_size + 1)
+        ]
+
+    hashes = np.array(
+        [
+            int.from_bytes(
+                hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big"
+            )
+            for shingle in shingles
+        ],
+        dtype=">u8",
+    )
+    # One row of 64 bits per shingle; each output bit is the majority vote
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1)
+    majority = bits.sum(axis=0) * 2 > len(shingles)
+    return int.from_bytes(np.packbits(majority).tobytes(), "big")
+
+
+def find_near_duplicates(texts: List[str], max_distance: int = 3) -> List[int]:
+    """
+    Map every text to the index of its canonical (first seen) near-duplicate.
+
+    Texts whose SimHash fingerprints differ in at most ``max_distance`` bits
+    are treated as duplicates. Returns a list where ``result[i] == i`` for
+    canonical texts.
+    """
+    if max_distance >= BANDS:
+        raise ValueError(f"max_distance must be below {BANDS}")
+
+    fingerprints = [simhash(text) for text in texts]
+    buckets = defaultdict(list)
+    canonical_of = []
+    mask = (1 << BAND_BITS) - 1
+
+    for index, fingerprint in enumerate(fingerprints):
+        bands = [
+            (band, (fingerprint >> (band * BAND_BITS)) & mask) for band in range(BANDS)
+        ]
+        match = next(
+            (
+                candidate
+                for key in bands
+                for candidate in buckets[key]
+                if bin(fingerprints[candidate] ^ fingerprint).count("1") <= max_distance
+            ),
+            None,
+        )
+        if match is not None:
+            canonical_of.append(match)
+            continue
+
+        canonical_of.append(index)
+        for key in bands:
+            buckets[key].append(index)
+    return canonical_of
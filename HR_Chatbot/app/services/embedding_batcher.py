@@ -0,0 +1,77 @@
+import asyncio
+from typing import Dict, List, Optional, Set, Tuple
+
+
+class EmbeddingMicroBatcher:
+    """
+    Coalesces query embeddings from concurrent requests into batched API calls.
+
+    Callers await embed(); their texts are collected for up to ``window_ms``
+    (or until ``max_batch`` texts are waiting) and sent in one embeddings
+    request, and each caller gets its own vector back.
+    """
+
+    def __init__(self, embeddings_service, window_ms: float, max_batch: int):
+        self.embeddings_service = embeddings_service
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Keeps running batches referenced until they finish
+        self._batches: Set[asyncio.Task] = set()
+
+        self.requests = 0
+        self.api_calls = 0
+        self.largest_batch = 0
+
+    async def embed(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        self.requests += 1
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]]):
+        # Identical questions in the same window share one input
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        self.api_calls += 1
+        self.largest_batch = max(self.largest_batch, len(texts))
+        try:
+            embeddings = await asyncio.to_thread(
+                self.embeddings_service.get_embeddings_batch, texts
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_text: Dict[str, List[float]] = dict(zip(texts, embeddings))
+        for text, future in batch:
+            # The caller may have been cancelled (e.g. client disconnected)
+            if not future.done():
+                future.set_result(by_text[text])
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "api_calls": self.api_calls,
+            "largest_batch": self.largest_batch,
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+        }
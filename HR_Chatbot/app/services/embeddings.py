@@ -1,6 +1,10 @@
+import asyncio
+from typing import List
+
 from openai import AzureOpenAI
 
 from ..core.config import settings
+from .embedding_batcher import EmbeddingMicroBatcher
 
 
 class EmbeddingsService:
@@ -11,9 +15,33 @@ class EmbeddingsService:
             api_key=settings.AZURE_OPENAI_API_KEY,
             api_version="2023-05-15",
         )
+        # Query embeddings from concurrent requests share one API call
+        self.batcher = (
+            EmbeddingMicroBatcher(
+                self,
+                window_ms=settings.EMBEDDING_BATCH_WINDOW_MS,
+                max_batch=settings.EMBEDDING_BATCH_MAX_SIZE,
+            )
+            if settings.EMBEDDING_BATCH_WINDOW_MS > 0
+            else None
+        )
 
     def get_embeddings(self, text: str):
         response = self.client.embeddings.create(
             model=settings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME, input=text
         )
         return response.data[0].embedding
+
+    def get_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+        response = self.client.embeddings.create(
+            model=settings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME, input=texts
+        )
+        # The API may return items out of order; index is authoritative
+        return [
+            item.embedding for item in sorted(response.data, key=lambda item: item.index)
+        ]
+
+    async def get_query_embedding(self, text: str) -> List[float]:
+        if self.batcher is None:
+            return await asyncio.to_thread(self.get_embeddings, text)
+        return await self.batcher.embed(text)
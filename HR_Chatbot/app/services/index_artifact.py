@@ -0,0 +1,174 @@
+import json
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from langchain_community.vectorstores import FAISS
+
+from app.services.mmap_store import MmapVectorStore, has_chunk_texts, write_chunk_texts
+
+# Holds the directory name of the newest complete version
+LATEST_POINTER = "LATEST"
+MANIFEST_FILE = "manifest.json"
+# Held (flock) by whichever worker process is updating and publishing the root
+PUBLISH_LOCK_FILE = ".publish.lock"
+# Parent sections of structured chunks (see app/services/structured_chunking.py)
+SECTIONS_FILE = "sections.json"
+# Temporary directories and pointer files older than this are left over from
+# interrupted publishes; younger ones may be a publish still in progress
+STALE_TMP_SECONDS = 3600
+_TMP_PREFIXES = (".tmp-", f".{LATEST_POINTER}.")
+
+
+@contextmanager
+def publish_lock(root: Path) -> Iterator[None]:
+    """
+    Exclusive lock on an artifact root across worker processes (and threads,
+    since each call opens the lock file anew).
+
+    Hold it from loading the latest version until the updated version is
+    published, so concurrent updates cannot overwrite each other. Without
+    fcntl (Windows) it does nothing.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    if fcntl is None:
+        yield
+        return
+    with open(root / PUBLISH_LOCK_FILE, "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _fsync_file(path: Path) -> None:
+    with open(path, "rb") as f:
+        os.fsync(f.fileno())
+
+
+def _fsync_dir(path: Path) -> None:
+    # Directory fsync makes renames durable on POSIX; Windows has no equivalent
+    if os.name != "nt":
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def publish_artifact(
+    vector_store: FAISS,
+    root: Path,
+    manifest: dict,
+    keep: int = 3,
+    sections: Optional[dict] = None,
+) -> str:
+    """
+    Write a new index version under ``root`` and atomically point LATEST at it.
+
+    The version is written to a temporary directory and renamed into place
+    before LATEST is replaced, so readers only ever see complete versions.
+    The ``keep`` newest versions are retained for rollback.
+
+    Returns:
+        The new version name
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+
+    version = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    tmp_dir = root / f".tmp-{version}"
+    vector_store.save_local(str(tmp_dir))
+    # Lets workers memory-map the texts instead of unpickling the docstore
+    write_chunk_texts(vector_store, tmp_dir)
+    if sections:
+        with open(tmp_dir / SECTIONS_FILE, "w", encoding="utf-8") as f:
+            json.dump(sections, f)
+    manifest = {**manifest, "version": version, "created_at": time.time()}
+    with open(tmp_dir / MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    # The files must be on disk before LATEST can point at them
+    for path in tmp_dir.iterdir():
+        _fsync_file(path)
+    _fsync_dir(tmp_dir)
+    os.replace(tmp_dir, root / version)
+    _fsync_dir(root)
+
+    tmp_pointer = root / f".{LATEST_POINTER}.{uuid.uuid4().hex[:8]}"
+    with open(tmp_pointer, "w", encoding="utf-8") as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_pointer, root / LATEST_POINTER)
+    _fsync_dir(root)
+
+    versions = sorted(
+        path for path in root.iterdir() if path.is_dir() and not path.name.startswith(".")
+    )
+    for old in versions[:-keep]:
+        shutil.rmtree(old, ignore_errors=True)
+    _remove_stale_tmp(root)
+    return version
+
+
+def _remove_stale_tmp(root: Path) -> None:
+    # Each .tmp-* directory is a full index copy, so they must not pile up
+    now = time.time()
+    for path in root.iterdir():
+        # The publish lock file must stay: another process may hold it
+        if not path.name.startswith(_TMP_PREFIXES):
+            continue
+        try:
+            if now - path.stat().st_mtime <= STALE_TMP_SECONDS:
+                continue
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                path.unlink()
+        except OSError:
+            pass
+
+
+def latest_version(root: Path) -> Optional[str]:
+    pointer = Path(root) / LATEST_POINTER
+    if not pointer.exists():
+        return None
+    return pointer.read_text(encoding="utf-8").strip() or None
+
+
+def load_artifact(
+    root: Path, version: str, use_mmap: bool = False
+) -> Tuple[Union[FAISS, MmapVectorStore], dict]:
+    version_dir = Path(root) / version
+    with open(version_dir / MANIFEST_FILE, encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    if use_mmap and has_chunk_texts(version_dir):
+        return MmapVectorStore(version_dir), manifest
+
+    # The pickle is written by publish_artifact (app/build_index.py), not by users
+    vector_store = FAISS.load_local(
+        str(version_dir), None, allow_dangerous_deserialization=True
+    )
+    return vector_store, manifest
+
+
+def load_sections(root: Path, version: str) -> dict:
+    """Parent sections stored with a version ({} for fixed-size chunking)"""
+    path = Path(root) / version / SECTIONS_FILE
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
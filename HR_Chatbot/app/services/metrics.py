@@ -0,0 +1,192 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Histogram bucket upper bounds in seconds, from sub-millisecond FAISS
+# searches to multi-second completions
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+# Counter families and the name of their one label
+COUNTER_LABELS = {
+    "tokens": "kind",
+    "answer_cache": "result",
+}
+
+METRIC_PREFIX = "hr_chatbot"
+
+
+class Histogram:
+    """Fixed-bucket histogram; observing is a bisect and two additions"""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        # One count per bucket plus the +Inf overflow
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestTimings:
+    """Stage durations of one timed request, reported in its Server-Timing header"""
+
+    __slots__ = ("path", "start", "stages")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.start = time.perf_counter()
+        self.stages: List[Tuple[str, float]] = []
+
+    def header(self, total: float) -> str:
+        entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages]
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+
+# Set by ServerTimingMiddleware for the request being handled; copied into
+# tasks the request starts, such as a StreamingResponse body
+_current_request: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "current_request", default=None
+)
+
+
+class Metrics:
+    """
+    Per-stage latency histograms and counters, rendered for Prometheus.
+
+    Stages are only timed inside requests wrapped by ServerTimingMiddleware;
+    each observation is also added to that request's Server-Timing header.
+    Histograms are keyed by (path, stage).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.counters: Dict[Tuple[str, str], int] = {}
+
+    def observe(self, stage: str, seconds: float, server_timing: bool = True) -> None:
+        timings = _current_request.get()
+        if timings is None:
+            return
+        if server_timing:
+            timings.stages.append((stage, seconds))
+        key = (timings.path, stage)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def since_request_start(self) -> Optional[float]:
+        """Seconds since the current timed request started (None outside one)"""
+        timings = _current_request.get()
+        return time.perf_counter() - timings.start if timings else None
+
+    def increment(self, name: str, label: str, amount: int = 1) -> None:
+        with self._lock:
+            key = (name, label)
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def record_usage(self, usage) -> None:
+        """Token counts from an Azure OpenAI completion's usage block"""
+        if usage is None:
+            return
+        self.increment("tokens", "prompt", usage.prompt_tokens or 0)
+        self.increment("tokens", "completion", usage.completion_tokens or 0)
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        with self._lock:
+            histograms = [
+                (key, list(h.counts), h.sum, h.count)
+                for key, h in sorted(self.histograms.items())
+            ]
+            counters = sorted(self.counters.items())
+
+        name = f"{METRIC_PREFIX}_stage_seconds"
+        lines = [
+            f"# HELP {name} Time spent per request stage",
+            f"# TYPE {name} histogram",
+        ]
+        for (path, stage), counts, total, count in histograms:
+            labels = f'path="{path}",stage="{stage}"'
+            cumulative = 0
+            for bound, bucket_count in zip(_bucket_labels(), counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {total:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {count}")
+
+        for family, label_name in COUNTER_LABELS.items():
+            name = f"{METRIC_PREFIX}_{family}_total"
+            lines.append(f"# TYPE {name} counter")
+            for (counter_family, label), value in counters:
+                if counter_family == family:
+                    lines.append(f'{name}{{{label_name}="{label}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+def _bucket_labels() -> Iterable[str]:
+    yield from (f"{bound:g}" for bound in LATENCY_BUCKETS)
+    yield "+Inf"
+
+
+class ServerTimingMiddleware:
+    """
+    Time requests to ``paths`` and add a Server-Timing header.
+
+    The header lists the stages that finished before the response started,
+    plus "total" (time to the response headers). For streamed responses the
+    headers go out before the completion, so time to first token and stream
+    duration are only in the histograms. Plain ASGI rather than
+    BaseHTTPMiddleware, so streamed bodies pass through untouched.
+    """
+
+    def __init__(self, app, paths: Iterable[str] = ()):
+        self.app = app
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings(scope["path"])
+        token = _current_request.set(timings)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total = time.perf_counter() - timings.start
+                metrics.observe("response_start", total, server_timing=False)
+                header = timings.header(total).encode("latin-1")
+                message = {
+                    **message,
+                    "headers": [*message.get("headers", []), (b"server-timing", header)],
+                }
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_request.reset(token)
+
+
+metrics = Metrics()
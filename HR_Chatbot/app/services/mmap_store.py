@@ -0,0 +1,135 @@
+import json
+import mmap
+from pathlib import Path
+from typing import List
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+# Written next to LangChain's index.faiss / index.pkl in every artifact version
+INDEX_FILE = "index.faiss"
+CHUNKS_FILE = "chunks.bin"
+OFFSETS_FILE = "chunk_offsets.npy"
+METADATA_FILE = "chunk_metadata.bin"
+METADATA_OFFSETS_FILE = "chunk_metadata_offsets.npy"
+
+# Zero-copy mmap of flat indexes needs IO_FLAG_MMAP_IFC (faiss >= 1.8); the
+# older IO_FLAG_MMAP only maps IVF lists and copies flat codes into memory
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | (
+    faiss.IO_FLAG_READ_ONLY
+)
+
+
+def _write_blob(directory: Path, blob_file: str, offsets_file: str, items) -> None:
+    offsets = [0]
+    with open(directory / blob_file, "wb") as f:
+        for encoded in items:
+            f.write(encoded)
+            offsets.append(offsets[-1] + len(encoded))
+    np.save(directory / offsets_file, np.asarray(offsets, dtype=np.int64))
+
+
+def _map_blob(path: Path):
+    with open(path, "rb") as f:
+        size = f.seek(0, 2)
+        # mmap cannot map an empty file
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+
+def write_chunk_texts(vector_store: FAISS, directory: Path) -> None:
+    """Store chunk texts and JSON metadata in FAISS position order as blobs + offsets"""
+    directory = Path(directory)
+    documents = [
+        vector_store.docstore.search(vector_store.index_to_docstore_id[position])
+        for position in range(vector_store.index.ntotal)
+    ]
+    _write_blob(
+        directory,
+        CHUNKS_FILE,
+        OFFSETS_FILE,
+        (document.page_content.encode("utf-8") for document in documents),
+    )
+    _write_blob(
+        directory,
+        METADATA_FILE,
+        METADATA_OFFSETS_FILE,
+        (json.dumps(document.metadata).encode("utf-8") for document in documents),
+    )
+
+
+def has_chunk_texts(directory: Path) -> bool:
+    return (Path(directory) / CHUNKS_FILE).exists() and (
+        Path(directory) / OFFSETS_FILE
+    ).exists()
+
+
+class MmapVectorStore:
+    """
+    Read-only vector store whose index and chunk texts are memory-mapped.
+
+    Every worker process that opens the same artifact shares one copy of it
+    in the OS page cache instead of holding a private in-memory copy.
+    """
+
+    def __init__(self, directory: Path):
+        directory = Path(directory)
+        self.index = faiss.read_index(str(directory / INDEX_FILE), MMAP_FLAGS)
+        self.offsets = np.load(directory / OFFSETS_FILE, mmap_mode="r")
+        self._blob = _map_blob(directory / CHUNKS_FILE)
+
+        # Artifacts published before chunk metadata was stored have none
+        self.metadata_offsets = None
+        self._metadata_blob = b""
+        if (directory / METADATA_OFFSETS_FILE).exists():
+            self.metadata_offsets = np.load(
+                directory / METADATA_OFFSETS_FILE, mmap_mode="r"
+            )
+            self._metadata_blob = _map_blob(directory / METADATA_FILE)
+
+    def text(self, position: int) -> str:
+        start, end = int(self.offsets[position]), int(self.offsets[position + 1])
+        return self._blob[start:end].decode("utf-8")
+
+    def metadata(self, position: int) -> dict:
+        if self.metadata_offsets is None:
+            return {}
+        start = int(self.metadata_offsets[position])
+        end = int(self.metadata_offsets[position + 1])
+        return json.loads(self._metadata_blob[start:end])
+
+    def document(self, position: int) -> Document:
+        return Document(
+            page_content=self.text(position), metadata=self.metadata(position)
+        )
+
+    def similarity_search_by_vector(
+        self, embedding: List[float], k: int = 4
+    ) -> List[Document]:
+        _, positions = self.index.search(np.asarray([embedding], dtype=np.float32), k)
+        return [
+            self.document(int(position))
+            for position in positions[0]
+            if position != -1
+        ]
+
+    def to_faiss(self) -> FAISS:
+        """An in-memory, writable copy (e.g. before adding an uploaded PDF)"""
+        count = self.index.ntotal
+        index = faiss.IndexFlatL2(self.index.d)
+        if count:
+            index.add(self.index.reconstruct_n(0, count))
+        ids = [str(position) for position in range(count)]
+        return FAISS(
+            None,
+            index,
+            InMemoryDocstore(
+                {
+                    doc_id: self.document(position)
+                    for position, doc_id in enumerate(ids)
+                }
+            ),
+            dict(enumerate(ids)),
+        )
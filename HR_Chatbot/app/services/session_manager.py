@@ -1,48 +1,190 @@
+import sys
+import threading
+import time
 import uuid
+from collections import OrderedDict
 from typing import Dict, List, Optional
 
+# Roles are stored as one byte per turn instead of a string per message
+ROLES = ("system", "user", "assistant", "tool")
+ROLE_CODES = {role: code for code, role in enumerate(ROLES)}
+
+# Approximate per-turn overhead on top of the text itself: role byte, list
+# slots and the cached Azure-format dict once rendered
+TURN_OVERHEAD_BYTES = 250
 
-class SessionManager:
-    """Manages chat sessions and conversation history"""
+
+class _Session:
+    __slots__ = ("roles", "texts", "azure_messages", "size_bytes", "last_access")
 
     def __init__(self):
+        self.roles = bytearray()
+        self.texts: List[str] = []
+        # Azure-format history, rendered on first use and then extended per turn
+        self.azure_messages: Optional[List[dict]] = None
+        self.size_bytes = 0
+        self.last_access = time.monotonic()
+
+
+class SessionManager:
+    """
+    Manages chat sessions and conversation history.
+
+    Each session keeps its turns as a role-code bytearray plus a list of
+    texts. The Azure OpenAI message list is rendered once per session and
+    extended as turns are added, so building a prompt no longer re-walks the
+    whole history. Sessions idle for longer than ``ttl_seconds`` expire, and
+    the least recently used sessions are evicted while the estimated total
+    size is above ``max_bytes`` (0 disables either limit).
+    """
+
+    def __init__(self, ttl_seconds: float = 0, max_bytes: int = 0):
         # In-memory session storage (consider using Redis or database for production)
-        self.sessions: Dict[str, List[dict]] = {}
+        self.sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.expired = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+
+    def _get(self, session_id: str) -> Optional[_Session]:
+        """Look up a live session and mark it most recently used (lock held)"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        now = time.monotonic()
+        if self.ttl_seconds and now - session.last_access > self.ttl_seconds:
+            self._remove(session_id)
+            self.expired += 1
+            return None
+        session.last_access = now
+        self.sessions.move_to_end(session_id)
+        return session
+
+    def _get_or_create(self, session_id: str) -> _Session:
+        session = self._get(session_id)
+        if session is None:
+            session = self.sessions[session_id] = _Session()
+            self._evict()
+        return session
+
+    def _remove(self, session_id: str) -> None:
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            self.total_bytes -= session.size_bytes
+
+    def _evict(self) -> None:
+        """Drop expired sessions, then least recently used ones over the cap"""
+        now = time.monotonic()
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if self.ttl_seconds and now - session.last_access > self.ttl_seconds:
+                self.expired += 1
+            elif (
+                self.max_bytes
+                and self.total_bytes > self.max_bytes
+                and len(self.sessions) > 1
+            ):
+                self.evicted += 1
+            else:
+                break
+            self._remove(session_id)
 
     def create_session(self) -> str:
         """Create a new session and return its ID"""
         session_id = str(uuid.uuid4())
-        self.sessions[session_id] = []
+        with self._lock:
+            self.sessions[session_id] = _Session()
+            self._evict()
         return session_id
 
     def get_session(self, session_id: str) -> Optional[List[dict]]:
-        """Get conversation history for a session"""
-        return self.sessions.get(session_id)
+        """Get conversation history for a session (content-array format)"""
+        with self._lock:
+            session = self._get(session_id)
+            if session is None:
+                return None
+            return [
+                {"role": ROLES[code], "content": [{"type": "text", "text": text}]}
+                for code, text in zip(session.roles, session.texts)
+            ]
+
+    def has_history(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._get(session_id)
+            return bool(session and session.texts)
+
+    def get_azure_messages(self, session_id: str) -> List[dict]:
+        """
+        Session history as Azure OpenAI messages ({"role", "content": str}).
+
+        The returned list is the session's cached rendering; callers copy it
+        (e.g. list.extend) rather than mutate it.
+        """
+        with self._lock:
+            session = self._get(session_id)
+            if session is None:
+                return []
+            if session.azure_messages is None:
+                session.azure_messages = [
+                    {"role": ROLES[code], "content": text}
+                    for code, text in zip(session.roles, session.texts)
+                ]
+            return session.azure_messages
 
     def ensure_session(self, session_id: str) -> None:
         """Ensure a session exists, create it if it doesn't"""
-        if session_id not in self.sessions:
-            self.sessions[session_id] = []
+        with self._lock:
+            self._get_or_create(session_id)
+
+    def add_turn(self, session_id: str, role: str, text: str) -> None:
+        """Append one turn to a session, creating the session if needed"""
+        code = ROLE_CODES[role]
+        with self._lock:
+            session = self._get_or_create(session_id)
+            session.roles.append(code)
+            session.texts.append(text)
+            if session.azure_messages is not None:
+                session.azure_messages.append({"role": ROLES[code], "content": text})
+            size = sys.getsizeof(text) + TURN_OVERHEAD_BYTES
+            session.size_bytes += size
+            self.total_bytes += size
+            self._evict()
 
     def add_message(self, session_id: str, message: dict) -> None:
-        """Add a message to the session history"""
-        if session_id not in self.sessions:
-            self.sessions[session_id] = []
-        self.sessions[session_id].append(message)
+        """Add a message ({"role", "content": str or content array}) to the session"""
+        content = message["content"]
+        if isinstance(content, list):
+            content = " ".join(
+                item.get("text", "") for item in content if item.get("type") == "text"
+            )
+        self.add_turn(session_id, message["role"], content)
 
     def add_messages(self, session_id: str, messages: List[dict]) -> None:
         """Add multiple messages to the session history"""
-        if session_id not in self.sessions:
-            self.sessions[session_id] = []
-        self.sessions[session_id].extend(messages)
+        for message in messages:
+            self.add_message(session_id, message)
 
     def clear_session(self, session_id: str) -> None:
         """Clear conversation history for a session"""
-        if session_id in self.sessions:
-            self.sessions[session_id] = []
+        with self._lock:
+            if self._get(session_id) is not None:
+                self.total_bytes -= self.sessions[session_id].size_bytes
+                self.sessions[session_id] = _Session()
 
     def delete_session(self, session_id: str) -> None:
         """Delete a session"""
-        if session_id in self.sessions:
-            del self.sessions[session_id]
+        with self._lock:
+            self._remove(session_id)
 
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "sessions": len(self.sessions),
+                "estimated_bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "expired": self.expired,
+                "evicted": self.evicted,
+            }
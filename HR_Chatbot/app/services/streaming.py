@@ -0,0 +1,167 @@
+import asyncio
+import threading
+from typing import AsyncIterator, List, Optional
+
+# Ends the delta queue; anything else non-str is an upstream exception
+_END = object()
+
+
+class StreamMetrics:
+    """
+    Counters for streamed completions.
+
+    Azure OpenAI sends roughly one token per content delta, so deltas are
+    used as the token count. For a cancelled stream, the tokens saved are
+    estimated as the mean length of completed answers minus what had already
+    been generated, and bounded above by the unused max_completion_tokens.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.deltas = 0
+        self.frames = 0
+        self.completed_tokens = 0
+        self.tokens_streamed_before_cancel = 0
+        self.tokens_saved_estimate = 0
+        self.tokens_saved_upper_bound = 0
+
+    def record(self, outcome: str, deltas: int, frames: int, max_tokens: int) -> None:
+        with self._lock:
+            self.started += 1
+            self.deltas += deltas
+            self.frames += frames
+            if outcome == "completed":
+                self.completed += 1
+                self.completed_tokens += deltas
+            elif outcome == "cancelled":
+                self.cancelled += 1
+                self.tokens_streamed_before_cancel += deltas
+                remaining = max(0, max_tokens - deltas)
+                expected = (
+                    self.completed_tokens / self.completed
+                    if self.completed
+                    else max_tokens
+                )
+                self.tokens_saved_estimate += min(
+                    remaining, max(0, round(expected - deltas))
+                )
+                self.tokens_saved_upper_bound += remaining
+            else:
+                self.failed += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "streams": self.started,
+                "completed": self.completed,
+                "cancelled": self.cancelled,
+                "failed": self.failed,
+                "deltas": self.deltas,
+                "frames": self.frames,
+                "deltas_per_frame": self.deltas / self.frames if self.frames else 0.0,
+                "mean_completed_tokens": (
+                    self.completed_tokens / self.completed if self.completed else 0.0
+                ),
+                "tokens_streamed_before_cancel": self.tokens_streamed_before_cancel,
+                "tokens_saved_estimate": self.tokens_saved_estimate,
+                "tokens_saved_upper_bound": self.tokens_saved_upper_bound,
+            }
+
+
+class CoalescingStream:
+    """
+    Re-chunk an upstream stream of tiny deltas into larger frames.
+
+    A background task reads the upstream into a bounded queue, so a slow
+    client applies backpressure instead of the answer piling up in memory.
+    The first delta is sent at once (time to first token); after that,
+    deltas are held for at most ``flush_interval`` seconds or until
+    ``max_frame_chars`` have accumulated. ``aclose()`` cancels the reader,
+    which closes the upstream (and its HTTP connection) immediately.
+    """
+
+    def __init__(
+        self,
+        deltas: AsyncIterator[str],
+        flush_interval: float = 0.05,
+        max_frame_chars: int = 512,
+        queue_size: int = 64,
+    ):
+        self.deltas = deltas
+        self.flush_interval = flush_interval
+        self.max_frame_chars = max_frame_chars
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._reader: Optional[asyncio.Task] = None
+
+        # Everything sent so far, joined once at the end
+        self.parts: List[str] = []
+        self.delta_count = 0
+        self.frame_count = 0
+
+    async def _read(self) -> None:
+        try:
+            async for delta in self.deltas:
+                await self._queue.put(delta)
+            await self._queue.put(_END)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self._queue.put(e)
+        finally:
+            await self.deltas.aclose()
+
+    def _frame(self, buffer: List[str]) -> str:
+        frame = "".join(buffer)
+        buffer.clear()
+        self.parts.append(frame)
+        self.frame_count += 1
+        return frame
+
+    async def __aiter__(self):
+        loop = asyncio.get_running_loop()
+        self._reader = asyncio.create_task(self._read())
+        buffer: List[str] = []
+        buffered_chars = 0
+        deadline = 0.0
+
+        while True:
+            timeout = max(0.0, deadline - loop.time()) if buffer else None
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                buffered_chars = 0
+                yield self._frame(buffer)
+                continue
+
+            if item is _END:
+                break
+            if isinstance(item, Exception):
+                raise item
+
+            self.delta_count += 1
+            if not buffer:
+                deadline = loop.time() + self.flush_interval
+            buffer.append(item)
+            buffered_chars += len(item)
+            if self.frame_count == 0 or buffered_chars >= self.max_frame_chars:
+                buffered_chars = 0
+                yield self._frame(buffer)
+
+        if buffer:
+            yield self._frame(buffer)
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    async def aclose(self) -> None:
+        if self._reader is not None and not self._reader.done():
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
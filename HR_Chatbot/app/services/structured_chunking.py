@@ -0,0 +1,237 @@
+import re
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+# "3) Types of Leave", "1. SCOPE AND PURPOSE", "4.2 Notice Period", "Section 3: Recruitment"
+_NUMBERED_HEADING = re.compile(r"^(?:[Ss]ection\s+)?\d{1,2}(?:\.\d{1,2})*\s*[.):]?\s+[A-Z]")
+# Table of contents lines end in a page number or range ("8 Leave Policy 25-30")
+_TOC_LINE = re.compile(r"\s\d{1,3}(?:\s*-\s*\d{1,3})?$")
+MAX_HEADING_CHARS = 80
+MAX_HEADING_WORDS = 12
+
+# A heading only starts a new section once the current one has this much body;
+# tables of contents and runs of headings stay together
+MIN_SECTION_CHARS = 200
+# Longer sections are split into parts so a parent fits a context budget
+MAX_SECTION_CHARS = 4000
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for English prose)"""
+    return (len(text) + 3) // 4
+
+
+def is_heading(line: str) -> bool:
+    line = line.strip()
+    if not 3 <= len(line) <= MAX_HEADING_CHARS or line.endswith((".", ",", ";")):
+        return False
+    if len(line.split()) > MAX_HEADING_WORDS or _TOC_LINE.search(line):
+        return False
+    if _NUMBERED_HEADING.match(line):
+        return True
+    letters = [c for c in line if c.isalpha()]
+    return len(letters) >= 4 and all(c.isupper() for c in letters)
+
+
+def _repeated_lines(pages: List[Document]) -> set:
+    """Running headers / footers: lines on at least half of 3+ pages"""
+    if len(pages) < 3:
+        return set()
+    counts = Counter(
+        line
+        for page in pages
+        for line in {line.strip() for line in page.page_content.splitlines()}
+        if line
+    )
+    return {line for line, count in counts.items() if count * 2 >= len(pages)}
+
+
+def split_sections(
+    pages: List[Document], max_section_chars: int = MAX_SECTION_CHARS
+) -> List[dict]:
+    """
+    Group one PDF's pages into heading-delimited sections.
+
+    Returns dicts with ``section_id``, ``title``, ``source``, ``page`` (first
+    page) and ``text``, plus ``page_offsets``: (char offset, page) pairs used
+    to give child chunks their page numbers.
+    """
+    if not pages:
+        return []
+    source = pages[0].metadata.get("source", "")
+    boilerplate = _repeated_lines(pages)
+    document_title = Path(source).stem
+
+    sections = []
+    current = None
+
+    def start(title: str, page: int) -> dict:
+        section = {
+            "title": title,
+            "page": page,
+            "lines": [],
+            "chars": 0,
+            "page_offsets": [],
+        }
+        sections.append(section)
+        return section
+
+    for page in pages:
+        page_number = page.metadata.get("page", 0)
+        for raw_line in page.page_content.splitlines():
+            line = raw_line.strip()
+            if not line or line in boilerplate:
+                continue
+            if is_heading(line) and (
+                current is None or current["chars"] >= MIN_SECTION_CHARS
+            ):
+                current = start(line, page_number)
+            elif current is None:
+                current = start(document_title, page_number)
+            page_offsets = current["page_offsets"]
+            if not page_offsets or page_offsets[-1][1] != page_number:
+                page_offsets.append((current["chars"], page_number))
+            current["lines"].append(line)
+            # Offsets count the "\n" the lines are joined with
+            current["chars"] += len(line) + 1
+
+    result = []
+    part_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=max_section_chars, chunk_overlap=0
+    )
+    for section in sections:
+        text = "\n".join(section["lines"])
+        if len(text) <= max_section_chars:
+            parts = [text]
+        else:
+            parts = part_splitter.split_text(text)
+        offset = 0
+        for number, part in enumerate(parts):
+            offset = max(text.find(part, offset), offset)
+            page_offsets = [
+                (max(0, at - offset), page)
+                for at, page in section["page_offsets"]
+                if at < offset + len(part)
+            ]
+            # Keep only the page the part starts on and those after it
+            while len(page_offsets) > 1 and page_offsets[1][0] == 0:
+                page_offsets.pop(0)
+            result.append(
+                {
+                    "section_id": uuid.uuid4().hex[:16],
+                    "title": section["title"]
+                    + (f" (part {number + 1})" if len(parts) > 1 else ""),
+                    "source": Path(source).name,
+                    "page": page_offsets[0][1] if page_offsets else section["page"],
+                    "text": part,
+                    "page_offsets": page_offsets,
+                }
+            )
+    return result
+
+
+def split_children(
+    sections: List[dict], text_splitter: RecursiveCharacterTextSplitter
+) -> List[Document]:
+    """Small retrieval chunks, each prefixed with and linked to its section"""
+    children = []
+    for section in sections:
+        offset = 0
+        for piece in text_splitter.split_text(section["text"]):
+            at = section["text"].find(piece, offset)
+            offset = max(at, offset)
+            page = section["page"]
+            for start, page_number in section["page_offsets"]:
+                if start <= offset:
+                    page = page_number
+            if piece.startswith(section["title"]):
+                content = piece
+            else:
+                content = f"{section['title']}\n{piece}"
+            children.append(
+                Document(
+                    page_content=content,
+                    metadata={
+                        "source": section["source"],
+                        "page": page,
+                        "section_id": section["section_id"],
+                    },
+                )
+            )
+    return children
+
+
+def split_structured(
+    pages: List[Document], child_splitter: RecursiveCharacterTextSplitter
+) -> Tuple[List[Document], Dict[str, dict]]:
+    """Child chunks for retrieval plus their parent sections keyed by section_id"""
+    sections = split_sections(pages)
+    children = split_children(sections, child_splitter)
+    parents = {
+        section["section_id"]: {
+            key: section[key] for key in ("title", "source", "page", "text")
+        }
+        for section in sections
+    }
+    return children, parents
+
+
+def _block(title: str, text: str) -> str:
+    return f"[{title}]\n{text}" if title else text
+
+
+def assemble_context(
+    children: List[Document],
+    sections: Dict[str, dict],
+    token_budget: int,
+    expand_parents: int = 2,
+) -> str:
+    """
+    Build the LLM context from ranked child chunks within a token budget.
+
+    The best-matching children (up to ``expand_parents`` distinct sections)
+    are replaced by their whole parent section when it fits the remaining
+    budget; the other children are included as they are, in rank order,
+    while they fit. Children whose section is already included are skipped.
+    """
+    blocks = []
+    used = 0
+    tried = set()
+    expanded = set()
+    seen_texts = set()
+
+    for child in children:
+        section_id = child.metadata.get("section_id")
+        if section_id in expanded:
+            continue
+        section = sections.get(section_id) if section_id else None
+
+        can_expand = section_id not in tried and len(tried) < expand_parents
+        if section is not None and can_expand:
+            tried.add(section_id)
+            title = f"{section['source']} - {section['title']}"
+            block = _block(title, section["text"])
+            cost = estimate_tokens(block)
+            if used + cost <= token_budget:
+                blocks.append(block)
+                used += cost
+                expanded.add(section_id)
+                continue
+
+        if child.page_content in seen_texts:
+            continue
+        title = f"{section['source']} - {section['title']}" if section else ""
+        block = _block(title, child.page_content)
+        cost = estimate_tokens(block)
+        if used + cost > token_budget:
+            continue
+        blocks.append(block)
+        used += cost
+        seen_texts.add(child.page_content)
+
+    return "\n\n".join(blocks)
@@ -1,45 +1,192 @@
 import os
+import threading
 from pathlib import Path
+from typing import List, Optional
 
+import faiss
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import PyPDFLoader
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
 
+from app.core.config import settings
+from app.services.dedup import find_near_duplicates
 from app.services.embeddings import EmbeddingsService
+from app.services.index_artifact import latest_version, load_artifact, load_sections
+from app.services.metrics import metrics
+from app.services.mmap_store import MmapVectorStore
+from app.services.structured_chunking import assemble_context, split_structured
 
 
 class VectorStoreService:
-    def __init__(self, embeddings_service: EmbeddingsService):
+    def __init__(
+        self,
+        embeddings_service: EmbeddingsService,
+        artifact_root: Optional[Path] = None,
+    ):
         self.embeddings_service = embeddings_service
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=3000, chunk_overlap=200
         )
+        # Small heading-prefixed chunks for CHUNKING_MODE=structured
+        self.child_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=settings.CHILD_CHUNK_SIZE,
+            chunk_overlap=settings.CHILD_CHUNK_OVERLAP,
+        )
         self.vector_store = None
+        # Parent sections of structured chunks, keyed by metadata["section_id"]
+        self.sections = {}
+
+        # Index artifacts published by app/build_index.py
+        self.artifact_root = Path(artifact_root) if artifact_root else None
+        self.version = None
+        self._reload_lock = threading.Lock()
+        # Bumped on every change to the served index (hot-swap or ingestion),
+        # so caches keyed on it also see uploads that keep the same version
+        self.revision = 0
+
+        # Chunks seen and near-duplicates skipped before embedding
+        self.dedup_stats = {"chunks": 0, "duplicates": 0}
+
+    def load_latest(self) -> bool:
+        """
+        Swap in the newest published index artifact if it is not loaded yet.
+
+        The new index is fully loaded before the reference is replaced, so
+        in-flight searches finish on the old index. Returns True if a new
+        version was swapped in.
+        """
+        if self.artifact_root is None:
+            return False
+
+        with self._reload_lock:
+            version = latest_version(self.artifact_root)
+            if version is None or version == self.version:
+                return False
+
+            vector_store, manifest = load_artifact(
+                self.artifact_root, version, use_mmap=settings.INDEX_MMAP
+            )
+            sections = load_sections(self.artifact_root, version)
+            self.vector_store = vector_store
+            self.sections = sections
+            self.version = version
+            self.revision += 1
+            print(
+                f"Loaded index version {version} with "
+                f"{manifest.get('chunk_count', vector_store.index.ntotal)} chunks"
+            )
+            return True
+
+    def deduplicate(self, chunks: List[Document]) -> List[Document]:
+        """
+        Collapse near-duplicate chunks (SimHash) into one canonical chunk.
+
+        The canonical chunk keeps the text and metadata of the first
+        occurrence and additionally lists every occurrence in
+        metadata["sources"] as {"source", "page"}.
+        """
+        sources = [
+            [
+                {
+                    "source": Path(chunk.metadata.get("source", "")).name,
+                    "page": chunk.metadata.get("page"),
+                }
+            ]
+            for chunk in chunks
+        ]
+        metadatas = [
+            {**chunk.metadata, "sources": refs} for chunk, refs in zip(chunks, sources)
+        ]
+        if settings.CHUNK_DEDUP_MAX_DISTANCE < 0:
+            return [
+                Document(page_content=chunk.page_content, metadata=metadata)
+                for chunk, metadata in zip(chunks, metadatas)
+            ]
+
+        canonical_of = find_near_duplicates(
+            [chunk.page_content for chunk in chunks],
+            max_distance=settings.CHUNK_DEDUP_MAX_DISTANCE,
+        )
+        for index, canonical in enumerate(canonical_of):
+            if canonical != index:
+                sources[canonical].extend(sources[index])
+
+        kept = [
+            Document(page_content=chunk.page_content, metadata=metadata)
+            for index, (chunk, metadata) in enumerate(zip(chunks, metadatas))
+            if canonical_of[index] == index
+        ]
+        duplicates = len(chunks) - len(kept)
+        self.dedup_stats["chunks"] += len(chunks)
+        self.dedup_stats["duplicates"] += duplicates
+        if duplicates:
+            print(
+                f"Skipped {duplicates} near-duplicate chunk(s) of {len(chunks)}, "
+                f"saving {duplicates} embedding call(s)"
+            )
+        return kept
+
+    def split_pdf(self, pdf_path: str):
+        """
+        Load and split one PDF according to CHUNKING_MODE.
+
+        Returns (chunks, sections): "structured" yields small heading-prefixed
+        chunks linked to their parent sections; "fixed" yields the original
+        3000-character chunks and no sections.
+        """
+        documents = PyPDFLoader(pdf_path).load()
+        if settings.CHUNKING_MODE == "structured":
+            return split_structured(documents, self.child_splitter)
+        return self.text_splitter.split_documents(documents), {}
 
     def ingest_pdf(self, pdf_path: str):
-        # Load PDF
-        loader = PyPDFLoader(pdf_path)
-        documents = loader.load()
+        """
+        Add a PDF to the served index.
+
+        Safe to run in a worker thread: the additions are merged into a
+        private copy of the index, which then replaces the served one, so
+        searches on the event loop never see a store mid-update.
+        """
+        # Load and split PDF
+        chunks, sections = self.split_pdf(pdf_path)
 
-        # Split documents
-        texts = self.text_splitter.split_documents(documents)
+        # Drop near-duplicate chunks before embedding
+        texts = self.deduplicate(chunks)
 
         # Get text content from documents
         text_contents = [text.page_content for text in texts]
+        metadatas = [text.metadata for text in texts]
 
         # Create embeddings for each text
         embeddings = [
             self.embeddings_service.get_embeddings(text) for text in text_contents
         ]
+        new_store = FAISS.from_embeddings(
+            zip(text_contents, embeddings), embeddings, metadatas=metadatas
+        )
 
-        # If vector_store exists, add to it; otherwise create new
-        if self.vector_store is None:
-            text_embedding_pairs = zip(text_contents, embeddings)
-            self.vector_store = FAISS.from_embeddings(text_embedding_pairs, embeddings)
-        else:
-            # Add to existing vector store by merging
-            new_store = FAISS.from_embeddings(zip(text_contents, embeddings), embeddings)
-            self.vector_store.merge_from(new_store)
+        # Also serializes with hot-swaps, so neither overwrites the other
+        with self._reload_lock:
+            current = self.vector_store
+            if current is None:
+                self.vector_store = new_store
+            else:
+                # A memory-mapped artifact is read-only and to_faiss copies it
+                if isinstance(current, MmapVectorStore):
+                    merged = current.to_faiss()
+                else:
+                    merged = FAISS(
+                        None,
+                        faiss.clone_index(current.index),
+                        InMemoryDocstore(dict(current.docstore._dict)),
+                        dict(current.index_to_docstore_id),
+                    )
+                merged.merge_from(new_store)
+                self.vector_store = merged
+            self.sections = {**self.sections, **sections}
+            self.revision += 1
 
     def ingest_directory(self, directory_path: str):
         """Ingest all PDF files from a directory"""
@@ -56,13 +203,13 @@ class VectorStoreService:
         
         # Collect all documents from all PDFs first
         all_texts = []
+        all_sections = {}
         for pdf_file in pdf_files:
             print(f"Loading: {pdf_file.name}")
             try:
-                loader = PyPDFLoader(str(pdf_file))
-                documents = loader.load()
-                texts = self.text_splitter.split_documents(documents)
+                texts, sections = self.split_pdf(str(pdf_file))
                 all_texts.extend(texts)
+                all_sections.update(sections)
                 print(f"Loaded {len(texts)} chunks from {pdf_file.name}")
             except Exception as e:
                 print(f"Error loading {pdf_file.name}: {str(e)}")
@@ -71,7 +218,10 @@ class VectorStoreService:
         if not all_texts:
             print("No documents found to index")
             return
-        
+
+        # Boilerplate repeated across policies is embedded and stored once
+        all_texts = self.deduplicate(all_texts)
+
         # Get text content from all documents
         text_contents = [text.page_content for text in all_texts]
         
@@ -84,15 +234,64 @@ class VectorStoreService:
         # Create vector store from all documents
         print("Building vector store...")
         text_embedding_pairs = zip(text_contents, embeddings)
-        self.vector_store = FAISS.from_embeddings(text_embedding_pairs, embeddings)
+        self.vector_store = FAISS.from_embeddings(
+            text_embedding_pairs,
+            embeddings,
+            metadatas=[text.metadata for text in all_texts],
+        )
+        self.sections = all_sections
+        self.revision += 1
         print(f"Successfully indexed {len(pdf_files)} PDF file(s) with {len(text_contents)} total chunks")
 
-    async def similarity_search(self, query: str, k: int = 4):
-        if not self.vector_store:
+    @property
+    def index_key(self) -> tuple:
+        """Identifies the content being served; changes whenever the index does"""
+        return (self.version, self.revision)
+
+    async def similarity_search(
+        self, query: str, k: int = 4, query_embedding: Optional[List[float]] = None
+    ):
+        # Take one reference so a hot-swap cannot change the store mid-call
+        vector_store = self.vector_store
+        if not vector_store:
             raise ValueError(
                 "Vector store not initialized. Please ingest documents first."
             )
 
-        query_embedding = self.embeddings_service.get_embeddings(query)
-        results = self.vector_store.similarity_search_by_vector(query_embedding, k=k)
+        if query_embedding is None:
+            with metrics.stage("embed"):
+                query_embedding = await self.embeddings_service.get_query_embedding(
+                    query
+                )
+        with metrics.stage("search"):
+            results = vector_store.similarity_search_by_vector(query_embedding, k=k)
         return results
+
+    async def retrieve_context(
+        self, query: str, query_embedding: Optional[List[float]] = None
+    ) -> str:
+        """
+        Context text for the LLM prompt.
+
+        Structured indexes retrieve RETRIEVAL_TOP_K small chunks and assemble
+        them, expanding the best matches into their parent sections, within
+        CONTEXT_TOKEN_BUDGET. Indexes without sections (fixed chunking or
+        older artifacts) keep the top-4 chunks joined as before.
+        """
+        sections = self.sections
+        if not sections:
+            documents = await self.similarity_search(
+                query, query_embedding=query_embedding
+            )
+            return "\n".join(doc.page_content for doc in documents)
+
+        documents = await self.similarity_search(
+            query, k=settings.RETRIEVAL_TOP_K, query_embedding=query_embedding
+        )
+        with metrics.stage("assemble"):
+            return assemble_context(
+                documents,
+                sections,
+                token_budget=settings.CONTEXT_TOKEN_BUDGET,
+                expand_parents=settings.CONTEXT_EXPAND_PARENTS,
+            )
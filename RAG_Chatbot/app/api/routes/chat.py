@@ -2,8 +2,12 @@ from fastapi import APIRouter, UploadFile, File, HTTPException
 from pydantic import BaseModel
 from typing import List
 import tempfile
+from pathlib import Path
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
 from app.services.azure_openai import AzureOpenAIService
 from app.services.embeddings import EmbeddingsService
+from app.services.single_flight import SingleFlight, conversation_key
 from app.services.vector_store import VectorStoreService
 
 router = APIRouter()
@@ -11,7 +15,11 @@ router = APIRouter()
 # Initialize services
 openai_service = AzureOpenAIService()
 embeddings_service = EmbeddingsService()
-vector_store_service = VectorStoreService(embeddings_service)
+vector_store_service = VectorStoreService(
+    embeddings_service,
+    storage_path=Path(__file__).resolve().parents[2] / settings.VECTOR_STORE_PATH
+)
+chat_flights = SingleFlight()
 
 class ChatMessage(BaseModel):
     role: str
@@ -20,34 +28,55 @@ class ChatMessage(BaseModel):
 class ChatRequest(BaseModel):
     messages: List[ChatMessage]
 
+async def generate_response(messages: List[dict]) -> str:
+    # Get relevant context from vector store
+    last_user_message = next(
+        (msg for msg in reversed(messages) if msg["role"] == "user"),
+        None
+    )
+
+    if last_user_message:
+        context = await vector_store_service.similarity_search(last_user_message["content"])
+        context_text = "\n".join([doc.page_content for doc in context])
+
+        # Add context to system message
+        system_message = {
+            "role": "system",
+            "content": f"Use the following context to answer the user's question:\n\n{context_text}"
+        }
+
+        messages = [system_message] + messages
+
+    # Blocking HTTP call; run it off the event loop so identical requests can
+    # arrive (and coalesce) while it is in flight
+    return await run_in_threadpool(openai_service.get_completion, messages)
+
 @router.post("/chat")
 async def chat(request: ChatRequest):
     try:
-        # Get relevant context from vector store
-        last_user_message = next(
-            (msg for msg in reversed(request.messages) if msg.role == "user"),
-            None
+        messages = [msg.dict() for msg in request.messages]
+        if not settings.CHAT_COALESCING_ENABLED:
+            response = await generate_response(messages)
+            return {"response": response}
+
+        # Identical concurrent requests wait for one embedding, search and completion
+        # A completion, plus a query embedding unless retrieval is BM25-only
+        has_question = any(msg["role"] == "user" for msg in messages)
+        embeds = has_question and settings.RETRIEVAL_MODE != "bm25"
+        response = await chat_flights.do(
+            conversation_key(messages),
+            lambda: generate_response(messages),
+            upstream_calls=2 if embeds else 1,
         )
-        
-        if last_user_message:
-            context = await vector_store_service.similarity_search(last_user_message.content)
-            context_text = "\n".join([doc.page_content for doc in context])
-            
-            # Add context to system message
-            system_message = {
-                "role": "system",
-                "content": f"Use the following context to answer the user's question:\n\n{context_text}"
-            }
-            
-            messages = [system_message] + [msg.dict() for msg in request.messages]
-        else:
-            messages = [msg.dict() for msg in request.messages]
-        
-        response = openai_service.get_completion(messages)
         return {"response": response}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/chat/coalescing")
+async def chat_coalescing_stats():
+    # Coalescing rate and embedding / completion calls saved
+    return chat_flights.stats()
+
 @router.post("/upload-pdf")
 async def upload_pdf(file: UploadFile = File(...)):
     if not file.filename.endswith('.pdf'):
@@ -60,9 +89,24 @@ async def upload_pdf(file: UploadFile = File(...)):
             tmp_file.write(content)
             tmp_file.flush()
 
-            # Ingest PDF into vector store
-            vector_store_service.ingest_pdf(tmp_file.name)
+            # Ingest PDF into vector store (added to the documents already indexed);
+            # parsing blocks, so keep it off the event loop
+            document = await run_in_threadpool(
+                vector_store_service.ingest_pdf, tmp_file.name, source=file.filename
+            )
 
-        return {"message": "PDF successfully ingested"}
+        return {"message": "PDF successfully ingested", "document": document}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/documents")
+async def list_documents():
+    # Indexed documents with their chunk id ranges
+    return {"documents": vector_store_service.list_documents()}
+
+@router.delete("/documents/{document_id}")
+async def delete_document(document_id: str):
+    # Waits for any document being committed, so keep it off the event loop
+    if not await run_in_threadpool(vector_store_service.delete_document, document_id):
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {"message": "Document deleted successfully"} 
@@ -9,9 +9,31 @@ class Settings(BaseSettings):
     AZURE_OPENAI_DEPLOYMENT_NAME: str
     AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME: str
 
+    # Concurrent identical /chat requests share one embedding, search and completion
+    CHAT_COALESCING_ENABLED: bool = True
+
+    # Retrieval: "vector" (remote query embedding + exact search), "bm25" (in-process
+    # keyword index, no network) or "hybrid" (reciprocal-rank fusion of both)
+    RETRIEVAL_MODE: str = "vector"
+    # Hybrid: candidates taken from each ranking, and the RRF rank constant
+    HYBRID_CANDIDATES: int = 20
+    RRF_K: int = 60
+
     # Vector Store Settings
+    # Embedding storage precision: "float16" halves vector memory at about the
+    # same search speed (FAISS fp16 scalar quantizer)
+    VECTOR_DTYPE: str = "float32"
     VECTOR_STORE_PATH: str = "vector_store"
 
+    # Ingestion: parse, embed and index PDF uploads as an overlapping pipeline
+    # (False: parse everything, then embed chunk by chunk, then index)
+    INGEST_PIPELINE_ENABLED: bool = True
+    # Chunks per embeddings request, and requests in flight at once
+    EMBEDDING_BATCH_SIZE: int = 16
+    EMBEDDING_CONCURRENCY: int = 4
+    # Parsed chunks waiting for embedding; the parser blocks when it is full
+    INGEST_QUEUE_SIZE: int = 256
+
     # CORS Settings
     ALLOWED_ORIGINS: List[str] = ["*"]
 
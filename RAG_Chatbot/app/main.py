@@ -20,3 +20,9 @@ app.add_middleware(
 
 # Include routers
 app.include_router(chat.router, prefix="/api/v1")
+
+@app.on_event("startup")
+async def load_index():
+    # Restore previously uploaded documents from disk (no embedding calls)
+    documents = chat.vector_store_service.load()
+    print(f"Loaded {documents} document(s) from {chat.vector_store_service.storage.root}")
@@ -0,0 +1,158 @@
+"""
+Benchmark memory and search latency of the chunk store against the
+LangChain FAISS wrapper.
+
+Builds a ChunkStore of N synthetic chunks (random text and random unit
+vectors, added as 1000-chunk documents) and times top-k vector searches,
+including building the k Documents. The LangChain FAISS wrapper (one
+Document per chunk in an InMemoryDocstore plus a UUID mapping) is measured
+at --baseline-chunks and its per-chunk cost reported, since at 1M chunks
+it does not fit next to the store in a small machine. Memory is traced
+Python/NumPy allocation plus the vectors held by FAISS, which tracemalloc
+does not see.
+
+Run from the RAG_Chatbot folder:
+    python -m app.scripts.benchmark_chunk_store --chunks 1000000 --dim 1536 --dtype float16
+"""
+
+import argparse
+import gc
+import random
+import statistics
+import time
+import tracemalloc
+import uuid
+
+import numpy as np
+
+from app.services.chunk_store import ChunkStore
+
+WORDS = [f"word{i}" for i in range(20000)]
+DOCUMENT_CHUNKS = 1000
+
+
+def synthetic_texts(count, chars, rng):
+    words_per_text = max(1, chars // 9)
+    return [" ".join(rng.choices(WORDS, k=words_per_text)) for _ in range(count)]
+
+
+def synthetic_vectors(count, dim, rng):
+    vectors = rng.standard_normal((count, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def time_searches(search, queries):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.mean(latencies), percentile(latencies, 0.95)
+
+
+def build_chunk_store(chunks, dim, dtype, chars, seed):
+    rng, vector_rng = random.Random(seed), np.random.default_rng(seed)
+    store = ChunkStore(dtype=dtype)
+    for first in range(0, chunks, DOCUMENT_CHUNKS):
+        count = min(DOCUMENT_CHUNKS, chunks - first)
+        store.add(
+            uuid.uuid4().hex[:16],
+            "synthetic.pdf",
+            synthetic_texts(count, chars, rng),
+            synthetic_vectors(count, dim, vector_rng),
+        )
+    return store
+
+
+def build_langchain_faiss(chunks, dim, chars, seed):
+    from langchain_community.vectorstores import FAISS
+
+    rng, vector_rng = random.Random(seed), np.random.default_rng(seed)
+    store = None
+    for first in range(0, chunks, DOCUMENT_CHUNKS):
+        count = min(DOCUMENT_CHUNKS, chunks - first)
+        pairs = zip(synthetic_texts(count, chars, rng), synthetic_vectors(count, dim, vector_rng).tolist())
+        metadatas = [{"chunk_id": first + i} for i in range(count)]
+        if store is None:
+            store = FAISS.from_embeddings(pairs, None, metadatas=metadatas)
+        else:
+            store.add_embeddings(pairs, metadatas=metadatas)
+    return store
+
+
+def traced(build):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--chunks", type=int, default=1_000_000)
+    parser.add_argument("--baseline-chunks", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--dtype", default="float32", choices=["float32", "float16"])
+    parser.add_argument("--text-chars", type=int, default=800, help="Mean chunk length")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("-k", type=int, default=4)
+    args = parser.parse_args()
+
+    queries = synthetic_vectors(args.queries, args.dim, np.random.default_rng(1))
+    text_mib = args.chunks * args.text_chars / 2**20
+
+    if args.baseline_chunks:
+        faiss_store, traced_bytes, elapsed = traced(
+            lambda: build_langchain_faiss(args.baseline_chunks, args.dim, args.text_chars, 0)
+        )
+        total = traced_bytes + faiss_store.index.ntotal * args.dim * 4
+        mean, p95 = time_searches(
+            lambda query: faiss_store.similarity_search_by_vector(query.tolist(), k=args.k), queries
+        )
+        vectors = args.dim * 4
+        overhead = total / args.baseline_chunks - vectors - args.text_chars
+        print(
+            f"LangChain FAISS  {args.baseline_chunks:>9} chunks  {total / 2**20:8.1f} MiB  "
+            f"({overhead:5.0f} B/chunk beyond vector and text)  "
+            f"search mean {mean:7.2f} ms p95 {p95:7.2f} ms  build {elapsed:6.1f} s"
+        )
+        print(
+            f"  projected to {args.chunks} chunks: "
+            f"{(total / args.baseline_chunks) * args.chunks / 2**20:8.1f} MiB"
+        )
+        del faiss_store
+        gc.collect()
+
+    store, traced_bytes, elapsed = traced(
+        lambda: build_chunk_store(args.chunks, args.dim, args.dtype, args.text_chars, 0)
+    )
+    mean, p95 = time_searches(
+        lambda query: store.documents_for(row for row, _ in store.search(query, k=args.k)), queries
+    )
+    parts = store.nbytes()
+    total = traced_bytes + parts["vectors"]
+    overhead = (traced_bytes - parts["text"]) / args.chunks
+    print(
+        f"ChunkStore {args.dtype:<7} {args.chunks:>9} chunks  {total / 2**20:8.1f} MiB  "
+        f"({overhead:5.0f} B/chunk beyond vector and text)  "
+        f"search mean {mean:7.2f} ms p95 {p95:7.2f} ms  build {elapsed:6.1f} s"
+    )
+    print(
+        f"  vectors {parts['vectors'] / 2**20:.1f} MiB, text {parts['text'] / 2**20:.1f} MiB "
+        f"(~{text_mib:.0f} MiB expected), bookkeeping {parts['bookkeeping'] / 2**20:.1f} MiB"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark PDF ingestion wall-clock time, sequential versus pipelined.
+
+Builds a PDF of --pages pages by repeating the pages of the source PDF
+(unless --pdf is given), then ingests it twice into a fresh in-memory
+index: once the old way (parse everything, split, one embeddings request
+per chunk, index) and once through the parse → embed → index pipeline
+with the configured EMBEDDING_BATCH_SIZE, EMBEDDING_CONCURRENCY and
+INGEST_QUEUE_SIZE. Both runs must produce the same chunks.
+
+Embeddings come from the configured Azure OpenAI deployment, or, with
+--simulated-latency-ms, from a local stand-in that sleeps for a fixed
+round trip per request plus --simulated-ms-per-text per input (no network).
+
+Run from the RAG_Chatbot folder:
+    python -m app.scripts.benchmark_ingest --pages 500
+    python -m app.scripts.benchmark_ingest --pages 500 --simulated-latency-ms 80
+"""
+
+import argparse
+import hashlib
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from pypdf import PdfReader, PdfWriter
+
+from app.core.config import settings
+from app.services.vector_store import VectorStoreService
+
+RAG_DIR = Path(__file__).resolve().parents[2]
+DEFAULT_PDF = RAG_DIR / "Prompt Engineering 101 - v2.pdf"
+
+
+class SimulatedEmbeddings:
+    """Deterministic vectors after a fixed delay; counts requests"""
+
+    def __init__(self, latency_ms: float, ms_per_text: float, dim: int = 1536):
+        self.latency = latency_ms / 1000
+        self.per_text = ms_per_text / 1000
+        self.dim = dim
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def _vector(self, text):
+        seed = int.from_bytes(hashlib.md5(text.encode("utf-8")).digest()[:8], "little")
+        return np.random.default_rng(seed).standard_normal(self.dim, dtype=np.float32).tolist()
+
+    def get_embeddings_batch(self, texts):
+        with self._lock:
+            self.requests += 1
+        time.sleep(self.latency + self.per_text * len(texts))
+        return [self._vector(text) for text in texts]
+
+    def get_embeddings(self, text):
+        return self.get_embeddings_batch([text])[0]
+
+
+class CountingEmbeddings:
+    """Wraps EmbeddingsService to count requests"""
+
+    def __init__(self, service):
+        self.service = service
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def get_embeddings_batch(self, texts):
+        with self._lock:
+            self.requests += 1
+        return self.service.get_embeddings_batch(texts)
+
+    def get_embeddings(self, text):
+        with self._lock:
+            self.requests += 1
+        return self.service.get_embeddings(text)
+
+
+def build_pdf(source: Path, pages: int, path: Path) -> None:
+    reader = PdfReader(str(source))
+    writer = PdfWriter()
+    for number in range(pages):
+        writer.add_page(reader.pages[number % len(reader.pages)])
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def ingest(embeddings, pdf_path, pipelined):
+    settings.INGEST_PIPELINE_ENABLED = pipelined
+    service = VectorStoreService(embeddings)
+    embeddings.requests = 0
+    start = time.perf_counter()
+    document = service.ingest_pdf(str(pdf_path))
+    elapsed = time.perf_counter() - start
+    texts = [service.store.text_of(row) for row in range(service.store.size)]
+    return elapsed, document["chunk_count"], embeddings.requests, texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pdf", help="Ingest this PDF instead of building one")
+    parser.add_argument("--source", default=str(DEFAULT_PDF), help="Pages to repeat")
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--simulated-latency-ms", type=float)
+    parser.add_argument("--simulated-ms-per-text", type=float, default=1.0)
+    args = parser.parse_args()
+
+    if args.simulated_latency_ms is not None:
+        embeddings = SimulatedEmbeddings(args.simulated_latency_ms, args.simulated_ms_per_text)
+    else:
+        from app.services.embeddings import EmbeddingsService
+
+        embeddings = CountingEmbeddings(EmbeddingsService())
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = Path(args.pdf) if args.pdf else Path(tmp_dir) / "benchmark.pdf"
+        if not args.pdf:
+            build_pdf(Path(args.source), args.pages, pdf_path)
+        pages = len(PdfReader(str(pdf_path)).pages)
+        print(
+            f"{pdf_path.name}: {pages} pages, batch {settings.EMBEDDING_BATCH_SIZE}, "
+            f"concurrency {settings.EMBEDDING_CONCURRENCY}, queue {settings.INGEST_QUEUE_SIZE}"
+        )
+
+        results = {}
+        for name, pipelined in (("sequential", False), ("pipelined", True)):
+            elapsed, chunks, requests, texts = ingest(embeddings, pdf_path, pipelined)
+            results[name] = texts
+            print(
+                f"{name:<10} {elapsed:7.2f} s  {chunks} chunks  {requests} embedding requests  "
+                f"{pages / elapsed:6.1f} pages/s"
+            )
+        if results["sequential"] != results["pipelined"]:
+            raise SystemExit("Pipelined ingestion produced different chunks")
+
+
+if __name__ == "__main__":
+    main()
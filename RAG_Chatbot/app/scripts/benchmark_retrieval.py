@@ -0,0 +1,120 @@
+"""
+Benchmark retrieval latency and quality for each RETRIEVAL_MODE.
+
+Indexes the given PDFs (files or folders) once with the configured Azure
+OpenAI embeddings deployment, then runs every question in the questions file
+through vector, bm25 and hybrid retrieval. For each mode it reports search
+latency (including the query embedding round trip where there is one) and
+recall@k: the share of questions whose expected phrases all appear in the
+top-k chunks (case-insensitive, whitespace ignored).
+
+With --with-llm the retrieved chunks are also sent to the chat deployment
+as /chat does, adding completion latency and answer recall.
+
+Run from the RAG_Chatbot folder:
+    python -m app.scripts.benchmark_retrieval
+    python -m app.scripts.benchmark_retrieval path/to/pdfs --questions q.json -k 4
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import time
+from pathlib import Path
+
+from app.services.embeddings import EmbeddingsService
+from app.services.vector_store import RETRIEVAL_MODES, VectorStoreService
+
+RAG_DIR = Path(__file__).resolve().parents[2]
+DEFAULT_PDF = RAG_DIR / "Prompt Engineering 101 - v2.pdf"
+QUESTIONS_FILE = Path(__file__).with_name("retrieval_questions.json")
+
+
+def normalize(text: str) -> str:
+    return re.sub(r"\s+", "", text).lower()
+
+
+def contains_all(text: str, phrases) -> bool:
+    text = normalize(text)
+    return all(normalize(phrase) in text for phrase in phrases)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def pdf_paths(paths):
+    for path in map(Path, paths):
+        if path.is_dir():
+            yield from sorted(path.glob("*.pdf"))
+        else:
+            yield path
+
+
+async def run_mode(service, mode, questions, k, openai_service):
+    result = {"mode": mode, "latencies": [], "hits": 0, "llm_latencies": [], "answer_hits": 0}
+    for item in questions:
+        start = time.perf_counter()
+        documents = await service.similarity_search(item["question"], k=k, mode=mode)
+        result["latencies"].append(time.perf_counter() - start)
+        context_text = "\n".join(doc.page_content for doc in documents)
+        if contains_all(context_text, item["expected"]):
+            result["hits"] += 1
+
+        if openai_service is not None:
+            messages = [
+                {
+                    "role": "system",
+                    "content": f"Use the following context to answer the user's question:\n\n{context_text}",
+                },
+                {"role": "user", "content": item["question"]},
+            ]
+            start = time.perf_counter()
+            answer = await asyncio.to_thread(openai_service.get_completion, messages)
+            result["llm_latencies"].append(time.perf_counter() - start)
+            if contains_all(answer or "", item["expected"]):
+                result["answer_hits"] += 1
+    return result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("pdfs", nargs="*", default=[str(DEFAULT_PDF)])
+    parser.add_argument("--questions", default=str(QUESTIONS_FILE))
+    parser.add_argument("-k", type=int, default=4)
+    parser.add_argument("--with-llm", action="store_true", help="Also time completions")
+    args = parser.parse_args()
+
+    questions = json.loads(Path(args.questions).read_text(encoding="utf-8"))
+    service = VectorStoreService(EmbeddingsService())
+    for pdf in pdf_paths(args.pdfs):
+        service.ingest_pdf(str(pdf))
+
+    openai_service = None
+    if args.with_llm:
+        from app.services.azure_openai import AzureOpenAIService
+
+        openai_service = AzureOpenAIService()
+
+    print(f"{service.store.live_count} chunks, {len(questions)} questions, k={args.k}")
+    for mode in RETRIEVAL_MODES:
+        result = await run_mode(service, mode, questions, args.k, openai_service)
+        latencies = [seconds * 1000 for seconds in result["latencies"]]
+        line = (
+            f"{mode:<7} search mean {statistics.mean(latencies):8.2f} ms "
+            f"p95 {percentile(latencies, 0.95):8.2f} ms  "
+            f"recall@{args.k} {result['hits']}/{len(questions)}"
+        )
+        if result["llm_latencies"]:
+            line += (
+                f"  completion mean {statistics.mean(result['llm_latencies']):5.2f} s  "
+                f"answer recall {result['answer_hits']}/{len(questions)}"
+            )
+        print(line)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+# Words, plus compound tokens such as policy numbers ("HR-104", "4.2.1") or
+# form names ("Form-16") kept whole
+_TOKEN = re.compile(r"\w+(?:[-./]\w+)*")
+_SEPARATORS = re.compile(r"[-./]")
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for match in _TOKEN.finditer(text.lower()):
+        token = match.group()
+        tokens.append(token)
+        # Also index the parts, so "HR 104" and "hr-104" both match
+        if not token.isalnum():
+            tokens.extend(part for part in _SEPARATORS.split(token) if part)
+    return tokens
+
+
+def term_counts(text: str) -> Counter:
+    return Counter(tokenize(text))
+
+
+class BM25Index:
+    """
+    In-process Okapi BM25 inverted index that chunks can be added to and
+    removed from.
+
+    Chunks are identified by the caller's integer chunk ids. Postings are
+    append-only per term; removed chunks are masked out at query time, so
+    the document frequencies and average length used for scoring only count
+    live chunks. Searching needs no network.
+    """
+
+    def __init__(self, texts: Iterable[str] = (), k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._posting_ids: Dict[str, List[int]] = defaultdict(list)
+        self._posting_tfs: Dict[str, List[int]] = defaultdict(list)
+        # Postings as arrays, rebuilt for a term after it gets new postings
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        # Indexed by chunk id; grown by doubling
+        self.lengths = np.zeros(0, dtype=np.float32)
+        self.live = np.zeros(0, dtype=bool)
+        self.size = 0  # one past the highest chunk id
+        self.live_count = 0
+        self.live_length = 0.0
+
+        texts = list(texts)
+        if texts:
+            self.add(range(len(texts)), texts)
+
+    def _reserve(self, size: int) -> None:
+        if size <= len(self.lengths):
+            return
+        capacity = max(size, 2 * len(self.lengths), 1024)
+        lengths = np.zeros(capacity, dtype=np.float32)
+        lengths[: len(self.lengths)] = self.lengths
+        live = np.zeros(capacity, dtype=bool)
+        live[: len(self.live)] = self.live
+        self.lengths, self.live = lengths, live
+
+    def add(self, chunk_ids: Iterable[int], texts: Iterable[str]) -> None:
+        """Index new chunks; costs only the new chunks' tokens"""
+        self.add_counts(chunk_ids, (term_counts(text) for text in texts))
+
+    def add_counts(self, chunk_ids: Iterable[int], counts_per_chunk: Iterable[Counter]) -> None:
+        """Index new chunks already tokenized with ``term_counts``"""
+        for chunk_id, counts in zip(chunk_ids, counts_per_chunk):
+            self._reserve(chunk_id + 1)
+            self.size = max(self.size, chunk_id + 1)
+            length = sum(counts.values())
+            self.lengths[chunk_id] = length
+            self.live[chunk_id] = True
+            self.live_count += 1
+            self.live_length += length
+            for term, count in counts.items():
+                self._posting_ids[term].append(chunk_id)
+                self._posting_tfs[term].append(count)
+                self._arrays.pop(term, None)
+
+    def remove(self, chunk_ids: Iterable[int]) -> None:
+        for chunk_id in chunk_ids:
+            if chunk_id < self.size and self.live[chunk_id]:
+                self.live[chunk_id] = False
+                self.live_count -= 1
+                self.live_length -= float(self.lengths[chunk_id])
+
+    def _postings(self, term: str):
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            ids = self._posting_ids.get(term)
+            if not ids:
+                return None
+            arrays = self._arrays[term] = (
+                np.array(ids, dtype=np.int64),
+                np.array(self._posting_tfs[term], dtype=np.float32),
+            )
+        return arrays
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[int, float]]:
+        """Top ``k`` (chunk id, score) pairs; chunks sharing no term are left out"""
+        if not self.live_count:
+            return []
+        average_length = self.live_length / self.live_count
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term in set(tokenize(query)):
+            postings = self._postings(term)
+            if postings is None:
+                continue
+            ids, tf = postings
+            alive = self.live[ids]
+            ids, tf = ids[alive], tf[alive]
+            if not len(ids):
+                continue
+            # Lucene-style IDF; never negative for very common terms
+            idf = math.log(1 + (self.live_count - len(ids) + 0.5) / (len(ids) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self.lengths[ids] / average_length)
+            scores[ids] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        ranked = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(int(chunk_id), float(scores[chunk_id])) for chunk_id in ranked]
@@ -0,0 +1,137 @@
+from langchain_core.documents import Document
+from typing import Dict, Iterable, List, Tuple
+import faiss
+import numpy as np
+
+# Vectors are stored in blocks of at most this many rows, so growing the
+# store never copies (or temporarily doubles) the whole embedding matrix
+BLOCK_ROWS = 16384
+
+
+def _grow(array: np.ndarray, size: int) -> np.ndarray:
+    if size <= len(array):
+        return array
+    grown = np.zeros(max(size, 2 * len(array), 1024), dtype=array.dtype)
+    grown[: len(array)] = array
+    return grown
+
+
+class ChunkStore:
+    """
+    Compact chunk storage searched with flat FAISS indexes.
+
+    All chunk texts live in one UTF-8 buffer addressed by an int64 offset
+    array, and the owning document of each chunk in an int32 array. Rows are
+    chunk ids. Embeddings are held in flat FAISS indexes of BLOCK_ROWS rows
+    each, as float32 or as float16 (scalar quantizer, half the memory, same
+    search speed); both are searched exhaustively. A chunk costs its text,
+    its vector and 13 bytes of bookkeeping; ``Document`` objects are only
+    built for search hits. Removed rows are masked out and their memory is
+    reclaimed when the index is next loaded from disk; likewise ``documents``
+    keeps an entry for every document added since then, deleted ones included.
+    """
+
+    def __init__(self, dtype: str = "float32"):
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported vector dtype '{dtype}', expected float32 or float16")
+        self.dtype = dtype
+        self.dim = 0
+        self.blocks: List[faiss.Index] = []
+        self.live = np.zeros(0, dtype=bool)
+        self.doc_index = np.zeros(0, dtype=np.int32)
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.text = bytearray()
+        self.size = 0
+        self.live_count = 0
+        # (document_id, source) by doc_index
+        self.documents: List[Tuple[str, str]] = []
+
+    def add(self, document_id: str, source: str, texts: List[str], vectors: np.ndarray) -> range:
+        """Append one document's chunks; returns their row ids"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if not self.dim:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional embeddings, got {vectors.shape[1]}")
+
+        first, count = self.size, len(texts)
+        end = first + count
+        self.documents.append((document_id, source))
+
+        self.live = _grow(self.live, end)
+        self.doc_index = _grow(self.doc_index, end)
+        self.offsets = _grow(self.offsets, end + 1)
+
+        self.live[first:end] = True
+        self.doc_index[first:end] = len(self.documents) - 1
+        for row, text in enumerate(texts, start=first):
+            self.text += text.encode("utf-8")
+            self.offsets[row + 1] = len(self.text)
+
+        row = first
+        while row < end:
+            block, at = divmod(row, BLOCK_ROWS)
+            take = min(end - row, BLOCK_ROWS - at)
+            if block == len(self.blocks):
+                self.blocks.append(self._new_block())
+            self.blocks[block].add(vectors[row - first:row - first + take])
+            row += take
+
+        self.size = end
+        self.live_count += count
+        return range(first, end)
+
+    def _new_block(self) -> faiss.Index:
+        if self.dtype == "float16":
+            return faiss.IndexScalarQuantizer(
+                self.dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_L2
+            )
+        return faiss.IndexFlatL2(self.dim)
+
+    def remove(self, rows: Iterable[int]) -> None:
+        for row in rows:
+            if row < self.size and self.live[row]:
+                self.live[row] = False
+                self.live_count -= 1
+
+    def text_of(self, row: int) -> str:
+        return self.text[self.offsets[row]:self.offsets[row + 1]].decode("utf-8")
+
+    def document(self, row: int) -> Document:
+        document_id, source = self.documents[self.doc_index[row]]
+        return Document(
+            page_content=self.text_of(row),
+            metadata={"chunk_id": row, "document_id": document_id, "source": source},
+        )
+
+    def documents_for(self, rows: Iterable[int]) -> List[Document]:
+        # A row removed since it was ranked is skipped
+        return [self.document(row) for row in rows if row < self.size and self.live[row]]
+
+    def search(self, query: List[float], k: int = 4) -> List[Tuple[int, float]]:
+        """Exact nearest rows by squared L2 distance, as (row, distance) pairs"""
+        if not self.live_count:
+            return []
+        query = np.asarray(query, dtype=np.float32).reshape(1, -1)
+        candidates = []
+        for block_number, block in enumerate(self.blocks):
+            start = block_number * BLOCK_ROWS
+            live = self.live[start:start + block.ntotal]
+            # Ask for enough extra hits to make up for removed rows
+            wanted = min(block.ntotal, k + block.ntotal - int(np.count_nonzero(live)))
+            distances, rows = block.search(query, wanted)
+            candidates.extend(
+                (start + int(row), float(distance))
+                for distance, row in zip(distances[0], rows[0])
+                if row >= 0 and live[row]
+            )
+        candidates.sort(key=lambda candidate: candidate[1])
+        return candidates[:k]
+
+    def nbytes(self) -> Dict[str, int]:
+        """Bytes held by the store: vector codes, text and per-chunk arrays"""
+        return {
+            "vectors": sum(block.ntotal * block.sa_code_size() for block in self.blocks),
+            "text": len(self.text),
+            "bookkeeping": self.live.nbytes + self.doc_index.nbytes + self.offsets.nbytes,
+        }
@@ -1,5 +1,6 @@
 from openai import AzureOpenAI
 from ..core.config import settings
+from typing import List
 
 class EmbeddingsService:
     def __init__(self):
@@ -15,4 +16,11 @@ class EmbeddingsService:
             model=settings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME,
             input=text
         )
-        return response.data[0].embedding 
\ No newline at end of file
+        return response.data[0].embedding 
+    def get_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+        # One request for many inputs; results come back tagged with their index
+        response = self.client.embeddings.create(
+            model=settings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME,
+            input=texts
+        )
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
@@ -0,0 +1,55 @@
+import json
+import os
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+MANIFEST_FILE = "manifest.json"
+SEGMENTS_DIR = "documents"
+
+
+class IndexStorage:
+    """
+    Append-only on-disk layout for the multi-document index.
+
+    Every ingested document is written once as its own segment,
+    ``documents/<document_id>.npy`` (float32 vectors) plus
+    ``documents/<document_id>.json`` (chunk texts), and never rewritten.
+    ``manifest.json`` lists the live documents with their chunk id ranges;
+    it is small and replaced atomically after a segment is written, so a
+    crash mid-ingest leaves at worst an orphaned segment, never a torn index.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.segments = self.root / SEGMENTS_DIR
+
+    def load_manifest(self) -> dict:
+        path = self.root / MANIFEST_FILE
+        if not path.exists():
+            return {"next_chunk_id": 0, "documents": {}}
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def save_manifest(self, manifest: dict) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / MANIFEST_FILE
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def write_segment(self, document_id: str, vectors: np.ndarray, texts: List[str]) -> None:
+        self.segments.mkdir(parents=True, exist_ok=True)
+        np.save(self.segments / f"{document_id}.npy", vectors.astype(np.float32))
+        (self.segments / f"{document_id}.json").write_text(
+            json.dumps(texts, ensure_ascii=False), encoding="utf-8"
+        )
+
+    def read_segment(self, document_id: str) -> Tuple[np.ndarray, List[str]]:
+        vectors = np.load(self.segments / f"{document_id}.npy")
+        texts = json.loads((self.segments / f"{document_id}.json").read_text(encoding="utf-8"))
+        return vectors, texts
+
+    def delete_segment(self, document_id: str) -> None:
+        for suffix in (".npy", ".json"):
+            (self.segments / f"{document_id}{suffix}").unlink(missing_ok=True)
@@ -0,0 +1,106 @@
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+import numpy as np
+from langchain_community.document_loaders import PyPDFLoader
+
+# Marks the end of the parsed chunks
+_DONE = object()
+
+
+class IngestPipeline:
+    """
+    Parse → embed → index for one PDF, with the three stages overlapping.
+
+    A parser thread loads the PDF a page at a time, splits each page and
+    puts the chunks on a bounded queue. The calling thread takes chunks off
+    the queue, groups them into batches of ``batch_size`` and keeps up to
+    ``concurrency`` embeddings requests in flight; each finished batch is
+    handed to ``on_batch`` in document order as soon as it and every batch
+    before it are done. Backpressure: the parser waits while the queue is
+    full, and no new request is sent while ``concurrency`` are outstanding.
+    """
+
+    def __init__(
+        self,
+        text_splitter,
+        embed_batch: Callable[[List[str]], List[List[float]]],
+        batch_size: int = 16,
+        concurrency: int = 4,
+        queue_size: int = 256,
+    ):
+        self.text_splitter = text_splitter
+        self.embed_batch = embed_batch
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+
+    def run(self, pdf_path: str, on_batch: Callable[[List[str], np.ndarray], None]) -> int:
+        """Ingest ``pdf_path``; returns the number of chunks passed to ``on_batch``"""
+        chunks = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+
+        def put(item) -> bool:
+            # Blocks while the queue is full, unless the consumer has given up
+            while not stop.is_set():
+                try:
+                    chunks.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def parse():
+            try:
+                for page in PyPDFLoader(pdf_path).lazy_load():
+                    # Pages are split one by one, as split_documents does anyway
+                    for chunk in self.text_splitter.split_documents([page]):
+                        if not put(chunk.page_content):
+                            return
+                put(_DONE)
+            except Exception as e:
+                put(e)
+
+        parser = threading.Thread(target=parse, name="pdf-parser", daemon=True)
+        parser.start()
+
+        pending = deque()  # (texts, future) in document order
+        total = 0
+
+        def index_ready(outstanding: int):
+            # Index finished batches in order; wait for the oldest while more
+            # than ``outstanding`` requests remain
+            nonlocal total
+            while pending and (len(pending) > outstanding or pending[0][1].done()):
+                texts, future = pending.popleft()
+                on_batch(texts, np.asarray(future.result(), dtype=np.float32))
+                total += len(texts)
+
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="embed")
+        try:
+            batch = []
+            while True:
+                item = chunks.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                batch.append(item)
+                if len(batch) == self.batch_size:
+                    index_ready(self.concurrency - 1)
+                    pending.append((batch, executor.submit(self.embed_batch, batch)))
+                    batch = []
+                else:
+                    index_ready(self.concurrency)
+            if batch:
+                pending.append((batch, executor.submit(self.embed_batch, batch)))
+            index_ready(0)
+        finally:
+            stop.set()
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+        return total
@@ -0,0 +1,85 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, List
+
+
+def normalize_message(text: str) -> str:
+    # Case and whitespace differences should not split identical questions
+    return " ".join(text.split()).casefold()
+
+
+def conversation_key(messages: List[dict]) -> str:
+    """
+    Key for a chat request: the normalized last user message plus a hash of
+    the conversation before it (roles and contents).
+    """
+    last_user_index = next(
+        (i for i in range(len(messages) - 1, -1, -1) if messages[i]["role"] == "user"),
+        None,
+    )
+    if last_user_index is None:
+        prefix, question = messages, ""
+    else:
+        prefix = messages[:last_user_index] + messages[last_user_index + 1:]
+        question = normalize_message(messages[last_user_index]["content"])
+    prefix_hash = hashlib.sha256(
+        json.dumps(prefix, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+    return f"{prefix_hash}:{question}"
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into one computation.
+
+    The first caller for a key starts the computation as its own task; callers
+    arriving while it runs wait on that task and share its result (or
+    exception). A caller that goes away does not cancel the computation for
+    the others. Nothing is cached once the computation finishes.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.followers = 0
+        self.errors = 0
+        self.upstream_calls_saved = 0
+
+    async def do(
+        self, key: str, compute: Callable[[], Awaitable[Any]], upstream_calls: int = 1
+    ) -> Any:
+        """
+        Run ``compute`` for ``key``, or wait for the run already in flight.
+
+        ``upstream_calls`` is the number of API calls one computation makes;
+        every coalesced caller adds it to ``upstream_calls_saved``.
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(compute())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.followers += 1
+            self.upstream_calls_saved += upstream_calls
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if task.cancelled() or task.exception() is not None:
+            self.errors += 1
+
+    def stats(self) -> dict:
+        requests = self.leaders + self.followers
+        return {
+            "requests": requests,
+            "computations": self.leaders,
+            "coalesced": self.followers,
+            "coalescing_rate": self.followers / requests if requests else 0.0,
+            "upstream_calls_saved": self.upstream_calls_saved,
+            "in_flight": len(self._in_flight),
+            "failed_computations": self.errors,
+        }
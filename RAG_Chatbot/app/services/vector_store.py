@@ -1,40 +1,272 @@
-from langchain_community.vectorstores import FAISS
 from langchain_community.document_loaders import PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.services.bm25 import BM25Index, term_counts
+from app.services.chunk_store import ChunkStore
 from app.services.embeddings import EmbeddingsService
+from app.services.index_storage import IndexStorage
+from app.services.ingest_pipeline import IngestPipeline
+from collections import Counter
+from pathlib import Path
+from typing import List, Optional
+import numpy as np
 import os
+import threading
+import time
+import uuid
+
+RETRIEVAL_MODES = ("vector", "bm25", "hybrid")
 
 class VectorStoreService:
-    def __init__(self, embeddings_service: EmbeddingsService):
+    """
+    Append-only multi-document index.
+
+    Each document gets a contiguous range of chunk ids (recorded in the
+    manifest) shared by the chunk store (texts and embeddings) and BM25.
+    Ingesting a document embeds, indexes and persists only that document's
+    chunks; deleting one removes its id range. PDFs go through a parse →
+    embed → index pipeline (``IngestPipeline``). With ``storage_path`` set,
+    every document is stored as its own segment and ``load()`` restores the
+    index on startup without any embedding calls.
+    """
+
+    def __init__(self, embeddings_service: EmbeddingsService, storage_path: Optional[Path] = None):
         self.embeddings_service = embeddings_service
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,
             chunk_overlap=200
         )
-        self.vector_store = None
+        # Chunk texts and embeddings, searched directly (exact L2)
+        self.store = ChunkStore(dtype=settings.VECTOR_DTYPE)
+        # Lexical index over the same chunks
+        self.bm25_index = BM25Index()
+
+        self.storage = IndexStorage(storage_path) if storage_path else None
+        self.manifest = {"next_chunk_id": 0, "documents": {}}
+        # Serializes committing and deleting documents (manifest and disk)
+        self._lock = threading.Lock()
+        # Held briefly around every read or change of the in-memory indexes:
+        # a FAISS block must never be searched while rows are being added
+        self._index_lock = threading.Lock()
+
+    def load(self) -> int:
+        """
+        Rebuild the in-memory indexes from the persisted segments.
+
+        Chunk ids are reassigned contiguously, so the ranges of deleted
+        documents take no memory after a restart.
+        """
+        if self.storage is None:
+            return 0
+        with self._lock:
+            manifest = self.storage.load_manifest()
+            next_chunk_id = 0
+            for document_id, document in manifest["documents"].items():
+                vectors, texts = self.storage.read_segment(document_id)
+                document["first_chunk_id"] = next_chunk_id
+                self._add_chunks(document_id, document["source"], next_chunk_id, vectors, texts)
+                next_chunk_id += len(texts)
+            if manifest["next_chunk_id"] != next_chunk_id:
+                manifest["next_chunk_id"] = next_chunk_id
+                self.storage.save_manifest(manifest)
+            self.manifest = manifest
+        return len(manifest["documents"])
+
+    def ingest_pdf(self, pdf_path: str, source: Optional[str] = None) -> dict:
+        source = source or os.path.basename(pdf_path)
+        if settings.INGEST_PIPELINE_ENABLED:
+            return self._ingest_pipelined(pdf_path, source)
 
-    def ingest_pdf(self, pdf_path: str):
         # Load PDF
         loader = PyPDFLoader(pdf_path)
         documents = loader.load()
-        
+
         # Split documents
         texts = self.text_splitter.split_documents(documents)
-        
+
         # Get text content from documents
         text_contents = [text.page_content for text in texts]
-        
+        return self.add_document(text_contents, source)
+
+    def _ingest_pipelined(self, pdf_path: str, source: str) -> dict:
+        """
+        Embeddings and BM25 term counts are staged privately as batches
+        arrive, overlapping parsing and embedding; the finished document is
+        then committed in one step. Neither lock is held meanwhile.
+        """
+        pipeline = IngestPipeline(
+            self.text_splitter,
+            self.embeddings_service.get_embeddings_batch,
+            batch_size=settings.EMBEDDING_BATCH_SIZE,
+            concurrency=settings.EMBEDDING_CONCURRENCY,
+            queue_size=settings.INGEST_QUEUE_SIZE,
+        )
+        texts, vectors, counts = [], [], []
+
+        def on_batch(batch_texts: List[str], batch_vectors: np.ndarray):
+            texts.extend(batch_texts)
+            vectors.append(batch_vectors)
+            counts.extend(term_counts(text) for text in batch_texts)
+
+        pipeline.run(pdf_path, on_batch)
+        if not texts:
+            raise ValueError(f"No text could be extracted from {source}")
+        return self._commit_document(source, texts, np.concatenate(vectors), counts)
+
+    def add_document(self, text_contents: List[str], source: str) -> dict:
+        """Embed, index and persist one document's chunks; returns its manifest entry"""
+        if not text_contents:
+            raise ValueError(f"No text could be extracted from {source}")
+
         # Create embeddings for each text
-        embeddings = [self.embeddings_service.get_embeddings(text) 
+        embeddings = [self.embeddings_service.get_embeddings(text)
                      for text in text_contents]
+        vectors = np.array(embeddings, dtype=np.float32)
+        return self._commit_document(source, text_contents, vectors)
+
+    def _commit_document(
+        self,
+        source: str,
+        texts: List[str],
+        vectors: np.ndarray,
+        counts: Optional[List[Counter]] = None,
+    ) -> dict:
+        with self._lock:
+            document_id = uuid.uuid4().hex[:16]
+            first_chunk_id = self.manifest["next_chunk_id"]
+            document = {
+                "source": source,
+                "first_chunk_id": first_chunk_id,
+                "chunk_count": len(texts),
+                "created_at": time.time(),
+            }
+            manifest = {
+                "next_chunk_id": first_chunk_id + len(texts),
+                "documents": {**self.manifest["documents"], document_id: document},
+            }
+            # Persist first: a document in memory is always on disk too
+            if self.storage is not None:
+                self.storage.write_segment(document_id, vectors, texts)
+                self.storage.save_manifest(manifest)
+            self._add_chunks(document_id, source, first_chunk_id, vectors, texts, counts)
+            self.manifest = manifest
+        return {"document_id": document_id, **document}
+
+    def _add_chunks(
+        self,
+        document_id: str,
+        source: str,
+        first_chunk_id: int,
+        vectors: np.ndarray,
+        texts: List[str],
+        counts: Optional[List[Counter]] = None,
+    ):
+        # Store rows are chunk ids; they link vector and BM25 results
+        with self._index_lock:
+            chunk_ids = self.store.add(document_id, source, texts, vectors)
+            if chunk_ids.start != first_chunk_id:
+                raise RuntimeError("Chunk store is out of step with the manifest")
+            if counts is None:
+                self.bm25_index.add(chunk_ids, texts)
+            else:
+                self.bm25_index.add_counts(chunk_ids, counts)
+
+    def delete_document(self, document_id: str) -> bool:
+        """Remove a document's chunk id range from every index and from disk"""
+        with self._lock:
+            document = self.manifest["documents"].get(document_id)
+            if document is None:
+                return False
+            chunk_ids = range(document["first_chunk_id"], document["first_chunk_id"] + document["chunk_count"])
+            manifest = {
+                "next_chunk_id": self.manifest["next_chunk_id"],
+                "documents": {
+                    other_id: other for other_id, other in self.manifest["documents"].items()
+                    if other_id != document_id
+                },
+            }
+            if self.storage is not None:
+                self.storage.save_manifest(manifest)
 
-        text_embedding_pairs = zip(text_contents, embeddings)
-        self.vector_store = FAISS.from_embeddings(text_embedding_pairs, embeddings)
+            with self._index_lock:
+                self.store.remove(chunk_ids)
+                self.bm25_index.remove(chunk_ids)
+            self.manifest = manifest
 
-    async def similarity_search(self, query: str, k: int = 4):
-        if not self.vector_store:
+            if self.storage is not None:
+                self.storage.delete_segment(document_id)
+        return True
+
+    def list_documents(self) -> List[dict]:
+        return [
+            {"document_id": document_id, **document}
+            for document_id, document in self.manifest["documents"].items()
+        ]
+
+    async def similarity_search(self, query: str, k: int = 4, mode: Optional[str] = None):
+        """
+        Top-k chunks for a query using RETRIEVAL_MODE (or ``mode``):
+        "vector" embeds the query remotely and searches the chunk store, "bm25" searches
+        the in-process keyword index without any network call, and "hybrid"
+        fuses both rankings with reciprocal-rank fusion.
+        """
+        if not self.store.live_count:
             raise ValueError("Vector store not initialized. Please ingest documents first.")
 
-        query_embedding = self.embeddings_service.get_embeddings(query)
-        results = self.vector_store.similarity_search_by_vector(query_embedding, k=k)
-        return results
+        mode = mode or settings.RETRIEVAL_MODE
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode '{mode}', expected one of {RETRIEVAL_MODES}")
+
+        if mode == "vector":
+            return await self.vector_search(query, k)
+
+        if mode == "bm25":
+            documents = await run_in_threadpool(self._bm25_documents, query, k)
+            if documents:
+                return documents
+            # Nothing shares a term with the query (e.g. a paraphrase); only
+            # the embedding can find it
+            return await self.vector_search(query, k)
+
+        # Hybrid: rank by sum of 1 / (RRF_K + rank) across both result lists
+        candidates = max(k, settings.HYBRID_CANDIDATES)
+        lexical = [
+            chunk_id
+            for chunk_id, _ in await run_in_threadpool(
+                self._locked, self.bm25_index.search, query, candidates
+            )
+        ]
+        semantic = [chunk_id for chunk_id, _ in await self.vector_hits(query, candidates)]
+        fused = {}
+        for ranking in (lexical, semantic):
+            for rank, chunk_id in enumerate(ranking):
+                fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (settings.RRF_K + rank + 1)
+        best = sorted(fused, key=fused.get, reverse=True)[:k]
+        return await run_in_threadpool(self._locked, self.store.documents_for, best)
+
+    async def vector_hits(self, query: str, k: int = 4):
+        # Embedding is a blocking HTTP call; keep the event loop free
+        query_embedding = await run_in_threadpool(self.embeddings_service.get_embeddings, query)
+        return await run_in_threadpool(self._locked, self.store.search, query_embedding, k)
+
+    async def vector_search(self, query: str, k: int = 4):
+        query_embedding = await run_in_threadpool(self.embeddings_service.get_embeddings, query)
+        return await run_in_threadpool(self._vector_documents, query_embedding, k)
+
+    def _locked(self, search, *args):
+        # Searches run in the threadpool, not on the event loop: a large index
+        # takes a while to scan, and the lock may be held by an ingestion
+        with self._index_lock:
+            return search(*args)
+
+    def _vector_documents(self, query_embedding, k: int):
+        # Documents are only built for the top-k rows
+        with self._index_lock:
+            hits = self.store.search(query_embedding, k=k)
+            return self.store.documents_for(chunk_id for chunk_id, _ in hits)
+
+    def _bm25_documents(self, query: str, k: int):
+        with self._index_lock:
+            hits = self.bm25_index.search(query, k)
+            return self.store.documents_for(chunk_id for chunk_id, _ in hits) if hits else []